@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Incrementally refresh a BibTeX file against Crossref.
+Usage: python bib_refresh.py <file.bib> [--state FILE] [--since YYYY-MM-DD] [--dry-run]
+       python citation_lookup.py --refresh <file.bib> [...]
+
+The refresh keeps a small state file next to the bibliography
+(<file.bib>.refresh.json) with the date of the last run and the Crossref
+`indexed` timestamp of every DOI it has seen. On later runs only DOIs that
+Crossref re-indexed since then are downloaded, using batched
+filter=from-index-date:<last run>,doi:A,doi:B,... queries, so the cost of a
+nightly refresh follows how many records changed rather than how many
+entries the file has. DOIs new to the file are fetched in full. DOIs that
+Crossref does not know are listed in the state file (and the summary) and
+afterwards only checked for changes like the others. DOIs containing a
+comma cannot go into a filter value, so they are fetched one request each
+on every run.
+
+Changed entries are re-rendered with the same BibTeX templates as
+citation_lookup.py and replaced in place; their citation keys, the order of
+entries and everything else in the file are left as they are. Entries
+without a doi field are never touched.
+"""
+import argparse
+import datetime
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from citation_formats import CitationRecord, render_bibtex
+from crossref_bulk import DEFAULT_CHUNK_SIZE, query_chunks, request_work
+from crossref_cache import canonicalize_doi, get_cache, normalize_doi
+
+STATE_SUFFIX = '.refresh.json'
+
+_ENTRY_START = re.compile(r'(?m)^(?=@)')
+_ENTRY_KEY = re.compile(r'@\w+\s*[{(]\s*([^,\s]+)\s*,')
+_DOI_FIELD = re.compile(r'(?im)^\s*doi\s*=\s*[{"]\s*([^}"]+?)\s*[}"]')
+_URL_FIELD = re.compile(r'(?im)^\s*url\s*=\s*[{"]\s*(https?://(?:dx\.)?doi\.org/[^}"]+?)\s*[}"]')
+
+
+def split_bib(text):
+    """
+    Split BibTeX source into chunks, each either an entry or the text before the first one.
+
+    Joining the chunks gives back the original text exactly.
+    """
+    return [chunk for chunk in _ENTRY_START.split(text) if chunk]
+
+
+def entry_end(chunk):
+    """
+    Return the offset just past an entry's closing brace (comments after it are not part of it).
+
+    Backslash-escaped braces (\\{ and \\}, as citation_formats writes them) do not count.
+    """
+    depth = 0
+    escaped = False
+    for offset, char in enumerate(chunk):
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return offset + 1
+    return len(chunk.rstrip())
+
+
+def entry_key(chunk):
+    """Return the citation key of an entry chunk, or None."""
+    match = _ENTRY_KEY.match(chunk)
+    return match.group(1) if match else None
+
+
+def entry_doi(chunk):
+    """Return the canonical DOI of an entry chunk (doi field, else a doi.org url), or None."""
+    if not chunk.startswith('@'):
+        return None
+    match = _DOI_FIELD.search(chunk) or _URL_FIELD.search(chunk)
+    return canonicalize_doi(match.group(1)) if match else None
+
+
+def read_bib_dois(path):
+    """Return the DOIs of every entry in a .bib file, in file order, without duplicates."""
+    with open(path, 'r', encoding='utf-8') as f:
+        chunks = split_bib(f.read())
+    dois = {}
+    for chunk in chunks:
+        doi = entry_doi(chunk)
+        if doi:
+            dois.setdefault(normalize_doi(doi), doi)
+    return list(dois.values())
+
+
+def indexed_timestamp(record):
+    """Return the Crossref `indexed` timestamp (ms since the epoch) of a work record, or 0."""
+    return (record.get('indexed') or {}).get('timestamp') or 0
+
+
+def render_entry(record, doi, key):
+    """Render a record with citation_lookup.py's BibTeX layout, keeping the existing citation key."""
+    rendered = render_bibtex(CitationRecord.from_crossref(record, doi))
+    bibtex = rendered['bibtex']
+    if key:
+        head, _, rest = bibtex.partition('\n')
+        bibtex = head[:len(head) - len(rendered['citation_key']) - 1] + f"{key},\n" + rest
+    return bibtex
+
+
+def load_state(path):
+    """Load the refresh state file, or return an empty state."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {'last_refresh': None, 'indexed': {}, 'not_found': []}
+    state.setdefault('last_refresh', None)
+    state.setdefault('indexed', {})
+    state.setdefault('not_found', [])
+    return state
+
+
+def _write_atomic(path, text):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+def refresh_bibliography(path, state_path=None, since=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=4,
+                         mailto=None, dry_run=False):
+    """
+    Re-validate a .bib file against Crossref, rewriting only entries whose records changed.
+
+    Args:
+        path: BibTeX file to refresh
+        state_path: Refresh state file (default: <path>.refresh.json)
+        since: Date (YYYY-MM-DD) to look for changes from, overriding the state file
+        chunk_size: DOIs per Crossref request
+        workers: Concurrent requests
+        mailto: Email for polite pool (defaults to CROSSREF_MAILTO)
+        dry_run: Report what would change without writing anything
+
+    Returns:
+        Summary dictionary (entry and request counts, updated citation keys)
+
+    Raises:
+        requests.exceptions.RequestException if a request fails; the file
+        and the state are then left unchanged
+    """
+    state_path = state_path or path + STATE_SUFFIX
+    state = load_state(state_path)
+    since = since or state['last_refresh']
+    started = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d')
+
+    with open(path, 'r', encoding='utf-8') as f:
+        chunks = split_bib(f.read())
+
+    positions = {}
+    for index, chunk in enumerate(chunks):
+        doi = entry_doi(chunk)
+        if doi:
+            positions.setdefault(normalize_doi(doi), []).append((index, doi))
+
+    # Only DOIs that comma-free filter values can carry are batched; see crossref_bulk
+    seen = set(state['indexed']) | set(state['not_found'])
+    known = [doi for doi in positions if doi in seen and ',' not in doi]
+    new = [doi for doi in positions if doi not in seen and ',' not in doi]
+    singles = [doi for doi in positions if ',' in doi]
+
+    records, changed_requests = {}, 0
+    if since:
+        records, changed_requests = query_chunks(known, chunk_size, workers,
+                                                 extra_filter=f'from-index-date:{since}', mailto=mailto)
+    else:
+        new = new + known
+    full, full_requests = query_chunks(new, chunk_size, workers, mailto=mailto)
+    records.update(full)
+
+    if singles:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for doi, record in zip(singles, executor.map(lambda doi: request_work(doi, mailto), singles)):
+                if record is not None:
+                    records[doi] = record
+
+    # A DOI fetched in full that did not come back is not in Crossref; remember
+    # it so later runs only look for it among re-indexed records
+    not_found = set(state['not_found']) & set(positions)
+    not_found.update(doi for doi in new + singles if doi not in records)
+    not_found.difference_update(records)
+    state['not_found'] = sorted(not_found)
+
+    cache = get_cache()
+    updated = []
+    changed = 0
+    for doi, record in records.items():
+        if doi not in positions:
+            continue
+        timestamp = indexed_timestamp(record)
+        if doi in state['indexed'] and timestamp and timestamp <= state['indexed'][doi]:
+            continue
+        state['indexed'][doi] = timestamp
+        if cache and not dry_run:
+            cache.put(doi, record)
+
+        rendered_differently = False
+        for index, doi_as_written in positions[doi]:
+            chunk = chunks[index]
+            end = entry_end(chunk)
+            entry = render_entry(record, doi_as_written, entry_key(chunk))
+            if entry != chunk[:end]:
+                chunks[index] = entry + chunk[end:]
+                updated.append(entry_key(chunk) or doi_as_written)
+                rendered_differently = True
+        changed += rendered_differently
+
+    if not dry_run:
+        if updated:
+            _write_atomic(path, ''.join(chunks))
+        state['last_refresh'] = started
+        _write_atomic(state_path, json.dumps(state, indent=1, sort_keys=True))
+
+    return {
+        'file': path,
+        'entries_with_doi': sum(len(entries) for entries in positions.values()),
+        'since': since,
+        'checked_for_changes': len(known) if since else 0,
+        'fetched_in_full': len(new),
+        'records_fetched': len(records),
+        'changed_records': changed,
+        'single_lookups': len(singles),
+        'requests': changed_requests + full_requests + len(singles),
+        'updated_entries': updated,
+        'not_found': state['not_found'],
+        'dry_run': dry_run
+    }
+
+
+def refresh_main(argv):
+    """Command-line entry point (also used by citation_lookup.py --refresh)."""
+    parser = argparse.ArgumentParser(description='Refresh the Crossref-derived entries of a .bib file')
+    parser.add_argument('--refresh', dest='refresh_path', metavar='FILE', help=argparse.SUPPRESS)
+    parser.add_argument('path', nargs='?', help='BibTeX file to refresh')
+    parser.add_argument('--state', help=f'Refresh state file (default: <file>{STATE_SUFFIX})')
+    parser.add_argument('--since', help='Look for changes since this date (YYYY-MM-DD) instead of the last run')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent requests')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='DOIs per Crossref request')
+    parser.add_argument('--dry-run', action='store_true', help='Report changes without writing the file')
+    args = parser.parse_args(argv)
+
+    path = args.refresh_path or args.path
+    if not path:
+        parser.error('a .bib file is required')
+
+    try:
+        summary = refresh_bibliography(path, state_path=args.state, since=args.since,
+                                       chunk_size=args.chunk_size, workers=args.workers,
+                                       dry_run=args.dry_run)
+    except (OSError, requests.exceptions.RequestException) as e:
+        print(json.dumps({'error': str(e)}, indent=2))
+        sys.exit(1)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    refresh_main(sys.argv[1:])
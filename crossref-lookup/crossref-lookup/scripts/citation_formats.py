@@ -0,0 +1,678 @@
+#!/usr/bin/env python3
+"""
+Normalized citation records and the renderers built on them.
+
+A Crossref work record is walked once into a compact CitationRecord; each
+output format is then a lookup in a per-format table keyed by the record's
+publication kind, rather than a re-parse of the nested metadata dict.
+
+  record = CitationRecord.from_crossref(metadata, doi)
+  render_apa7(record)    -> same dict as citation_lookup.generate_apa7_citation
+  render_bibtex(record)  -> same dict as citation_lookup.generate_bibtex
+  render_bibtex(record, aligned=False, key_separator='_')
+                         -> the entry format of generate_bibtex.py
+  render_formats(record, ['ris', 'csl-json'])
+                         -> {format name: rendered dict} for any registered formats
+
+CITATION_FORMATS is the registry of output formats (APA 7, BibTeX, RIS,
+CSL-JSON, EndNote XML); register_format() adds new ones.
+
+BibTeX field values are escaped in a single regex pass that also
+maps common accented letters, dashes, quotes and Greek letters to LaTeX.
+"""
+import json
+import re
+import unicodedata
+from xml.sax.saxutils import escape as xml_escape
+
+# Crossref/CSL publication types grouped by how they are cited
+PUBLICATION_KINDS = {
+    'journal-article': 'article',
+    'article-journal': 'article',
+    'book': 'book',
+    'monograph': 'book',
+    'book-chapter': 'chapter',
+    'book-section': 'chapter',
+    'proceedings-article': 'conference',
+    'paper-conference': 'conference'
+}
+
+# Combining mark -> LaTeX accent command
+LATEX_ACCENTS = {
+    '\u0300': '`', '\u0301': "'", '\u0302': '^', '\u0303': '~', '\u0304': '=',
+    '\u0306': 'u', '\u0307': '.', '\u0308': '"', '\u030a': 'r', '\u030b': 'H',
+    '\u030c': 'v', '\u0327': 'c', '\u0328': 'k'
+}
+
+# Letters and punctuation without a decomposition
+LATEX_SYMBOLS = {
+    '\u00df': r'{\ss}', '\u00e6': r'{\ae}', '\u00c6': r'{\AE}', '\u00f8': r'{\o}', '\u00d8': r'{\O}',
+    '\u0153': r'{\oe}', '\u0152': r'{\OE}', '\u0142': r'{\l}', '\u0141': r'{\L}', '\u0131': r'{\i}',
+    '\u2013': '--', '\u2014': '---', '\u2010': '-', '\u2011': '-', '\u2212': '-',
+    '\u2018': '`', '\u2019': "'", '\u201c': '``', '\u201d': "''",
+    '\u2026': r'\ldots{}', '\u00a0': '~', '\u00b5': r'$\mu$'
+}
+
+GREEK_LETTERS = {
+    '\u03b1': 'alpha', '\u03b2': 'beta', '\u03b3': 'gamma', '\u03b4': 'delta', '\u03b5': 'epsilon',
+    '\u03b6': 'zeta', '\u03b7': 'eta', '\u03b8': 'theta', '\u03b9': 'iota', '\u03ba': 'kappa',
+    '\u03bb': 'lambda', '\u03bc': 'mu', '\u03bd': 'nu', '\u03be': 'xi', '\u03c0': 'pi',
+    '\u03c1': 'rho', '\u03c2': 'varsigma', '\u03c3': 'sigma', '\u03c4': 'tau', '\u03c5': 'upsilon',
+    '\u03c6': 'phi', '\u03c7': 'chi', '\u03c8': 'psi', '\u03c9': 'omega',
+    '\u0393': 'Gamma', '\u0394': 'Delta', '\u0398': 'Theta', '\u039b': 'Lambda', '\u039e': 'Xi',
+    '\u03a0': 'Pi', '\u03a3': 'Sigma', '\u03a5': 'Upsilon', '\u03a6': 'Phi', '\u03a8': 'Psi',
+    '\u03a9': 'Omega'
+}
+
+# Crossref fields CitationRecord.from_crossref reads; searches add these to select=
+CITATION_FIELDS = ('DOI', 'title', 'type', 'author', 'published', 'published-print',
+                   'container-title', 'volume', 'issue', 'page', 'publisher', 'ISBN')
+
+CITATION_KEY_SKIP_WORDS = frozenset(['a', 'an', 'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of'])
+
+
+class CitationRecord:
+    """The fields every citation format needs, extracted once from a Crossref work."""
+
+    __slots__ = ('doi', 'type', 'kind', 'title', 'year', 'date_parts', 'authors', 'container',
+                 'volume', 'issue', 'pages', 'publisher', 'isbn')
+
+    def __init__(self, doi, type, title, year, authors, container=None, volume='', issue='',
+                 pages='', publisher=None, isbn=(), date_parts=()):
+        self.doi = doi
+        self.type = type
+        self.kind = PUBLICATION_KINDS.get(type, 'generic')
+        self.title = title
+        self.year = year
+        # Full publication date as (year[, month[, day]]) when known
+        self.date_parts = date_parts
+        # (given, family) pairs; either may be None when Crossref omits it
+        self.authors = authors
+        self.container = container
+        self.volume = volume
+        self.issue = issue
+        self.pages = pages
+        self.publisher = publisher
+        self.isbn = isbn
+
+    @classmethod
+    def from_crossref(cls, metadata, doi):
+        """Build a record from a Crossref work 'message' dictionary."""
+        year = 'n.d.'
+        date_parts = ()
+        pub_date = metadata.get('published') or metadata.get('published-print')
+        if pub_date and 'date-parts' in pub_date:
+            year = str(pub_date['date-parts'][0][0])
+            date_parts = tuple(part for part in pub_date['date-parts'][0] if part is not None)
+
+        return cls(
+            doi=doi,
+            type=metadata.get('type', 'misc'),
+            title=metadata['title'][0] if metadata.get('title') else 'Unknown title',
+            year=year,
+            authors=tuple((a.get('given'), a.get('family')) for a in metadata.get('author', [])),
+            container=metadata['container-title'][0] if metadata.get('container-title') else None,
+            volume=metadata.get('volume', ''),
+            issue=metadata.get('issue', ''),
+            pages=metadata.get('page', ''),
+            publisher=metadata.get('publisher'),
+            isbn=tuple(metadata.get('ISBN', [])),
+            date_parts=date_parts
+        )
+
+
+def _latex_escapes():
+    """Build the character -> BibTeX/LaTeX table used by sanitize_for_bibtex."""
+    table = {
+        '&': r'\&',
+        '%': r'\%',
+        '$': r'\$',
+        '#': r'\#',
+        '_': r'\_',
+        '{': r'\{',
+        '}': r'\}',
+        '~': r'\textasciitilde{}',
+        '^': r'\textasciicircum{}'
+    }
+
+    # Accented Latin letters, e.g. \u00e9 -> {\'e}, \u0161 -> {\v s}
+    for code in range(0xC0, 0x180):
+        char = chr(code)
+        decomposed = unicodedata.normalize('NFD', char)
+        if len(decomposed) == 2 and ord(decomposed[0]) < 128 and decomposed[1] in LATEX_ACCENTS:
+            command = LATEX_ACCENTS[decomposed[1]]
+            separator = ' ' if command.isalpha() else ''
+            table[char] = f"{{\\{command}{separator}{decomposed[0]}}}"
+
+    table.update(LATEX_SYMBOLS)
+    for char, name in GREEK_LETTERS.items():
+        table[char] = f"$\\{name}$"
+    return table
+
+
+BIBTEX_ESCAPES = _latex_escapes()
+_BIBTEX_ESCAPE_PATTERN = re.compile('[' + re.escape(''.join(BIBTEX_ESCAPES)) + ']')
+
+
+def _bibtex_escape(match):
+    return BIBTEX_ESCAPES[match.group()]
+
+
+def sanitize_for_bibtex(text):
+    """
+    Sanitize text for BibTeX format.
+
+    Every special character is replaced in one scan of the string; text
+    with nothing to escape (most titles and names) is returned as is.
+    """
+    if not text:
+        return ""
+    if _BIBTEX_ESCAPE_PATTERN.search(text) is None:
+        return text
+    return _BIBTEX_ESCAPE_PATTERN.sub(_bibtex_escape, text)
+
+
+def _citation_key(first_family, year, title, separator=''):
+    """first_family is None when there are no authors."""
+    if first_family is not None:
+        first_author = re.sub(r'[^a-z]', '', first_family.lower())
+    else:
+        first_author = 'unknown'
+
+    # First significant word from title
+    title_words = re.findall(r'\b\w+\b', title.lower())
+    first_word = next((word for word in title_words if word not in CITATION_KEY_SKIP_WORDS), 'work')
+
+    year_str = str(year) if year != 'n.d.' else 'nd'
+    return f"{first_author}{separator}{year_str}{separator}{first_word}"
+
+
+def generate_citation_key(authors, year, title, separator=''):
+    """Generate citation key: firstauthor_year_firstword"""
+    first_family = authors[0].get('family', 'unknown') if authors else None
+    return _citation_key(first_family, year, title, separator)
+
+
+def record_citation_key(record, separator=''):
+    """Citation key for a record (same rules as generate_citation_key)."""
+    first_family = None
+    if record.authors:
+        family = record.authors[0][1]
+        first_family = 'unknown' if family is None else family
+    return _citation_key(first_family, record.year, record.title, separator)
+
+
+# --- APA 7 -----------------------------------------------------------------
+
+def _apa_name(given, family):
+    if not family:
+        return 'Unknown'
+    if given:
+        # Extract initials
+        initials = ' '.join([f"{name[0]}." for name in given.split()])
+        return f"{family}, {initials}"
+    return family
+
+
+def format_author_apa7(author):
+    """Format a single author in APA 7 style."""
+    return _apa_name(author.get('given', ''), author.get('family', ''))
+
+
+def _apa_author_string(names):
+    if len(names) == 1:
+        return names[0]
+    if len(names) == 2:
+        return f"{names[0]}, & {names[1]}"
+    if len(names) <= 20:
+        return ', '.join(names[:-1]) + f", & {names[-1]}"
+    return ', '.join(names[:19]) + f", ... {names[-1]}"
+
+
+def _container(r):
+    """Container title, 'Unknown' only when the record has none (an empty title stays empty)."""
+    return r.container if r.container is not None else 'Unknown'
+
+
+def _apa_article(r, head):
+    citation = f"{head}. {_container(r)}"
+    if r.volume:
+        citation += f", {r.volume}"
+    if r.issue:
+        citation += f"({r.issue})"
+    if r.pages:
+        citation += f", {r.pages}"
+    return citation
+
+
+def _apa_book(r, head):
+    publisher = r.publisher if r.publisher is not None else 'Unknown Publisher'
+    return f"{head}. {publisher}"
+
+
+def _apa_chapter(r, head):
+    publisher = r.publisher if r.publisher is not None else 'Unknown Publisher'
+    citation = f"{head}. In {_container(r)}"
+    if r.pages:
+        citation += f" (pp. {r.pages})"
+    return f"{citation}. {publisher}"
+
+
+def _apa_conference(r, head):
+    citation = f"{head}. In {_container(r)}"
+    if r.pages:
+        citation += f" (pp. {r.pages})"
+    if r.publisher:
+        citation += f". {r.publisher}"
+    return citation
+
+
+def _apa_generic(r, head):
+    if r.publisher:
+        return f"{head}. {r.publisher}"
+    return head
+
+
+APA7_RENDERERS = {
+    'article': _apa_article,
+    'book': _apa_book,
+    'chapter': _apa_chapter,
+    'conference': _apa_conference,
+    'generic': _apa_generic
+}
+
+
+def render_apa7(record):
+    """Render an APA 7th edition citation dictionary from a CitationRecord."""
+    names = [_apa_name(given, family) for given, family in record.authors]
+    author_string = _apa_author_string(names) if names else 'Unknown Author'
+
+    head = f"{author_string} ({record.year}). {record.title}"
+    body = APA7_RENDERERS[record.kind](record, head)
+
+    return {
+        'citation': f"{body}. https://doi.org/{record.doi}",
+        'authors': names or ['Unknown Author'],
+        'year': record.year,
+        'title': record.title,
+        'type': record.type,
+        'style': 'APA 7th Edition'
+    }
+
+
+# --- BibTeX ----------------------------------------------------------------
+
+def _bib_container(r):
+    return sanitize_for_bibtex(_container(r))
+
+
+def _bib_publisher(default):
+    return lambda r: sanitize_for_bibtex(r.publisher if r.publisher is not None else default)
+
+
+REQUIRED, OPTIONAL = True, False
+
+# entry kind -> (BibTeX entry type, field-name width, [(field, value(record), required)])
+# A value of None takes the field every entry shares (author, title, year, doi).
+# Optional fields are written only when their value is non-empty.
+BIBTEX_LAYOUTS = {
+    'article': ('article', 7, (
+        ('author', None, REQUIRED), ('title', None, REQUIRED),
+        ('journal', _bib_container, REQUIRED),
+        ('year', None, REQUIRED),
+        ('volume', lambda r: r.volume, OPTIONAL),
+        ('number', lambda r: r.issue, OPTIONAL),
+        ('pages', lambda r: r.pages, OPTIONAL),
+        ('doi', None, REQUIRED)
+    )),
+    'book': ('book', 9, (
+        ('author', None, REQUIRED), ('title', None, REQUIRED),
+        ('publisher', _bib_publisher('Unknown'), REQUIRED),
+        ('year', None, REQUIRED),
+        ('isbn', lambda r: r.isbn[0] if r.isbn else '', OPTIONAL),
+        ('doi', None, REQUIRED)
+    )),
+    'chapter': ('inbook', 9, (
+        ('author', None, REQUIRED), ('title', None, REQUIRED),
+        ('booktitle', _bib_container, REQUIRED),
+        ('publisher', _bib_publisher('Unknown'), REQUIRED),
+        ('year', None, REQUIRED),
+        ('pages', lambda r: r.pages, OPTIONAL),
+        ('doi', None, REQUIRED)
+    )),
+    'conference': ('inproceedings', 9, (
+        ('author', None, REQUIRED), ('title', None, REQUIRED),
+        ('booktitle', _bib_container, REQUIRED),
+        ('year', None, REQUIRED),
+        ('publisher', _bib_publisher(''), OPTIONAL),
+        ('pages', lambda r: r.pages, OPTIONAL),
+        ('doi', None, REQUIRED)
+    )),
+    'generic': ('misc', 6, (
+        ('author', None, REQUIRED), ('title', None, REQUIRED), ('year', None, REQUIRED),
+        ('publisher', _bib_publisher(''), OPTIONAL),
+        ('doi', None, REQUIRED)
+    ))
+}
+
+
+def _compile_bibtex_templates(aligned):
+    """
+    Precompute each entry kind's field line prefixes ('  journal = {').
+
+    Rendering an entry then only evaluates the field values and joins
+    prefix + value + '}' once, instead of re-formatting every line.
+    """
+    templates = {}
+    for kind, (entry_type, width, fields) in BIBTEX_LAYOUTS.items():
+        compiled = []
+        for name, value, required in fields:
+            label = f"{name:<{width}}" if aligned else name
+            compiled.append((name, f"  {label} = {{", value, required))
+        templates[kind] = (f"@{entry_type}{{", tuple(compiled), entry_type)
+    return templates
+
+
+# aligned=True pads field names per entry type (citation_lookup.py);
+# aligned=False writes 'name = {value}' (generate_bibtex.py)
+BIBTEX_TEMPLATES = {
+    True: _compile_bibtex_templates(True),
+    False: _compile_bibtex_templates(False)
+}
+
+
+def render_bibtex(record, aligned=True, key_separator=''):
+    """
+    Render a BibTeX entry dictionary from a CitationRecord.
+
+    Args:
+        record: CitationRecord to render
+        aligned: Pad field names so the '=' signs line up
+        key_separator: String placed between the citation key parts
+
+    Returns:
+        Dictionary with bibtex, citation_key and entry_type
+    """
+    names = [f"{family}, {given}" if given else family
+             for given, family in record.authors if family]
+    common = {
+        'author': sanitize_for_bibtex(' and '.join(names) if names else 'Unknown Author'),
+        'title': sanitize_for_bibtex(record.title),
+        'year': record.year,
+        'doi': record.doi
+    }
+
+    head, fields, entry_type = BIBTEX_TEMPLATES[aligned][record.kind]
+    citation_key = record_citation_key(record, key_separator)
+
+    lines = []
+    for name, prefix, value, required in fields:
+        value = common[name] if value is None else value(record)
+        if value or required:
+            lines.append(f"{prefix}{value}}}")
+
+    return {
+        'bibtex': f"{head}{citation_key},\n" + ",\n".join(lines) + "\n}",
+        'citation_key': citation_key,
+        'entry_type': entry_type
+    }
+
+
+# --- RIS -------------------------------------------------------------------
+
+RIS_TYPES = {
+    'article': 'JOUR',
+    'book': 'BOOK',
+    'chapter': 'CHAP',
+    'conference': 'CPAPER',
+    'generic': 'GEN'
+}
+
+# Tag used for the container title of each kind
+RIS_CONTAINER_TAGS = {
+    'article': 'JO',
+    'chapter': 'T2',
+    'conference': 'T2'
+}
+
+
+def _split_pages(pages):
+    """Split '123-145' into ('123', '145'); a single page has no end page."""
+    start, _, end = pages.replace('\u2013', '-').partition('-')
+    return start.strip(), end.strip()
+
+
+def render_ris(record):
+    """Render a RIS entry dictionary from a CitationRecord."""
+    ris_type = RIS_TYPES[record.kind]
+    lines = [f"TY  - {ris_type}"]
+    for given, family in record.authors:
+        if family:
+            lines.append(f"AU  - {family}, {given}" if given else f"AU  - {family}")
+    lines.append(f"TI  - {record.title}")
+
+    container_tag = RIS_CONTAINER_TAGS.get(record.kind)
+    if container_tag and record.container:
+        lines.append(f"{container_tag}  - {record.container}")
+    if record.year != 'n.d.':
+        lines.append(f"PY  - {record.year}")
+    if len(record.date_parts) > 1:
+        lines.append("DA  - " + "/".join(f"{part:02d}" if i else str(part)
+                                         for i, part in enumerate(record.date_parts)))
+    if record.volume:
+        lines.append(f"VL  - {record.volume}")
+    if record.issue:
+        lines.append(f"IS  - {record.issue}")
+    if record.pages:
+        start, end = _split_pages(record.pages)
+        lines.append(f"SP  - {start}")
+        if end:
+            lines.append(f"EP  - {end}")
+    if record.publisher:
+        lines.append(f"PB  - {record.publisher}")
+    for isbn in record.isbn:
+        lines.append(f"SN  - {isbn}")
+    lines.append(f"DO  - {record.doi}")
+    lines.append(f"UR  - https://doi.org/{record.doi}")
+    lines.append("ER  - ")
+
+    return {
+        'ris': "\n".join(lines),
+        'entry_type': ris_type
+    }
+
+
+# --- CSL-JSON --------------------------------------------------------------
+
+CSL_TYPES = {
+    'article': 'article-journal',
+    'book': 'book',
+    'chapter': 'chapter',
+    'conference': 'paper-conference',
+    'generic': 'document'
+}
+
+
+def render_csl_json(record):
+    """Render a CSL-JSON item dictionary from a CitationRecord."""
+    item = {
+        'id': record.doi,
+        'type': CSL_TYPES[record.kind],
+        'title': record.title,
+        'DOI': record.doi,
+        'URL': f"https://doi.org/{record.doi}"
+    }
+
+    authors = []
+    for given, family in record.authors:
+        name = {}
+        if family:
+            name['family'] = family
+        if given:
+            name['given'] = given
+        if name:
+            authors.append(name)
+    if authors:
+        item['author'] = authors
+
+    if record.date_parts:
+        item['issued'] = {'date-parts': [list(record.date_parts)]}
+    if record.container:
+        item['container-title'] = record.container
+    for key, value in (('volume', record.volume), ('issue', record.issue),
+                       ('page', record.pages), ('publisher', record.publisher)):
+        if value:
+            item[key] = value
+    if record.isbn:
+        item['ISBN'] = record.isbn[0]
+
+    return {
+        'csl': item,
+        'entry_type': item['type']
+    }
+
+
+# --- EndNote XML -----------------------------------------------------------
+
+# kind -> (EndNote reference type name, reference type number)
+ENDNOTE_TYPES = {
+    'article': ('Journal Article', 17),
+    'book': ('Book', 6),
+    'chapter': ('Book Section', 5),
+    'conference': ('Conference Paper', 47),
+    'generic': ('Generic', 13)
+}
+
+
+def render_endnote_xml(record):
+    """Render an EndNote XML <record> dictionary from a CitationRecord."""
+    type_name, type_number = ENDNOTE_TYPES[record.kind]
+    parts = [f'<record><ref-type name="{type_name}">{type_number}</ref-type>']
+
+    authors = [f"{family}, {given}" if given else family
+               for given, family in record.authors if family]
+    if authors:
+        parts.append('<contributors><authors>')
+        parts.extend(f"<author>{xml_escape(name)}</author>" for name in authors)
+        parts.append('</authors></contributors>')
+
+    parts.append(f"<titles><title>{xml_escape(record.title)}</title>")
+    if record.container:
+        parts.append(f"<secondary-title>{xml_escape(record.container)}</secondary-title>")
+    parts.append('</titles>')
+    if record.kind == 'article' and record.container:
+        parts.append(f"<periodical><full-title>{xml_escape(record.container)}</full-title></periodical>")
+
+    for tag, value in (('pages', record.pages), ('volume', record.volume), ('number', record.issue)):
+        if value:
+            parts.append(f"<{tag}>{xml_escape(value)}</{tag}>")
+    if record.year != 'n.d.':
+        parts.append(f"<dates><year>{record.year}</year></dates>")
+    if record.publisher:
+        parts.append(f"<publisher>{xml_escape(record.publisher)}</publisher>")
+    if record.isbn:
+        parts.append(f"<isbn>{xml_escape(record.isbn[0])}</isbn>")
+
+    doi = xml_escape(record.doi)
+    parts.append(f"<electronic-resource-num>{doi}</electronic-resource-num>")
+    parts.append(f"<urls><related-urls><url>https://doi.org/{doi}</url></related-urls></urls>")
+    parts.append('</record>')
+
+    return {
+        'xml': ''.join(parts),
+        'entry_type': type_name
+    }
+
+
+# --- Format registry -------------------------------------------------------
+
+def _join_entries(entries):
+    return '\n\n'.join(entries) + '\n' if entries else ''
+
+
+def _apa7_reference_list(entries):
+    # APA reference lists are ordered alphabetically by first author
+    header = f"APA 7th Edition References:\n{'-' * 70}\n\n"
+    return header + ''.join(f"{citation}\n\n" for citation in sorted(entries))
+
+
+def _csl_json_array(entries):
+    return json.dumps(entries, indent=2, ensure_ascii=False) + '\n'
+
+
+def _endnote_xml_document(entries):
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<xml><records>\n'
+            + ''.join(f"{entry}\n" for entry in entries)
+            + '</records></xml>\n')
+
+
+# name -> render(record), entry(rendered) for a combined file, combine(entries),
+#         single-DOI file suffix and combined batch file name
+CITATION_FORMATS = {}
+
+
+def register_format(name, render, entry, combine=_join_entries, suffix=None, batch_file=None):
+    """
+    Register an output format.
+
+    Args:
+        name: Format name used on the command line (e.g. 'ris')
+        render: Function taking a CitationRecord and returning a dict
+        entry: Function taking that dict and returning the value stored in
+            a combined file (a string, or any value `combine` accepts)
+        combine: Function joining a list of entries into the file contents
+        suffix: Single-DOI file suffix (defaults to '.<name>')
+        batch_file: Combined batch file name (defaults to 'bibliography<suffix>')
+    """
+    suffix = suffix or f".{name}"
+    CITATION_FORMATS[name] = {
+        'render': render,
+        'entry': entry,
+        'combine': combine,
+        'suffix': suffix,
+        'batch_file': batch_file or f"bibliography{suffix}"
+    }
+
+
+register_format('apa7', render_apa7, lambda r: r['citation'], _apa7_reference_list,
+                suffix='_apa7.txt', batch_file='bibliography_apa7.txt')
+register_format('bibtex', render_bibtex, lambda r: r['bibtex'], suffix='.bib')
+register_format('ris', render_ris, lambda r: r['ris'])
+register_format('csl-json', render_csl_json, lambda r: r['csl'], _csl_json_array,
+                suffix='.csl.json', batch_file='bibliography.json')
+register_format('endnote-xml', render_endnote_xml, lambda r: r['xml'], _endnote_xml_document,
+                suffix='.xml')
+
+DEFAULT_FORMATS = ('apa7', 'bibtex')
+
+
+def parse_formats(value):
+    """
+    Parse a comma-separated list of format names ('all' selects every one).
+
+    Raises:
+        ValueError for unknown format names
+    """
+    if value.strip() == 'all':
+        return list(CITATION_FORMATS)
+    formats = []
+    for name in value.split(','):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in CITATION_FORMATS:
+            raise ValueError(f"Unknown format '{name}' (choose from {', '.join(CITATION_FORMATS)})")
+        if name not in formats:
+            formats.append(name)
+    return formats
+
+
+def render_formats(record, formats=DEFAULT_FORMATS):
+    """Render one CitationRecord in each of the named formats. Returns {name: dict}."""
+    return {name: CITATION_FORMATS[name]['render'](record) for name in formats}
+
+
+def combine_entries(name, rendered):
+    """Build the contents of a combined file from a list of rendered dicts of one format."""
+    spec = CITATION_FORMATS[name]
+    return spec['combine']([spec['entry'](r) for r in rendered])
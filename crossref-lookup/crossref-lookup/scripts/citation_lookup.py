@@ -8,356 +8,290 @@ Usage:
   python citation_lookup.py bib.doi == https://doi.org/10.1038/s41586-025-09663-y
   python citation_lookup.py 10.1038/s41586-025-09663-y
   python citation_lookup.py https://doi.org/10.1038/s41586-025-09663-y
+  python citation_lookup.py 10.1038/s41586-025-09663-y --formats apa7,bibtex,ris,csl-json
+  python citation_lookup.py --batch dois.txt [--workers 8] [--chunk-size 50] [--output-dir DIR]
+  cat dois.txt | python citation_lookup.py --batch - --formats all
+  python citation_lookup.py --refresh bibliography.bib [--dry-run]
 
 This will:
 1. Look up the publication in Crossref
 2. Generate APA 7th edition citation
 3. Generate BibTeX entry
 4. Save both to files
+
+Batch mode reads one DOI per line (blank lines and # comments are skipped),
+resolves them with batched filter=doi: requests and writes one combined file
+per output format.
+
+--formats selects the output formats (default: apa7,bibtex; 'all' for every
+one): apa7, bibtex, ris, csl-json, endnote-xml. Every format is rendered
+from the same fetched record.
+
+Refresh mode re-validates an existing .bib file, downloading only records
+Crossref re-indexed since the last refresh (see bib_refresh.py).
 """
-import requests
 import json
 import sys
-import re
 import os
+import time
+import argparse
 
-def get_doi_metadata(doi, mailto="user@example.com"):
-    """Fetch metadata from Crossref API."""
-    # Clean DOI - remove URL prefix if present
-    doi = doi.replace('https://doi.org/', '').replace('http://doi.org/', '')
-    doi = doi.strip()
-    
-    url = f"https://api.crossref.org/works/{doi}"
-    
-    headers = {
-        'User-Agent': f'CrossrefLookupSkill/2.0 (mailto:{mailto})'
-    }
+import requests
+
+# format_author_apa7, generate_citation_key and sanitize_for_bibtex are re-exported
+# for callers that import them from this module
+from citation_formats import (
+    CITATION_FORMATS, DEFAULT_FORMATS, CitationRecord, combine_entries, format_author_apa7,
+    generate_citation_key, parse_formats, render_apa7, render_bibtex, render_formats,
+    sanitize_for_bibtex
+)
+from bib_refresh import refresh_main
+from crossref_bulk import fetch_work, fetch_works, DEFAULT_CHUNK_SIZE
+from crossref_cache import canonicalize_doi
+from crossref_client import get_request_stats
+
+def get_doi_metadata(doi, mailto=None, use_cache=True):
+    """Fetch metadata from Crossref API, serving repeat lookups from the local cache."""
+    # Clean DOI - accept doi:, doi.org URLs and URL-encoded forms; reject malformed DOIs
+    if canonicalize_doi(doi) is None:
+        print(f"Invalid DOI: {doi}", file=sys.stderr)
+        return None
     
+    # Records a recent search returned carry every field a citation needs
     try:
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        return data['message'] if data['status'] == 'ok' else None
-    except Exception as e:
+        return fetch_work(doi, mailto=mailto, use_cache=use_cache, use_search_records=True)
+    except requests.exceptions.RequestException as e:
         print(f"Error fetching DOI: {e}", file=sys.stderr)
         return None
 
-def sanitize_for_bibtex(text):
-    """Sanitize text for BibTeX format."""
-    if not text:
-        return ""
-    
-    replacements = {
-        '&': r'\&',
-        '%': r'\%',
-        '$': r'\$',
-        '#': r'\#',
-        '_': r'\_',
-        '{': r'\{',
-        '}': r'\}',
-        '~': r'\textasciitilde{}',
-        '^': r'\textasciicircum{}'
-    }
-    
-    for old, new in replacements.items():
-        text = text.replace(old, new)
+def generate_apa7_citation(metadata, doi, record=None):
+    """Generate APA 7th edition citation.
     
-    return text
+    Pass a prebuilt CitationRecord as `record` to skip re-reading `metadata`.
+    """
+    if not metadata:
+        return None
+    return render_apa7(record or CitationRecord.from_crossref(metadata, doi))
 
-def generate_citation_key(authors, year, title):
-    """Generate citation key: firstauthor_year_firstword"""
-    # Get first author's last name
-    if authors:
-        first_author = authors[0].get('family', 'unknown').lower()
-        first_author = re.sub(r'[^a-z]', '', first_author)
-    else:
-        first_author = 'unknown'
-    
-    # Get first significant word from title
-    title_words = re.findall(r'\b\w+\b', title.lower())
-    skip_words = {'a', 'an', 'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of'}
-    first_word = next((word for word in title_words if word not in skip_words), 'work')
+def generate_bibtex(metadata, doi, record=None):
+    """Generate BibTeX format citation.
     
-    # Clean year
-    year_str = str(year) if year != 'n.d.' else 'nd'
+    Pass a prebuilt CitationRecord as `record` to skip re-reading `metadata`.
+    """
+    if not metadata:
+        return None
+    return render_bibtex(record or CitationRecord.from_crossref(metadata, doi))
+
+def save_citations(doi, apa_data, bibtex_data, output_dir="."):
+    """Save APA and BibTeX citations to files"""
+    files = save_formats(doi, {'apa7': apa_data, 'bibtex': bibtex_data}, output_dir)
+    return files['apa7'], files['bibtex']
+
+def save_formats(doi, rendered, output_dir="."):
+    """
+    Save each rendered citation format to its own file.
+    
+    Args:
+        doi: DOI the citations belong to (used for the file names)
+        rendered: Dictionary of format name -> rendered dict (see render_formats)
+        output_dir: Directory for the files
+    
+    Returns:
+        Dictionary of format name -> file path
+    """
+    # Create safe filename from DOI
+    safe_doi = doi.replace('/', '_').replace('.', '_')
     
-    return f"{first_author}{year_str}{first_word}"
+    files = {}
+    for name, data in rendered.items():
+        filename = os.path.join(output_dir, f"{safe_doi}{CITATION_FORMATS[name]['suffix']}")
+        with open(filename, 'w', encoding='utf-8') as f:
+            if name == 'apa7':
+                f.write(f"APA 7th Edition Citation:\n")
+                f.write(f"{'-' * 70}\n\n")
+                f.write(data['citation'])
+                f.write(f"\n\n{'-' * 70}\n")
+                f.write(f"DOI: {doi}\n")
+                f.write(f"Type: {data['type']}\n")
+                f.write(f"Authors: {', '.join(data['authors'])}\n")
+                f.write(f"Year: {data['year']}\n")
+                f.write(f"Title: {data['title']}\n")
+            elif name == 'bibtex':
+                f.write(data['bibtex'])
+            else:
+                f.write(combine_entries(name, [data]))
+        files[name] = filename
+    
+    return files
+
+def file_labels(files):
+    """Key output files as before: 'apa' for APA 7, otherwise the format name."""
+    return {('apa' if name == 'apa7' else name): path for name, path in files.items()}
 
-def format_author_apa7(author):
-    """Format a single author in APA 7 style."""
-    family = author.get('family', '')
-    given = author.get('given', '')
-    
-    if not family:
-        return 'Unknown'
-    
-    if given:
-        # Extract initials
-        initials = ' '.join([f"{name[0]}." for name in given.split()])
-        return f"{family}, {initials}"
+def read_doi_list(source):
+    """
+    Read DOIs from a file path, or from stdin when source is '-'.
+    
+    Blank lines and lines starting with # are skipped, and the
+    "bib.doi == <doi>" form is accepted on each line. Duplicate DOIs
+    are dropped, keeping the first occurrence.
+    """
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
     else:
-        return family
+        with open(source, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    
+    dois = []
+    seen = set()
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if '==' in line:
+            line = line.split('==', 1)[1].strip()
+        # Malformed DOIs are kept so they are reported as failures
+        doi = canonicalize_doi(line) or line
+        if doi.lower() not in seen:
+            seen.add(doi.lower())
+            dois.append(doi)
+    return dois
 
-def generate_apa7_citation(metadata, doi):
-    """Generate APA 7th edition citation."""
+def render_citations(doi, metadata, formats=DEFAULT_FORMATS):
+    """Render the requested citation formats for one fetched record, without raising."""
     if not metadata:
-        return None
-    
-    # Get authors
-    authors = metadata.get('author', [])
-    if not authors:
-        author_string = 'Unknown Author'
-    else:
-        apa_authors = [format_author_apa7(a) for a in authors]
-        
-        if len(apa_authors) == 1:
-            author_string = apa_authors[0]
-        elif len(apa_authors) == 2:
-            author_string = f"{apa_authors[0]}, & {apa_authors[1]}"
-        elif len(apa_authors) <= 20:
-            author_string = ', '.join(apa_authors[:-1]) + f", & {apa_authors[-1]}"
-        else:
-            author_string = ', '.join(apa_authors[:19]) + f", ... {apa_authors[-1]}"
-    
-    # Get year
-    year = 'n.d.'
-    if 'published' in metadata or 'published-print' in metadata:
-        pub_date = metadata.get('published') or metadata.get('published-print')
-        if pub_date and 'date-parts' in pub_date:
-            year = str(pub_date['date-parts'][0][0])
-    
-    # Get title
-    title = metadata.get('title', ['Unknown title'])[0] if metadata.get('title') else 'Unknown title'
-    
-    # Get publication type
-    pub_type = metadata.get('type', 'misc')
-    
-    # Build citation based on type
-    if pub_type in ['journal-article', 'article-journal']:
-        # Journal Article
-        journal = metadata.get('container-title', ['Unknown'])[0] if metadata.get('container-title') else 'Unknown'
-        volume = metadata.get('volume', '')
-        issue = metadata.get('issue', '')
-        pages = metadata.get('page', '')
-        
-        citation = f"{author_string} ({year}). {title}. {journal}"
-        if volume:
-            citation += f", {volume}"
-        if issue:
-            citation += f"({issue})"
-        if pages:
-            citation += f", {pages}"
-        citation += f". https://doi.org/{doi}"
-        
-    elif pub_type in ['book', 'monograph']:
-        # Book
-        publisher = metadata.get('publisher', 'Unknown Publisher')
-        citation = f"{author_string} ({year}). {title}. {publisher}. https://doi.org/{doi}"
-        
-    elif pub_type in ['book-chapter', 'book-section']:
-        # Book Chapter
-        booktitle = metadata.get('container-title', ['Unknown'])[0] if metadata.get('container-title') else 'Unknown'
-        publisher = metadata.get('publisher', 'Unknown Publisher')
-        pages = metadata.get('page', '')
-        
-        citation = f"{author_string} ({year}). {title}. In {booktitle}"
-        if pages:
-            citation += f" (pp. {pages})"
-        citation += f". {publisher}. https://doi.org/{doi}"
-        
-    elif pub_type in ['proceedings-article', 'paper-conference']:
-        # Conference Paper
-        conference = metadata.get('container-title', ['Unknown'])[0] if metadata.get('container-title') else 'Unknown'
-        publisher = metadata.get('publisher', '')
-        pages = metadata.get('page', '')
-        
-        citation = f"{author_string} ({year}). {title}. In {conference}"
-        if pages:
-            citation += f" (pp. {pages})"
-        if publisher:
-            citation += f". {publisher}"
-        citation += f". https://doi.org/{doi}"
-        
-    else:
-        # Generic
-        publisher = metadata.get('publisher', '')
-        citation = f"{author_string} ({year}). {title}"
-        if publisher:
-            citation += f". {publisher}"
-        citation += f". https://doi.org/{doi}"
+        if canonicalize_doi(doi) is None:
+            return {'doi': doi, 'error': f'Invalid DOI: {doi}'}
+        return {'doi': doi, 'error': f'Could not retrieve metadata for DOI: {doi}'}
+    try:
+        record = CitationRecord.from_crossref(metadata, doi)
+        result = {'doi': doi}
+        result.update(render_formats(record, formats))
+        return result
+    except Exception as e:
+        return {'doi': doi, 'error': f'{type(e).__name__}: {e}'}
+
+def run_batch(dois, workers=8, output_dir=".", chunk_size=DEFAULT_CHUNK_SIZE, formats=DEFAULT_FORMATS):
+    """
+    Look up many DOIs concurrently and write one combined file per format.
+    
+    DOIs are resolved with batched filter=doi: queries (chunk_size DOIs per
+    request, run on up to `workers` threads); DOIs missing from a batch fall
+    back to single lookups.
+    
+    Args:
+        dois: List of DOI strings
+        workers: Maximum number of concurrent requests
+        output_dir: Directory for the combined files (bibliography.bib, bibliography_apa7.txt, ...)
+        chunk_size: Maximum number of DOIs per Crossref request
+        formats: Names of the output formats to write
+    
+    Returns:
+        Summary dictionary with per-DOI failures, output files and throughput
+    """
+    start = time.perf_counter()
+    
+    fetch_stats = {}
+    records = fetch_works(dois, chunk_size=chunk_size, workers=workers, stats=fetch_stats,
+                          use_search_records=True)
+    results = [render_citations(doi, records.get(doi), formats) for doi in dois]
+    
+    elapsed = time.perf_counter() - start
+    succeeded = [r for r in results if 'error' not in r]
+    failed = [{'doi': r['doi'], 'error': r['error']} for r in results if 'error' in r]
+    
+    # Citation keys must be unique within one .bib file: suffix repeats with b, c, ...
+    key_counts = {}
+    for r in (succeeded if 'bibtex' in formats else []):
+        key = r['bibtex']['citation_key']
+        count = key_counts.get(key, 0)
+        key_counts[key] = count + 1
+        if count:
+            unique_key = f"{key}{chr(ord('a') + count) if count < 26 else count}"
+            r['bibtex']['bibtex'] = r['bibtex']['bibtex'].replace(f"{{{key},", f"{{{unique_key},", 1)
+            r['bibtex']['citation_key'] = unique_key
+    
+    files = {}
+    for name in formats:
+        filename = os.path.join(output_dir, CITATION_FORMATS[name]['batch_file'])
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(combine_entries(name, [r[name] for r in succeeded]))
+        files[name] = filename
     
     return {
-        'citation': citation,
-        'authors': [format_author_apa7(a) for a in authors] if authors else ['Unknown Author'],
-        'year': year,
-        'title': title,
-        'type': pub_type,
-        'style': 'APA 7th Edition'
+        'total': len(dois),
+        'succeeded': len(succeeded),
+        'failed': failed,
+        'elapsed_seconds': round(elapsed, 3),
+        'dois_per_second': round(len(dois) / elapsed, 2) if elapsed > 0 else None,
+        'requests': fetch_stats['bulk_requests'] + fetch_stats['fallback_requests'],
+        'cache_hits': fetch_stats['cache_hits'],
+        'snapshot_hits': fetch_stats['snapshot_hits'],
+        'search_hits': fetch_stats['search_hits'],
+        'coalesced_requests': get_request_stats()['coalesced'],
+        'files': file_labels(files)
     }
 
-def generate_bibtex(metadata, doi):
-    """Generate BibTeX format citation."""
-    if not metadata:
-        return None
+def batch_main(argv):
+    """Command-line entry point for --batch mode."""
+    parser = argparse.ArgumentParser(
+        prog='citation_lookup.py',
+        description='Generate APA7 and BibTeX citations for a list of DOIs'
+    )
+    parser.add_argument('--batch', required=True, metavar='FILE',
+                        help="File with one DOI per line ('-' for stdin)")
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent requests')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='DOIs per Crossref request')
+    parser.add_argument('--output-dir', default='/home/claude', help='Directory for combined output files')
+    parser.add_argument('--formats', default=','.join(DEFAULT_FORMATS),
+                        help=f"Comma-separated output formats or 'all' ({', '.join(CITATION_FORMATS)})")
+    args = parser.parse_args(argv)
     
-    # Get authors
-    authors = []
-    if 'author' in metadata:
-        for author in metadata['author']:
-            given = author.get('given', '')
-            family = author.get('family', '')
-            if family:
-                authors.append({'given': given, 'family': family})
-    
-    if not authors:
-        author_string = 'Unknown Author'
-    else:
-        author_string = ' and '.join([f"{a['family']}, {a['given']}" if a['given'] else a['family'] for a in authors])
-    
-    # Get year
-    year = 'n.d.'
-    if 'published' in metadata or 'published-print' in metadata:
-        pub_date = metadata.get('published') or metadata.get('published-print')
-        if pub_date and 'date-parts' in pub_date:
-            year = str(pub_date['date-parts'][0][0])
-    
-    # Get title
-    title = metadata.get('title', ['Unknown title'])[0] if metadata.get('title') else 'Unknown title'
-    
-    # Get publication type
-    pub_type = metadata.get('type', 'misc')
-    
-    # Generate citation key
-    citation_key = generate_citation_key(metadata.get('author', []), year, title)
-    
-    # Sanitize fields
-    author_string = sanitize_for_bibtex(author_string)
-    title = sanitize_for_bibtex(title)
-    
-    # Build BibTeX entry based on type
-    if pub_type in ['journal-article', 'article-journal']:
-        # Journal Article
-        entry_type = 'article'
-        journal = metadata.get('container-title', ['Unknown'])[0] if metadata.get('container-title') else 'Unknown'
-        journal = sanitize_for_bibtex(journal)
-        volume = metadata.get('volume', '')
-        issue = metadata.get('issue', '')
-        pages = metadata.get('page', '')
-        
-        bibtex = f"@{entry_type}{{{citation_key},\n"
-        bibtex += f"  author  = {{{author_string}}},\n"
-        bibtex += f"  title   = {{{title}}},\n"
-        bibtex += f"  journal = {{{journal}}},\n"
-        bibtex += f"  year    = {{{year}}},\n"
-        if volume:
-            bibtex += f"  volume  = {{{volume}}},\n"
-        if issue:
-            bibtex += f"  number  = {{{issue}}},\n"
-        if pages:
-            bibtex += f"  pages   = {{{pages}}},\n"
-        bibtex += f"  doi     = {{{doi}}}\n}}"
-        
-    elif pub_type in ['book', 'monograph']:
-        # Book
-        entry_type = 'book'
-        publisher = metadata.get('publisher', 'Unknown')
-        publisher = sanitize_for_bibtex(publisher)
-        isbn = metadata.get('ISBN', [])
-        
-        bibtex = f"@{entry_type}{{{citation_key},\n"
-        bibtex += f"  author    = {{{author_string}}},\n"
-        bibtex += f"  title     = {{{title}}},\n"
-        bibtex += f"  publisher = {{{publisher}}},\n"
-        bibtex += f"  year      = {{{year}}},\n"
-        if isbn:
-            bibtex += f"  isbn      = {{{isbn[0]}}},\n"
-        bibtex += f"  doi       = {{{doi}}}\n}}"
-        
-    elif pub_type in ['book-chapter', 'book-section']:
-        # Book Chapter
-        entry_type = 'inbook'
-        booktitle = metadata.get('container-title', ['Unknown'])[0] if metadata.get('container-title') else 'Unknown'
-        booktitle = sanitize_for_bibtex(booktitle)
-        publisher = metadata.get('publisher', 'Unknown')
-        publisher = sanitize_for_bibtex(publisher)
-        pages = metadata.get('page', '')
-        
-        bibtex = f"@{entry_type}{{{citation_key},\n"
-        bibtex += f"  author    = {{{author_string}}},\n"
-        bibtex += f"  title     = {{{title}}},\n"
-        bibtex += f"  booktitle = {{{booktitle}}},\n"
-        bibtex += f"  publisher = {{{publisher}}},\n"
-        bibtex += f"  year      = {{{year}}},\n"
-        if pages:
-            bibtex += f"  pages     = {{{pages}}},\n"
-        bibtex += f"  doi       = {{{doi}}}\n}}"
-        
-    elif pub_type in ['proceedings-article', 'paper-conference']:
-        # Conference Paper
-        entry_type = 'inproceedings'
-        booktitle = metadata.get('container-title', ['Unknown'])[0] if metadata.get('container-title') else 'Unknown'
-        booktitle = sanitize_for_bibtex(booktitle)
-        publisher = metadata.get('publisher', '')
-        pages = metadata.get('page', '')
-        
-        bibtex = f"@{entry_type}{{{citation_key},\n"
-        bibtex += f"  author    = {{{author_string}}},\n"
-        bibtex += f"  title     = {{{title}}},\n"
-        bibtex += f"  booktitle = {{{booktitle}}},\n"
-        bibtex += f"  year      = {{{year}}},\n"
-        if publisher:
-            publisher = sanitize_for_bibtex(publisher)
-            bibtex += f"  publisher = {{{publisher}}},\n"
-        if pages:
-            bibtex += f"  pages     = {{{pages}}},\n"
-        bibtex += f"  doi       = {{{doi}}}\n}}"
-        
-    else:
-        # Generic/Misc
-        entry_type = 'misc'
-        publisher = metadata.get('publisher', '')
-        
-        bibtex = f"@{entry_type}{{{citation_key},\n"
-        bibtex += f"  author = {{{author_string}}},\n"
-        bibtex += f"  title  = {{{title}}},\n"
-        bibtex += f"  year   = {{{year}}},\n"
-        if publisher:
-            publisher = sanitize_for_bibtex(publisher)
-            bibtex += f"  publisher = {{{publisher}}},\n"
-        bibtex += f"  doi    = {{{doi}}}\n}}"
+    try:
+        formats = parse_formats(args.formats)
+    except ValueError as e:
+        parser.error(str(e))
     
-    return {
-        'bibtex': bibtex,
-        'citation_key': citation_key,
-        'entry_type': entry_type
-    }
-
-def save_citations(doi, apa_data, bibtex_data, output_dir="."):
-    """Save APA and BibTeX citations to files"""
-    # Create safe filename from DOI
-    safe_doi = doi.replace('/', '_').replace('.', '_')
+    dois = read_doi_list(args.batch)
+    if not dois:
+        print(json.dumps({'error': 'No DOIs found in input'}, indent=2))
+        sys.exit(1)
+    
+    print(f"Looking up {len(dois)} DOIs with {args.workers} workers")
+    print("-" * 70)
+    
+    summary = run_batch(dois, workers=args.workers, output_dir=args.output_dir,
+                        chunk_size=args.chunk_size, formats=formats)
     
-    # Save APA citation
-    apa_filename = os.path.join(output_dir, f"{safe_doi}_apa7.txt")
-    with open(apa_filename, 'w', encoding='utf-8') as f:
-        f.write(f"APA 7th Edition Citation:\n")
-        f.write(f"{'-' * 70}\n\n")
-        f.write(apa_data['citation'])
-        f.write(f"\n\n{'-' * 70}\n")
-        f.write(f"DOI: {doi}\n")
-        f.write(f"Type: {apa_data['type']}\n")
-        f.write(f"Authors: {', '.join(apa_data['authors'])}\n")
-        f.write(f"Year: {apa_data['year']}\n")
-        f.write(f"Title: {apa_data['title']}\n")
-    
-    # Save BibTeX citation
-    bibtex_filename = os.path.join(output_dir, f"{safe_doi}.bib")
-    with open(bibtex_filename, 'w', encoding='utf-8') as f:
-        f.write(bibtex_data['bibtex'])
-    
-    return apa_filename, bibtex_filename
+    for failure in summary['failed']:
+        print(f"FAILED {failure['doi']}: {failure['error']}", file=sys.stderr)
+    
+    print("\n\n💾 FILES SAVED")
+    print("=" * 70)
+    for name, path in summary['files'].items():
+        print(f"{name}: {path}")
+    
+    print("\n\n⏱️ THROUGHPUT")
+    print("=" * 70)
+    print(f"{summary['succeeded']}/{summary['total']} DOIs in {summary['elapsed_seconds']}s "
+          f"({summary['dois_per_second']} DOIs/s, {summary['requests']} API requests, "
+          f"{summary['cache_hits']} cache hits)")
+    
+    print("\n\n📋 JSON OUTPUT")
+    print("=" * 70)
+    print(json.dumps(summary, indent=2))
+    
+    if summary['failed'] and not summary['succeeded']:
+        sys.exit(1)
 
 def main():
+    if any(arg == '--batch' or arg.startswith('--batch=') for arg in sys.argv[1:]):
+        batch_main(sys.argv[1:])
+        return
+    if any(arg == '--refresh' or arg.startswith('--refresh=') for arg in sys.argv[1:]):
+        refresh_main(sys.argv[1:])
+        return
+    
     if len(sys.argv) < 2:
         print("Usage: python citation_lookup.py [bib.doi ==] <doi>")
         print("\nExamples:")
@@ -365,11 +299,27 @@ def main():
         print("  python citation_lookup.py bib.doi == https://doi.org/10.1038/s41586-025-09663-y")
         print("  python citation_lookup.py 10.1038/s41586-025-09663-y")
         print("  python citation_lookup.py https://doi.org/10.1038/s41586-025-09663-y")
+        print("  python citation_lookup.py 10.1038/s41586-025-09663-y --formats apa7,bibtex,ris")
+        print("  python citation_lookup.py --batch dois.txt [--workers 8] [--output-dir DIR] [--formats all]")
+        print("  python citation_lookup.py --refresh bibliography.bib [--dry-run]")
         sys.exit(1)
     
     # Parse arguments - support "bib.doi == <doi>" format
     args = sys.argv[1:]
     
+    # Pull out --formats before reading the DOI
+    formats = list(DEFAULT_FORMATS)
+    for i, arg in enumerate(args):
+        if arg == '--formats' or arg.startswith('--formats='):
+            value = arg.split('=', 1)[1] if '=' in arg else (args[i + 1] if i + 1 < len(args) else '')
+            del args[i:i + (1 if '=' in arg else 2)]
+            try:
+                formats = parse_formats(value)
+            except ValueError as e:
+                print(json.dumps({'error': str(e)}, indent=2))
+                sys.exit(1)
+            break
+    
     # Check for bib.doi == format
     if 'bib.doi' in args[0].lower() or '==' in ' '.join(args):
         # Extract DOI after ==
@@ -382,7 +332,11 @@ def main():
         doi = ' '.join(args)
     
     # Clean DOI
-    doi = doi.replace('https://doi.org/', '').replace('http://doi.org/', '').strip()
+    canonical = canonicalize_doi(doi)
+    if canonical is None:
+        print(json.dumps({'error': f'Invalid DOI: {doi.strip()}'}, indent=2))
+        sys.exit(1)
+    doi = canonical
     
     print(f"Looking up DOI: {doi}")
     print("-" * 70)
@@ -395,9 +349,9 @@ def main():
         print(json.dumps(result, indent=2))
         sys.exit(1)
     
-    # Generate citations
-    apa_citation = generate_apa7_citation(metadata, doi)
-    bibtex_citation = generate_bibtex(metadata, doi)
+    # Generate every requested format from one normalized record
+    record = CitationRecord.from_crossref(metadata, doi)
+    rendered = render_formats(record, formats)
     
     # Display results
     print("\n📄 PUBLICATION INFORMATION")
@@ -420,26 +374,34 @@ def main():
     print(f"Type: {metadata.get('type', 'N/A')}")
     print(f"DOI: {doi}")
     
-    print("\n\n📖 APA 7TH EDITION CITATION")
-    print("=" * 70)
-    print(apa_citation['citation'])
+    if 'apa7' in rendered:
+        print("\n\n📖 APA 7TH EDITION CITATION")
+        print("=" * 70)
+        print(rendered['apa7']['citation'])
     
-    print("\n\n📚 BIBTEX CITATION")
-    print("=" * 70)
-    print(bibtex_citation['bibtex'])
+    if 'bibtex' in rendered:
+        print("\n\n📚 BIBTEX CITATION")
+        print("=" * 70)
+        print(rendered['bibtex']['bibtex'])
+    
+    for name in formats:
+        if name not in ('apa7', 'bibtex'):
+            print(f"\n\n📑 {name.upper()}")
+            print("=" * 70)
+            print(combine_entries(name, [rendered[name]]).rstrip())
     
     # Save to files
-    apa_file, bibtex_file = save_citations(
-        doi,
-        apa_citation,
-        bibtex_citation,
-        output_dir="/home/claude"
-    )
+    files = save_formats(doi, rendered, output_dir="/home/claude")
     
     print("\n\n💾 FILES SAVED")
     print("=" * 70)
-    print(f"APA Citation: {apa_file}")
-    print(f"BibTeX Entry: {bibtex_file}")
+    if 'apa7' in files:
+        print(f"APA Citation: {files['apa7']}")
+    if 'bibtex' in files:
+        print(f"BibTeX Entry: {files['bibtex']}")
+    for name in formats:
+        if name not in ('apa7', 'bibtex'):
+            print(f"{name}: {files[name]}")
     
     # Return JSON for programmatic use
     result = {
@@ -448,14 +410,10 @@ def main():
             'title': metadata.get('title', [''])[0],
             'type': metadata.get('type', ''),
             'year': pub_date['date-parts'][0][0] if pub_date and 'date-parts' in pub_date else 'n.d.'
-        },
-        'apa7': apa_citation,
-        'bibtex': bibtex_citation,
-        'files': {
-            'apa': apa_file,
-            'bibtex': bibtex_file
         }
     }
+    result.update(rendered)
+    result['files'] = file_labels(files)
     
     print("\n\n📋 JSON OUTPUT")
     print("=" * 70)
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+asyncio counterpart to the Crossref lookup functions.
+Usage: python crossref_async.py <doi_file|-> [--concurrency 20]
+
+AsyncCrossrefClient runs hundreds of lookups on one event loop. A semaphore
+bounds the number of requests in flight and a single aiohttp connector keeps
+connections to api.crossref.org alive between requests. Each method returns
+the same dictionary shape as its synchronous counterpart:
+
+  get_doi_metadata  -> citation_lookup.get_doi_metadata (raw work record or None)
+  search_works      -> search_works.search_works
+  search_by_author  -> search_by_author.search_by_author
+  lookup_journal    -> journal_lookup.lookup_journal
+
+Requests share the rate limiter and retry policy of the synchronous client
+(crossref_ratelimit.py). Identical requests made while one is already in
+flight await that request instead of sending their own; request_stats()
+reports how many were coalesced.
+
+The rate limiter's file lock, the snapshot index and the SQLite cache are
+blocking, so those calls run on the event loop's default thread pool rather
+than in the coroutines themselves; a slow disk never stalls the other
+requests in flight.
+
+Requires aiohttp: pip install aiohttp --break-system-packages
+
+Example:
+  async with AsyncCrossrefClient(concurrency=50) as client:
+      records = await client.get_many(dois)
+"""
+import asyncio
+import json
+import sqlite3
+import sys
+import argparse
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from citation_formats import CITATION_FIELDS
+from crossref_cache import canonicalize_doi, get_cache, normalize_doi
+from crossref_client import API_BASE, USER_AGENT, build_select, get_mailto, get_timeout, work_path
+from crossref_ratelimit import RETRYABLE_STATUS, backoff_delay, get_limiter, get_max_retries, parse_retry_after
+from crossref_snapshot import lookup_snapshot
+from journal_lookup import format_issn, parse_journal
+from search_by_author import AUTHOR_SEARCH_FIELDS, parse_author_results
+from search_works import SEARCH_FIELDS, parse_search_results
+
+DEFAULT_CONCURRENCY = 20
+
+
+class AsyncCrossrefClient:
+    """Bounded-concurrency Crossref client for use inside an asyncio event loop."""
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, mailto=None, timeout=None, use_cache=True):
+        if aiohttp is None:
+            raise ImportError("crossref_async requires aiohttp: pip install aiohttp --break-system-packages")
+
+        self.concurrency = max(1, concurrency)
+        self.mailto = get_mailto(mailto)
+        self.timeout = get_timeout(timeout)
+        self.cache = get_cache() if use_cache else None
+        self.limiter = get_limiter()
+        self.max_retries = get_max_retries()
+        self._semaphore = None
+        self._session = None
+        self._inflight = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        """Create the shared connector and session. Called automatically by `async with`."""
+        if self._session is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            connector = aiohttp.TCPConnector(
+                limit=self.concurrency,
+                limit_per_host=self.concurrency,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    'User-Agent': f'{USER_AGENT} (mailto:{self.mailto})',
+                    'Accept': 'application/json',
+                    'Accept-Encoding': 'gzip, deflate'
+                }
+            )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _blocking(self, fn, *args):
+        """Run a blocking call (file lock, SQLite) in the default executor and await its result."""
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    def request_stats(self):
+        """Return how many requests this client sent and how many duplicates it coalesced."""
+        return {'requests': self.requests, 'coalesced': self.coalesced}
+
+    async def _get(self, path, params=None):
+        """
+        GET an API path and return (status_code, parsed JSON body).
+
+        The body is None for non-200 responses. 429/5xx responses and
+        connection errors are retried with backoff; errors that persist
+        propagate as aiohttp.ClientError or asyncio.TimeoutError.
+
+        Concurrent calls with the same path and params share one request,
+        and therefore the same parsed body object.
+        """
+        if params:
+            params = {key: str(value) for key, value in params.items()}
+        key = (path, tuple(sorted(params.items())) if params else ())
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(path, params))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.requests += 1
+        else:
+            self.coalesced += 1
+        # shield: one caller being cancelled must not cancel the shared request
+        return await asyncio.shield(task)
+
+    async def _fetch(self, path, params):
+        """Send one request with rate limiting and retries (see _get)."""
+        await self.open()
+
+        attempt = 0
+        while True:
+            if self.limiter:
+                wait = await self._blocking(self.limiter.reserve)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            try:
+                async with self._semaphore:
+                    async with self._session.get(f"{API_BASE}{path}", params=params) as response:
+                        if self.limiter:
+                            await self._blocking(self.limiter.update_from_headers, response.headers)
+                        status = response.status
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        body = await response.json(content_type=None) if status == 200 else None
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            if status in RETRYABLE_STATUS and attempt < self.max_retries:
+                delay = backoff_delay(attempt, retry_after)
+                if status == 429 and self.limiter:
+                    await self._blocking(self.limiter.block_for, delay)
+                else:
+                    await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            return status, body
+
+    async def get_doi_metadata(self, doi):
+        """Fetch a work record by DOI. Returns the record dict or None."""
+        doi = canonicalize_doi(doi)
+        if doi is None:
+            return None
+
+        local = await self._blocking(lookup_snapshot, doi)
+        if local is not None:
+            return local
+
+        if self.cache:
+            cached = await self._blocking(self.cache.get, doi)
+            if cached is not None:
+                return cached
+            if await self._blocking(self.cache.is_missing, doi):
+                return None
+
+        try:
+            status, data = await self._get(work_path(doi))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Error fetching DOI: {e}", file=sys.stderr)
+            return None
+
+        if status == 404 and self.cache:
+            await self._blocking(self.cache.put_missing, doi)
+        if not data or data.get('status') != 'ok':
+            return None
+        if self.cache:
+            await self._blocking(self.cache.put, doi, data['message'])
+        return data['message']
+
+    async def get_many(self, dois):
+        """Fetch many DOIs concurrently. Returns a dict of DOI -> record (or None)."""
+        unique = {}
+        for doi in dois:
+            unique.setdefault(normalize_doi(doi), doi)
+
+        records = await asyncio.gather(*(self.get_doi_metadata(doi) for doi in unique.values()))
+        by_key = dict(zip(unique.keys(), records))
+        return {doi: by_key[normalize_doi(doi)] for doi in dois}
+
+    async def _remember(self, items):
+        """Keep search results in the cache's search-record table (see crossref_cache.py)."""
+        if self.cache:
+            try:
+                await self._blocking(self.cache.put_search_records, items)
+            except sqlite3.Error as e:
+                print(f"Warning: could not store search results: {e}", file=sys.stderr)
+
+    async def search_works(self, query, rows=10, filter_str=None):
+        """Search Crossref for academic works (same result shape as search_works.py)."""
+        params = {'query': query, 'rows': rows, 'select': build_select(SEARCH_FIELDS + CITATION_FIELDS)}
+        if filter_str:
+            params['filter'] = filter_str
+
+        try:
+            status, data = await self._get("/works", params)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return {'error': str(e)}
+
+        if status != 200:
+            return {'error': f'HTTP {status}'}
+        if data.get('status') != 'ok':
+            return {'error': 'Search failed'}
+        await self._remember(data['message']['items'])
+        return parse_search_results(data['message'])
+
+    async def search_by_author(self, author_name, rows=10):
+        """Search publications by author (same result shape as search_by_author.py)."""
+        params = {'query.author': author_name, 'rows': rows,
+                  'select': build_select(AUTHOR_SEARCH_FIELDS + CITATION_FIELDS)}
+
+        try:
+            status, data = await self._get("/works", params)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return {'error': str(e)}
+
+        if status != 200:
+            return {'error': f'HTTP {status}'}
+        if data.get('status') != 'ok':
+            return {'error': 'Search failed'}
+        await self._remember(data['message']['items'])
+        return parse_author_results(author_name, data['message'])
+
+    async def lookup_journal(self, issn):
+        """Look up journal information by ISSN (same result shape as journal_lookup.py)."""
+        issn = format_issn(issn)
+
+        try:
+            status, data = await self._get(f"/journals/{issn}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return {'error': str(e)}
+
+        if status == 404:
+            return {'error': f'No journal found with ISSN: {issn}'}
+        if status != 200:
+            return {'error': f'HTTP {status}'}
+        if data.get('status') != 'ok':
+            return {'error': 'Journal not found'}
+        return parse_journal(data['message'])
+
+
+async def fetch_dois(dois, concurrency=DEFAULT_CONCURRENCY, mailto=None):
+    """Convenience wrapper: fetch many DOIs on a fresh client."""
+    async with AsyncCrossrefClient(concurrency=concurrency, mailto=mailto) as client:
+        return await client.get_many(dois)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fetch many DOIs concurrently with asyncio')
+    parser.add_argument('source', help="File with one DOI per line ('-' for stdin)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Maximum requests in flight')
+
+    args = parser.parse_args()
+    if args.source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(args.source, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    dois = [line.strip() for line in lines if line.strip() and not line.startswith('#')]
+
+    try:
+        results = asyncio.run(fetch_dois(dois, concurrency=args.concurrency))
+    except ImportError as e:
+        print(json.dumps({'error': str(e)}, indent=2))
+        sys.exit(1)
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Resolve many DOIs with a handful of Crossref requests.
+Usage: python crossref_bulk.py <doi_file|-> [--chunk-size 50] [--workers 4]
+
+Instead of one /works/{doi} request per DOI, DOIs are packed into
+/works?filter=doi:A,doi:B,...&rows=N queries. Returned items are mapped back
+to the DOIs that were asked for; any DOI missing from a bulk response falls
+back to a single lookup. Malformed DOIs and DOIs that recently returned 404
+(see the negative cache in crossref_cache.py) are not requested at all.
+
+fetch_work() is the single-DOI lookup chain shared by every script in this
+skill: offline snapshot index, metadata cache, records kept from searches,
+negative cache, then the API, storing what the API returns.
+"""
+import requests
+import json
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from crossref_cache import canonicalize_doi, get_cache, normalize_doi
+from crossref_client import api_get, build_select, get_message, is_not_found, work_path
+from crossref_snapshot import lookup_snapshot
+
+DEFAULT_CHUNK_SIZE = 50
+
+
+def lookup_local(doi, cache=None, use_search_records=False):
+    """
+    Look a canonical DOI up without a request.
+
+    Checks the offline snapshot index, then the cache (complete records,
+    then, with use_search_records, records kept from searches, then the
+    negative cache).
+
+    Returns:
+        (record or None, source) where source is 'snapshot', 'cache',
+        'search', 'missing' (a remembered 404) or None (not known locally)
+    """
+    local = lookup_snapshot(doi)
+    if local is not None:
+        return local, 'snapshot'
+    if cache:
+        cached = cache.get(doi)
+        if cached is not None:
+            return cached, 'cache'
+        if use_search_records:
+            searched = cache.get_search_record(doi)
+            if searched is not None:
+                return searched, 'search'
+        if cache.is_missing(doi):
+            return None, 'missing'
+    return None, None
+
+
+def request_work(doi, mailto=None, cache=None):
+    """
+    Fetch one work record from the API and record the outcome in cache (when given).
+
+    Returns:
+        The work record, or None if Crossref has no such DOI (a 404 is
+        remembered in the negative cache)
+
+    Raises:
+        requests.exceptions.RequestException on other network or HTTP errors
+    """
+    try:
+        response = api_get(work_path(doi), mailto=mailto)
+    except requests.exceptions.RequestException as e:
+        if is_not_found(e):
+            if cache:
+                cache.put_missing(doi)
+            return None
+        raise
+    data = response.json()
+    if data.get('status') != 'ok':
+        return None
+    if cache:
+        cache.put(doi, data['message'])
+    return data['message']
+
+
+def fetch_work(doi, mailto=None, use_cache=True, refresh=False, use_search_records=False):
+    """
+    Fetch a single work record by DOI through the shared lookup chain.
+
+    Args:
+        doi: DOI string (bare, doi:, doi.org / dx.doi.org URL or URL-encoded)
+        mailto: Email for polite pool (defaults to CROSSREF_MAILTO)
+        use_cache: Check and populate the local metadata cache
+        refresh: Skip the snapshot index and the cache and ask the API (the
+            result is still stored in the cache)
+        use_search_records: Also accept records kept from recent searches. They
+            hold only the fields citations need, so leave this off when callers
+            want complete records
+
+    Returns:
+        The work record, or None if the DOI is malformed or not found
+
+    Raises:
+        requests.exceptions.RequestException on network or HTTP errors other than 404
+    """
+    doi = canonicalize_doi(doi)
+    if doi is None:
+        return None
+    cache = get_cache() if use_cache else None
+
+    if not refresh:
+        record, source = lookup_local(doi, cache, use_search_records)
+        if source is not None:
+            return record
+    return request_work(doi, mailto, cache)
+
+
+def _fallback_work(doi, mailto, cache):
+    try:
+        return request_work(doi, mailto, cache)
+    except requests.exceptions.RequestException:
+        return None
+
+
+def query_chunk(dois, extra_filter=None, mailto=None, select=None):
+    """
+    Fetch up to len(dois) work records in one filtered /works request.
+
+    Crossref ORs the doi: filters together and ANDs them with any other
+    filter, so extra_filter (e.g. "from-index-date:2024-01-01") narrows the
+    result to the matching DOIs.
+
+    Args:
+        dois: Normalized DOIs (none containing a comma)
+        extra_filter: Additional Crossref filter string
+        mailto: Email for polite pool (defaults to CROSSREF_MAILTO)
+        select: Optional fields to request (sequence of Crossref field names)
+
+    Returns:
+        Dictionary of normalized DOI -> work record for every DOI Crossref returned
+
+    Raises:
+        requests.exceptions.RequestException on network or HTTP errors
+    """
+    filters = [f'doi:{doi}' for doi in dois]
+    if extra_filter:
+        filters.insert(0, extra_filter)
+    params = {
+        'filter': ','.join(filters),
+        'rows': len(dois)
+    }
+    if select:
+        params['select'] = build_select(select)
+
+    message = get_message("/works", params=params, mailto=mailto, timeout=30)
+    found = {}
+    for item in (message or {}).get('items', []):
+        if item.get('DOI'):
+            found[normalize_doi(item['DOI'])] = item
+    return found
+
+
+def query_chunks(dois, chunk_size=DEFAULT_CHUNK_SIZE, workers=4, extra_filter=None, mailto=None, select=None):
+    """
+    Run query_chunk over a list of DOIs, chunk_size at a time and workers chunks concurrently.
+
+    Unlike fetch_works this bypasses the snapshot index and the cache (callers
+    use it when they need current data) and raises on the first failed request.
+
+    Returns:
+        (dictionary of normalized DOI -> work record, number of requests sent)
+    """
+    chunk_size = max(1, chunk_size)
+    chunks = [dois[i:i + chunk_size] for i in range(0, len(dois), chunk_size)]
+    found = {}
+    if chunks:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for records in executor.map(lambda chunk: query_chunk(chunk, extra_filter, mailto, select), chunks):
+                found.update(records)
+    return found, len(chunks)
+
+
+def fetch_chunk(dois, mailto=None):
+    """
+    Fetch up to len(dois) work records in one filtered /works request.
+
+    Returns:
+        Dictionary of normalized DOI -> work record for every DOI Crossref returned
+        (empty if the request failed)
+    """
+    try:
+        return query_chunk(dois, mailto=mailto)
+    except requests.exceptions.RequestException:
+        return {}
+
+
+def fetch_works(dois, chunk_size=DEFAULT_CHUNK_SIZE, workers=4, mailto=None,
+                use_cache=True, fallback=True, stats=None, use_search_records=False):
+    """
+    Resolve a list of DOIs using batched filter queries.
+
+    Args:
+        dois: Iterable of DOI strings (with or without https://doi.org/ prefix)
+        chunk_size: Maximum number of DOIs packed into one /works request
+        workers: Number of chunk requests run concurrently
+        mailto: Email for polite pool (defaults to CROSSREF_MAILTO)
+        use_cache: Check and populate the local metadata cache
+            (DOIs in the offline snapshot index, when configured, are always served from it)
+        fallback: Look up DOIs missing from bulk responses one at a time
+        stats: Optional dict that receives request and cache counters
+        use_search_records: Also accept records kept from recent searches. They
+            hold only the fields citations need, so leave this off when callers
+            want complete records
+
+    Returns:
+        Dictionary mapping each requested DOI (as given) to its work record, or None
+    """
+    if stats is None:
+        stats = {}
+    stats.update({'requested': 0, 'invalid': 0, 'snapshot_hits': 0, 'cache_hits': 0,
+                  'search_hits': 0, 'negative_hits': 0, 'bulk_requests': 0, 'fallback_requests': 0, 'not_found': 0})
+
+    cache = get_cache() if use_cache else None
+    dois = list(dois)
+    stats['requested'] = len(dois)
+
+    records = {}
+    pending = []
+    seen = set()
+    for doi in dois:
+        key = normalize_doi(doi)
+        if key in seen:
+            continue
+        seen.add(key)
+        if canonicalize_doi(key) is None:
+            stats['invalid'] += 1
+            continue
+        record, source = lookup_local(key, cache, use_search_records)
+        if source is None:
+            pending.append(key)
+        elif source == 'missing':
+            stats['negative_hits'] += 1
+        else:
+            records[key] = record
+            stats[{'snapshot': 'snapshot_hits', 'cache': 'cache_hits', 'search': 'search_hits'}[source]] += 1
+
+    # A comma inside a DOI would split the filter value, so those go straight to single lookups
+    singles = [key for key in pending if ',' in key]
+    batchable = [key for key in pending if ',' not in key]
+    chunk_size = max(1, chunk_size)
+    chunks = [batchable[i:i + chunk_size] for i in range(0, len(batchable), chunk_size)]
+
+    if chunks:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for found in executor.map(lambda chunk: fetch_chunk(chunk, mailto), chunks):
+                records.update(found)
+        stats['bulk_requests'] = len(chunks)
+
+    missing = [key for key in batchable if key not in records] + singles
+    if cache:
+        # Fallback lookups store their own results (request_work)
+        for key in batchable:
+            if key in records:
+                cache.put(key, records[key])
+    if missing and fallback:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for key, record in zip(missing, executor.map(lambda doi: _fallback_work(doi, mailto, cache), missing)):
+                if record is not None:
+                    records[key] = record
+        stats['fallback_requests'] = len(missing)
+
+    results = {doi: records.get(normalize_doi(doi)) for doi in dois}
+    stats['not_found'] = sum(1 for record in results.values() if record is None)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Resolve many DOIs with batched Crossref requests')
+    parser.add_argument('source', help="File with one DOI per line ('-' for stdin)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='DOIs per request')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent requests')
+
+    args = parser.parse_args()
+    if args.source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(args.source, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    dois = [line.strip() for line in lines if line.strip() and not line.startswith('#')]
+
+    stats = {}
+    works = fetch_works(dois, chunk_size=args.chunk_size, workers=args.workers, stats=stats)
+    print(json.dumps({'stats': stats, 'works': works}, indent=2))
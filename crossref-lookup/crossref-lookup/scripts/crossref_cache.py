@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache for Crossref work metadata.
+Usage: python crossref_cache.py [stats|clear|purge]
+
+Records are stored in a SQLite database keyed by normalized DOI, so every
+script in this skill (and every process) shares the same cache. Entries
+expire after a configurable TTL and the least recently used entries are
+evicted once the cache grows past its size limit.
+
+Records returned by searches (projected to the fields citations need) are
+kept in a separate search-record table. citation_lookup.py uses them to cite
+search hits without another request; they never stand in for a full record.
+
+DOIs that Crossref answered with 404 are remembered in a separate negative
+cache with a shorter TTL, so dead DOIs are not looked up again on every run.
+canonicalize_doi() rejects malformed DOIs before any request is made.
+
+Environment variables:
+  CROSSREF_CACHE_PATH         Database file (default: ~/.cache/crossref-lookup/metadata.sqlite3)
+  CROSSREF_CACHE_TTL          Entry lifetime in seconds (default: 30 days)
+  CROSSREF_CACHE_NEGATIVE_TTL Lifetime of remembered 404s in seconds (default: 1 day)
+  CROSSREF_CACHE_MAX_ENTRIES  Maximum number of cached records (default: 50000)
+  CROSSREF_CACHE_DISABLE      Set to 1 to bypass the cache entirely
+"""
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from urllib.parse import unquote
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser('~'), '.cache', 'crossref-lookup', 'metadata.sqlite3'
+)
+DEFAULT_TTL = 30 * 24 * 60 * 60
+DEFAULT_NEGATIVE_TTL = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 50000
+
+# doi:, info:doi/ and doi.org / dx.doi.org URLs (any scheme, optional www.)
+_DOI_PREFIX_PATTERN = re.compile(
+    r'^(?:(?:https?://)?(?:www\.)?(?:dx\.)?doi\.org/|doi:\s*|info:doi/)',
+    re.IGNORECASE
+)
+# Directory indicator 10, a numeric registrant code (optionally with sub-codes), '/', suffix
+_DOI_PATTERN = re.compile(r'^10\.\d{4,9}(?:\.\d+)*/\S+$')
+_PERCENT_ESCAPE = re.compile(r'%[0-9A-Fa-f]{2}')
+
+
+def _strip_doi(doi):
+    doi = doi.strip()
+    if _PERCENT_ESCAPE.search(doi):
+        doi = unquote(doi)
+    return _DOI_PREFIX_PATTERN.sub('', doi, count=1).strip()
+
+
+def canonicalize_doi(doi):
+    """
+    Reduce any common DOI spelling to the bare DOI, or return None if it is not a DOI.
+
+    Accepts "doi:" and "info:doi/" prefixes, doi.org and dx.doi.org URLs
+    (http or https) and URL-encoded DOIs such as 10.1000%2F182. The case of
+    the DOI is kept; use normalize_doi() for lookup keys.
+    """
+    if not doi:
+        return None
+    doi = _strip_doi(doi)
+    return doi if _DOI_PATTERN.match(doi) else None
+
+
+def normalize_doi(doi):
+    """
+    Normalize a DOI for use as a cache key.
+
+    DOIs are case-insensitive, so prefixes, URL encoding and surrounding
+    whitespace are removed (as in canonicalize_doi) and the result is
+    lower-cased. Invalid DOIs are normalized the same way, not rejected.
+    """
+    return _strip_doi(doi).lower()
+
+
+def _pack(record):
+    return zlib.compress(json.dumps(record, separators=(',', ':')).encode('utf-8'))
+
+
+class MetadataCache:
+    """SQLite-backed, TTL-bounded LRU cache of Crossref work records."""
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 negative_ttl=DEFAULT_NEGATIVE_TTL):
+        self.path = path or DEFAULT_CACHE_PATH
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.negative_hits = 0
+        self.search_hits = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS works ('
+            ' doi TEXT PRIMARY KEY,'
+            ' data BLOB NOT NULL,'
+            ' stored_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS works_accessed ON works (accessed_at)')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS search_records ('
+            ' doi TEXT PRIMARY KEY,'
+            ' data BLOB NOT NULL,'
+            ' stored_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS search_records_stored ON search_records (stored_at)')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS missing ('
+            ' doi TEXT PRIMARY KEY,'
+            ' stored_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    def get(self, doi):
+        """Return the cached record for a DOI, or None on a miss."""
+        key = normalize_doi(doi)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data, stored_at FROM works WHERE doi = ?', (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            data, stored_at = row
+            if self.ttl and now - stored_at > self.ttl:
+                self._conn.execute('DELETE FROM works WHERE doi = ?', (key,))
+                self._conn.commit()
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self._conn.execute('UPDATE works SET accessed_at = ? WHERE doi = ?', (now, key))
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(zlib.decompress(data).decode('utf-8'))
+
+    def put(self, doi, record):
+        """Store a record, evicting least recently used entries if needed."""
+        key = normalize_doi(doi)
+        now = time.time()
+        data = _pack(record)
+
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO works (doi, data, stored_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, data, now, now)
+            )
+            self._conn.execute('DELETE FROM missing WHERE doi = ?', (key,))
+            self._evict()
+            self._conn.commit()
+
+    def put_many(self, records):
+        """Store several complete work records (keyed by their DOI field) in one transaction."""
+        now = time.time()
+        rows = [(normalize_doi(record['DOI']), _pack(record), now, now)
+                for record in records if record.get('DOI')]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO works (doi, data, stored_at, accessed_at) VALUES (?, ?, ?, ?)', rows
+            )
+            self._conn.executemany('DELETE FROM missing WHERE doi = ?', [(row[0],) for row in rows])
+            self._evict()
+            self._conn.commit()
+
+    def put_search_records(self, records):
+        """
+        Keep work records returned by a search (possibly projected with select=).
+
+        They are only served by get_search_record(), never by get(), so a
+        partial record cannot replace a full one.
+        """
+        now = time.time()
+        rows = [(normalize_doi(record['DOI']), _pack(record), now)
+                for record in records if record.get('DOI')]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO search_records (doi, data, stored_at) VALUES (?, ?, ?)', rows
+            )
+            if self.max_entries:
+                count = self._conn.execute('SELECT COUNT(*) FROM search_records').fetchone()[0]
+                if count > self.max_entries:
+                    self._conn.execute(
+                        'DELETE FROM search_records WHERE doi IN '
+                        '(SELECT doi FROM search_records ORDER BY stored_at ASC LIMIT ?)',
+                        (count - self.max_entries,)
+                    )
+            self._conn.commit()
+
+    def get_search_record(self, doi):
+        """Return the record a recent search returned for this DOI, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data, stored_at FROM search_records WHERE doi = ?', (normalize_doi(doi),)
+            ).fetchone()
+            if row is None or (self.ttl and time.time() - row[1] > self.ttl):
+                return None
+            self.search_hits += 1
+        return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+
+    def is_missing(self, doi):
+        """Return True if Crossref recently answered 404 for this DOI."""
+        if not self.negative_ttl:
+            return False
+        key = normalize_doi(doi)
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT stored_at FROM missing WHERE doi = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return False
+            if time.time() - row[0] > self.negative_ttl:
+                self._conn.execute('DELETE FROM missing WHERE doi = ?', (key,))
+                self._conn.commit()
+                return False
+            self.negative_hits += 1
+            return True
+
+    def put_missing(self, doi):
+        """Remember that Crossref has no record for this DOI (after a 404)."""
+        if not self.negative_ttl:
+            return
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO missing (doi, stored_at) VALUES (?, ?)',
+                (normalize_doi(doi), time.time())
+            )
+            self._conn.commit()
+
+    def _evict(self):
+        """Trim the table down to max_entries, dropping the oldest accesses first."""
+        if not self.max_entries:
+            return
+        count = self._conn.execute('SELECT COUNT(*) FROM works').fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                'DELETE FROM works WHERE doi IN '
+                '(SELECT doi FROM works ORDER BY accessed_at ASC LIMIT ?)',
+                (excess,)
+            )
+            self.evictions += excess
+
+    def purge_expired(self):
+        """Delete every entry older than its TTL. Returns the number removed."""
+        removed = 0
+        with self._lock:
+            if self.ttl:
+                cutoff = time.time() - self.ttl
+                removed += self._conn.execute('DELETE FROM works WHERE stored_at < ?', (cutoff,)).rowcount
+                removed += self._conn.execute('DELETE FROM search_records WHERE stored_at < ?', (cutoff,)).rowcount
+            if self.negative_ttl:
+                removed += self._conn.execute(
+                    'DELETE FROM missing WHERE stored_at < ?', (time.time() - self.negative_ttl,)
+                ).rowcount
+            self._conn.commit()
+        return removed
+
+    def clear(self):
+        """Remove every cached record."""
+        with self._lock:
+            self._conn.execute('DELETE FROM works')
+            self._conn.execute('DELETE FROM missing')
+            self._conn.execute('DELETE FROM search_records')
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters for this process and the current cache size."""
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM works').fetchone()[0]
+            missing = self._conn.execute('SELECT COUNT(*) FROM missing').fetchone()[0]
+            search_records = self._conn.execute('SELECT COUNT(*) FROM search_records').fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'search_records': search_records,
+            'search_hits': self.search_hits,
+            'missing_entries': missing,
+            'negative_ttl_seconds': self.negative_ttl,
+            'negative_hits': self.negative_hits,
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def _env_int(name, default):
+    """Read an integer setting from the environment, warning and using default if it is malformed."""
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        print(f"Warning: invalid {name}, using {default}", file=sys.stderr)
+        return default
+
+
+def get_cache():
+    """
+    Return the shared process-wide cache, or None if caching is disabled.
+
+    The cache is configured from the CROSSREF_CACHE_* environment variables
+    the first time it is requested.
+    """
+    global _default_cache
+
+    if os.environ.get('CROSSREF_CACHE_DISABLE', '') not in ('', '0'):
+        return None
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            try:
+                _default_cache = MetadataCache(
+                    path=os.environ.get('CROSSREF_CACHE_PATH') or None,
+                    ttl=_env_int('CROSSREF_CACHE_TTL', DEFAULT_TTL),
+                    max_entries=_env_int('CROSSREF_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES),
+                    negative_ttl=_env_int('CROSSREF_CACHE_NEGATIVE_TTL', DEFAULT_NEGATIVE_TTL)
+                )
+            except (sqlite3.Error, OSError) as e:
+                print(f"Warning: metadata cache unavailable: {e}", file=sys.stderr)
+                return None
+        return _default_cache
+
+
+def remember_search_results(items, complete=False):
+    """
+    Keep the work records a search returned, for later citation lookups.
+
+    Complete records (searches without select=) go into the main cache;
+    projected ones into the search-record table. Does nothing if the cache
+    is disabled, and never raises.
+    """
+    cache = get_cache()
+    if cache is None or not items:
+        return
+    try:
+        if complete:
+            cache.put_many(items)
+        else:
+            cache.put_search_records(items)
+    except sqlite3.Error as e:
+        print(f"Warning: could not store search results: {e}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    cache = get_cache()
+
+    if cache is None:
+        print(json.dumps({'error': 'Cache is disabled or unavailable'}, indent=2))
+        sys.exit(1)
+
+    if command == 'stats':
+        print(json.dumps(cache.stats(), indent=2))
+    elif command == 'clear':
+        cache.clear()
+        print(json.dumps({'cleared': True, 'path': cache.path}, indent=2))
+    elif command == 'purge':
+        removed = cache.purge_expired()
+        print(json.dumps({'purged': removed, 'path': cache.path}, indent=2))
+    else:
+        print("Usage: python crossref_cache.py [stats|clear|purge]")
+        sys.exit(1)
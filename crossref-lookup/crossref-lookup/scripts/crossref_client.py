@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the Crossref REST API.
+
+Every script in this skill sends its requests through api_get(), which uses
+one keep-alive requests.Session per process. Repeated calls reuse pooled
+connections instead of opening a new TCP+TLS connection each time.
+
+Requests are paced by the shared adaptive rate limiter in crossref_ratelimit.py,
+and 429/5xx responses and connection errors are retried with exponential
+backoff (honoring Retry-After).
+
+Identical requests made concurrently from several threads are coalesced:
+the first caller sends the request and the others wait for and share its
+response (see SingleFlight and get_request_stats()).
+
+Environment variables:
+  CROSSREF_MAILTO     Email for the Crossref polite pool (default: user@example.com)
+  CROSSREF_TIMEOUT    Request timeout in seconds (default: 15)
+  CROSSREF_POOL_SIZE  Maximum pooled connections per host (default: 32)
+
+See crossref_ratelimit.py for the rate limiting and retry settings.
+"""
+import os
+import threading
+import time
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from crossref_ratelimit import RETRYABLE_STATUS, backoff_delay, get_limiter, get_max_retries, parse_retry_after
+
+API_BASE = "https://api.crossref.org"
+USER_AGENT = "CrossrefLookupSkill/2.0"
+DEFAULT_MAILTO = "user@example.com"
+DEFAULT_TIMEOUT = 15
+DEFAULT_POOL_SIZE = 32
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait and receive the same result (or exception).
+    Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run fn() for key, or wait for the call already in flight for key."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'done': threading.Event(), 'result': None, 'error': None}
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = fn()
+            return call['result']
+        except BaseException as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self.executions, 'coalesced': self.coalesced}
+
+
+_singleflight = SingleFlight()
+
+
+def get_request_stats():
+    """Return how many requests this process sent and how many duplicates were coalesced."""
+    return _singleflight.stats()
+
+
+def get_mailto(mailto=None):
+    """Return the polite-pool email: the explicit argument, then CROSSREF_MAILTO, then the default."""
+    return mailto or os.environ.get('CROSSREF_MAILTO') or DEFAULT_MAILTO
+
+
+def get_timeout(timeout=None):
+    """Return the request timeout: the explicit argument, then CROSSREF_TIMEOUT, then the default."""
+    if timeout is not None:
+        return timeout
+    return float(os.environ.get('CROSSREF_TIMEOUT', DEFAULT_TIMEOUT))
+
+
+def get_session():
+    """Return the process-wide keep-alive session, creating it on first use."""
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            pool_size = int(os.environ.get('CROSSREF_POOL_SIZE', DEFAULT_POOL_SIZE))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=False)
+
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({
+                'Accept': 'application/json',
+                'Accept-Encoding': 'gzip, deflate'
+            })
+            _session = session
+        return _session
+
+
+def api_get(path, params=None, mailto=None, timeout=None, max_retries=None):
+    """
+    Send a GET request to the Crossref API through the shared session.
+
+    Each attempt first takes a token from the shared rate limiter. Rate-limit
+    headers on the response adjust the limiter, and 429/5xx responses or
+    connection errors are retried up to max_retries times with backoff.
+    A call identical to one already in flight waits for that call and
+    shares its response instead of sending another request.
+
+    Args:
+        path: API path such as "/works/10.1038/nature12373", or a full URL
+        params: Optional query parameters
+        mailto: Email for polite pool (defaults to CROSSREF_MAILTO)
+        timeout: Timeout in seconds (defaults to CROSSREF_TIMEOUT)
+        max_retries: Retry budget (defaults to CROSSREF_MAX_RETRIES)
+
+    Returns:
+        requests.Response with a successful status
+
+    Raises:
+        requests.exceptions.RequestException on network or HTTP errors
+        that persist after all retries
+    """
+    url = path if path.startswith('http') else f"{API_BASE}{path}"
+    key = (url, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+    return _singleflight.do(key, lambda: _send(url, params, mailto, timeout, max_retries))
+
+
+def _send(url, params, mailto, timeout, max_retries):
+    """Send one logical request, with rate limiting and retries (see api_get)."""
+    headers = {
+        'User-Agent': f'{USER_AGENT} (mailto:{get_mailto(mailto)})'
+    }
+    timeout = get_timeout(timeout)
+    if max_retries is None:
+        max_retries = get_max_retries()
+    limiter = get_limiter()
+    session = get_session()
+
+    attempt = 0
+    while True:
+        if limiter:
+            limiter.acquire()
+
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt >= max_retries:
+                raise
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+            continue
+
+        if limiter:
+            limiter.update_from_headers(response.headers)
+
+        if response.status_code in RETRYABLE_STATUS and attempt < max_retries:
+            delay = backoff_delay(attempt, parse_retry_after(response.headers.get('Retry-After')))
+            if response.status_code == 429 and limiter:
+                # Hold back every thread and process sharing the limiter, not just this one
+                limiter.block_for(delay)
+            else:
+                time.sleep(delay)
+            response.close()
+            attempt += 1
+            continue
+
+        response.raise_for_status()
+        return response
+
+
+def work_path(doi):
+    """Return the /works/{doi} API path, percent-encoding characters that are unsafe in a URL path."""
+    return "/works/" + quote(doi, safe="/:;()-._~,")
+
+
+def is_not_found(error):
+    """Return True if a requests exception is an HTTP 404 (Crossref has no such DOI)."""
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code == 404
+
+
+def get_message(path, params=None, mailto=None, timeout=None):
+    """
+    Fetch a Crossref API path and return its 'message' payload.
+
+    Returns None when Crossref reports a non-ok status; network and HTTP
+    errors are raised as requests exceptions.
+    """
+    data = api_get(path, params=params, mailto=mailto, timeout=timeout).json()
+    return data['message'] if data.get('status') == 'ok' else None
+
+
+def iter_cursor(path, params=None, page_size=1000, cursor='*', on_cursor=None, mailto=None):
+    """
+    Walk a Crossref list endpoint with deep paging, yielding one item at a time.
+
+    Only one page is held in memory, so arbitrarily large result sets stream
+    in constant memory. After every item of a page has been yielded,
+    on_cursor(next_cursor) is called so callers can persist it and resume a
+    later run from that point (Crossref expires idle cursors after 5 minutes).
+
+    Args:
+        path: List endpoint such as "/works"
+        params: Query parameters (query, filter, select, ...)
+        page_size: Rows per request (max 1000)
+        cursor: Cursor to start from ('*' for the beginning)
+        on_cursor: Optional callback receiving each next-cursor value
+        mailto: Email for polite pool (defaults to CROSSREF_MAILTO)
+
+    Yields:
+        Raw item dictionaries from message['items']
+    """
+    params = dict(params or {})
+    params['rows'] = page_size
+
+    while True:
+        params['cursor'] = cursor
+        message = get_message(path, params=params, mailto=mailto)
+        items = message.get('items', []) if message else []
+        if not items:
+            return
+
+        for item in items:
+            yield item
+
+        next_cursor = message.get('next-cursor')
+        if not next_cursor or next_cursor == cursor:
+            return
+        cursor = next_cursor
+        if on_cursor:
+            on_cursor(cursor)
+
+        # A short page is the last one; skip the empty request that would confirm it
+        if len(items) < page_size:
+            return
+
+
+def build_select(fields, extra_fields=None):
+    """
+    Build a Crossref select= value from the fields a caller reads.
+
+    Fields are de-duplicated in order; extra_fields may be a list or a
+    comma-separated string of additional Crossref field names.
+    """
+    if isinstance(extra_fields, str):
+        extra_fields = [field.strip() for field in extra_fields.split(',')]
+    selected = []
+    for field in list(fields) + list(extra_fields or []):
+        if field and field not in selected:
+            selected.append(field)
+    return ','.join(selected)
+
+
+def load_cursor(cursor_file):
+    """Return the cursor saved in cursor_file, or '*' if there is none."""
+    try:
+        with open(cursor_file, 'r', encoding='utf-8') as f:
+            return f.read().strip() or '*'
+    except FileNotFoundError:
+        return '*'
+
+
+def save_cursor(cursor_file, cursor):
+    """Atomically write a cursor so an interrupted harvest can resume from it."""
+    tmp_path = f"{cursor_file}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(cursor)
+    os.replace(tmp_path, cursor_file)
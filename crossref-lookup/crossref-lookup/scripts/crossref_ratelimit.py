@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Adaptive rate limiting and retry backoff for Crossref requests.
+Usage: python crossref_ratelimit.py [status|reset]
+
+RateLimiter is a token bucket whose rate follows the X-Rate-Limit-Limit and
+X-Rate-Limit-Interval headers Crossref sends with every response. Its state
+lives in a small JSON file guarded by an exclusive file lock, so every thread
+and every process on the machine draws from the same budget. A 429 response
+pauses all of them until Retry-After has passed.
+
+Environment variables:
+  CROSSREF_RATE_LIMIT        Starting rate in requests/second before headers are seen (default: 10;
+                             0 or less disables rate limiting)
+  CROSSREF_MAX_RETRIES       Retries for 429/5xx responses and connection errors (default: 5)
+  CROSSREF_RATELIMIT_STATE   Shared state file (default: ~/.cache/crossref-lookup/ratelimit.json)
+  CROSSREF_RATELIMIT_DISABLE Set to 1 to disable rate limiting (retries still apply)
+"""
+import email.utils
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # No cross-process locking on this platform; threads are still coordinated
+    fcntl = None
+
+DEFAULT_RATE = 10.0
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_STATE_PATH = os.path.join(
+    os.path.expanduser('~'), '.cache', 'crossref-lookup', 'ratelimit.json'
+)
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 60.0
+
+RETRYABLE_STATUS = frozenset([429, 500, 502, 503, 504])
+
+_INTERVAL_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*$')
+_INTERVAL_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, None: 1}
+
+
+def parse_interval(value):
+    """Parse an X-Rate-Limit-Interval value such as '1s' into seconds."""
+    match = _INTERVAL_PATTERN.match(value or '')
+    if not match:
+        return None
+    return float(match.group(1)) * _INTERVAL_UNITS[match.group(2)]
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (delta seconds or HTTP date) into seconds to wait."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Return how long to sleep before retry number `attempt` (0-based).
+
+    Honors Retry-After when the server sent one; otherwise uses exponential
+    backoff with full jitter, capped at BACKOFF_CAP seconds.
+    """
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_CAP)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+class RateLimiter:
+    """Token bucket shared by all threads and processes using the same state file."""
+
+    def __init__(self, rate=DEFAULT_RATE, state_path=None):
+        self.default_rate = float(rate)
+        self.state_path = state_path or DEFAULT_STATE_PATH
+        self.lock_path = self.state_path + '.lock'
+        self._thread_lock = threading.Lock()
+        self._memory_state = None
+
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _initial_state(self, now):
+        return {
+            'rate': self.default_rate,
+            'capacity': max(1.0, self.default_rate),
+            'tokens': max(1.0, self.default_rate),
+            'updated': now,
+            'blocked_until': 0.0
+        }
+
+    def _locked(self, update):
+        """Run update(state, now) under the thread and file locks and persist the state if it changed."""
+        with self._thread_lock:
+            lock_file = None
+            try:
+                if fcntl is not None:
+                    lock_file = open(self.lock_path, 'a')
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    state = self._read_state()
+                else:
+                    state = self._memory_state
+
+                now = time.time()
+                before = state
+                if state is None:
+                    state = self._initial_state(now)
+                else:
+                    state = dict(state)
+                result = update(state, now)
+
+                if fcntl is not None:
+                    if state != before:
+                        self._write_state(state)
+                else:
+                    self._memory_state = state
+                return result
+            finally:
+                if lock_file is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    lock_file.close()
+
+    def _read_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_state(self, state):
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def reserve(self):
+        """
+        Take one token and return how many seconds the caller must wait before sending.
+
+        Tokens may go negative: each caller reserves the next free slot, so
+        concurrent callers are spaced evenly instead of polling.
+        """
+        def update(state, now):
+            elapsed = max(0.0, now - state['updated'])
+            state['tokens'] = min(state['capacity'], state['tokens'] + elapsed * state['rate'])
+            state['updated'] = now
+            state['tokens'] -= 1
+
+            wait = max(0.0, state['blocked_until'] - now)
+            if state['tokens'] < 0 and state['rate'] > 0:
+                wait = max(wait, -state['tokens'] / state['rate'])
+            return wait
+
+        return self._locked(update)
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def update_from_headers(self, headers):
+        """Adjust the rate from X-Rate-Limit-Limit / X-Rate-Limit-Interval response headers."""
+        try:
+            limit = float(headers.get('X-Rate-Limit-Limit', ''))
+        except ValueError:
+            return
+        interval = parse_interval(headers.get('X-Rate-Limit-Interval', '1s'))
+        if limit <= 0 or not interval:
+            return
+
+        rate = limit / interval
+
+        # Crossref repeats the same headers on every response; an unchanged
+        # rate leaves the state as it is, so nothing is written
+        def update(state, now):
+            if state['rate'] != rate:
+                state['rate'] = rate
+                state['capacity'] = max(1.0, limit)
+                state['tokens'] = min(state['tokens'], state['capacity'])
+
+        self._locked(update)
+
+    def block_for(self, seconds):
+        """Pause every user of this limiter for the given number of seconds (after a 429)."""
+        def update(state, now):
+            state['blocked_until'] = max(state['blocked_until'], now + seconds)
+            state['tokens'] = min(state['tokens'], 0.0)
+
+        self._locked(update)
+
+    def status(self):
+        """Return a snapshot of the shared limiter state."""
+        def update(state, now):
+            return {
+                'state_path': self.state_path,
+                'rate_per_second': state['rate'],
+                'capacity': state['capacity'],
+                'tokens': round(min(state['capacity'],
+                                    state['tokens'] + max(0.0, now - state['updated']) * max(0.0, state['rate'])), 3),
+                'blocked_for_seconds': round(max(0.0, state['blocked_until'] - now), 3)
+            }
+
+        return self._locked(update)
+
+    def reset(self):
+        """Forget learned limits and any pending block."""
+        def update(state, now):
+            state.clear()
+            state.update(self._initial_state(now))
+
+        self._locked(update)
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """
+    Return the shared process-wide limiter, or None if rate limiting is disabled
+    (CROSSREF_RATELIMIT_DISABLE, or a CROSSREF_RATE_LIMIT of 0 or less).
+    """
+    global _default_limiter
+
+    if os.environ.get('CROSSREF_RATELIMIT_DISABLE', '') not in ('', '0'):
+        return None
+
+    try:
+        rate = float(os.environ.get('CROSSREF_RATE_LIMIT', DEFAULT_RATE))
+    except ValueError:
+        print(f"Warning: invalid CROSSREF_RATE_LIMIT, using {DEFAULT_RATE}", file=sys.stderr)
+        rate = DEFAULT_RATE
+    if not rate > 0:
+        return None
+
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            try:
+                _default_limiter = RateLimiter(
+                    rate=rate,
+                    state_path=os.environ.get('CROSSREF_RATELIMIT_STATE') or None
+                )
+            except OSError as e:
+                print(f"Warning: rate limiter unavailable: {e}", file=sys.stderr)
+                return None
+        return _default_limiter
+
+
+def get_max_retries():
+    return int(os.environ.get('CROSSREF_MAX_RETRIES', DEFAULT_MAX_RETRIES))
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    limiter = get_limiter()
+
+    if limiter is None:
+        print(json.dumps({'error': 'Rate limiting is disabled or unavailable'}, indent=2))
+        sys.exit(1)
+
+    if command == 'status':
+        print(json.dumps(limiter.status(), indent=2))
+    elif command == 'reset':
+        limiter.reset()
+        print(json.dumps(limiter.status(), indent=2))
+    else:
+        print("Usage: python crossref_ratelimit.py [status|reset]")
+        sys.exit(1)
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Offline Crossref snapshot index.
+Usage: python crossref_snapshot.py import <file|dir>... [--index PATH] [--workers N]
+       python crossref_snapshot.py stats [--index PATH]
+       python crossref_snapshot.py get <doi> [--index PATH]
+
+Crossref publishes its public metadata as bulk snapshot files: gzipped JSON
+Lines (one work record per line) or gzipped JSON documents with an "items"
+list, as in the annual public data file. The importer streams those files
+into a SQLite database keyed by normalized DOI, storing each record as
+zlib-compressed JSON.
+
+Each file is decompressed and parsed by one of a pool of worker processes,
+which sends the parsed, compressed records back in batches of lines; the
+main process only writes batches to the database. The result queue holds
+at most two batches per worker, so memory stays bounded however large a
+file is (JSON document files cannot be split and are parsed whole).
+Imported files are recorded in the index and skipped when the import is
+re-run, so an interrupted import picks up at the file where it stopped.
+
+When CROSSREF_SNAPSHOT_INDEX points at an index, DOI lookups in this skill
+(citation_lookup.py, doi_lookup.py, the generate_* scripts, crossref_bulk.py
+and crossref_async.py) check it before the cache and the API.
+
+Environment variables:
+  CROSSREF_SNAPSHOT_INDEX  Index database used for lookups and as the import default
+"""
+import argparse
+import gzip
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+from crossref_cache import normalize_doi
+
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.expanduser('~'), '.cache', 'crossref-lookup', 'snapshot.sqlite3'
+)
+SNAPSHOT_SUFFIXES = ('.jsonl.gz', '.json.gz', '.jsonl', '.json')
+DEFAULT_BATCH_LINES = 20000
+
+
+def iter_snapshot_files(paths):
+    """Yield snapshot files from a list of files and directories (searched recursively)."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(SNAPSHOT_SUFFIXES):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def _compress(text):
+    return zlib.compress(text.encode('utf-8'))
+
+
+def _unwrap(item):
+    """Accept both bare work records and API-style {"message": {...}} envelopes (None if neither)."""
+    if not isinstance(item, dict):
+        return None
+    if 'DOI' not in item and isinstance(item.get('message'), dict):
+        return item['message']
+    return item
+
+
+def _has_doi(work):
+    return work is not None and isinstance(work.get('DOI'), str) and work['DOI'].strip() != ''
+
+
+def iter_line_batches(path, batch_lines=DEFAULT_BATCH_LINES):
+    """Yield lists of at most batch_lines raw lines from a (gzipped) JSON Lines file."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        batch = []
+        for line in f:
+            batch.append(line)
+            if len(batch) >= batch_lines:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def parse_snapshot_lines(lines):
+    """
+    Parse a batch of JSON Lines records (runs in a worker process).
+
+    Returns:
+        (rows, errors) where rows is a list of (normalized DOI, compressed record)
+    """
+    rows = []
+    errors = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            errors += 1
+            continue
+        work = _unwrap(item)
+        if not _has_doi(work):
+            errors += 1
+            continue
+        # Store the original line when it is already a bare record: no re-encoding
+        text = line if work is item else json.dumps(work, separators=(',', ':'))
+        rows.append((normalize_doi(work['DOI']), _compress(text)))
+    return rows, errors
+
+
+def parse_snapshot_document(path):
+    """
+    Decompress and parse one JSON document snapshot file with an "items" list (runs in a worker process).
+
+    A JSON document cannot be split before it is parsed, so these files are
+    handled whole; the public data file ships them a few thousand records each.
+
+    Returns:
+        (rows, errors) as for parse_snapshot_lines
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        data = json.load(f)
+    data = _unwrap(data) if isinstance(data, dict) else data
+    items = data.get('items', []) if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return [], 1
+
+    rows = []
+    errors = 0
+    for item in items:
+        work = _unwrap(item)
+        if not _has_doi(work):
+            errors += 1
+            continue
+        rows.append((normalize_doi(work['DOI']), _compress(json.dumps(work, separators=(',', ':')))))
+    return rows, errors
+
+
+_results = None
+
+
+def _init_worker(results):
+    global _results
+    _results = results
+
+
+def import_file_worker(path, batch_lines=DEFAULT_BATCH_LINES):
+    """
+    Decompress and parse one snapshot file (runs in a worker process).
+
+    Puts (path, (rows, errors), False) on the result queue for every batch,
+    then (path, None, True) once the whole file is parsed, or
+    (path, error message, True) if the file cannot be read.
+    """
+    try:
+        if '.jsonl' in os.path.basename(path):
+            for batch in iter_line_batches(path, batch_lines):
+                _results.put((path, parse_snapshot_lines(batch), False))
+        else:
+            _results.put((path, parse_snapshot_document(path), False))
+    except Exception as e:
+        _results.put((path, f"{type(e).__name__}: {e}", True))
+        return
+    _results.put((path, None, True))
+
+
+class SnapshotIndex:
+    """SQLite index of Crossref work records imported from snapshot files."""
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_INDEX_PATH
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS works ('
+            ' doi TEXT PRIMARY KEY,'
+            ' data BLOB NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            ' path TEXT PRIMARY KEY,'
+            ' size INTEGER NOT NULL,'
+            ' mtime REAL NOT NULL,'
+            ' records INTEGER NOT NULL,'
+            ' imported_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    def get(self, doi):
+        """Return the indexed record for a DOI, or None if the snapshot does not have it."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM works WHERE doi = ?', (normalize_doi(doi),)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+
+    def _is_imported(self, path, size, mtime):
+        row = self._conn.execute(
+            'SELECT size, mtime FROM files WHERE path = ?', (os.path.abspath(path),)
+        ).fetchone()
+        return row is not None and row[0] == size and row[1] == mtime
+
+    def _store_rows(self, rows):
+        """Write one parsed batch in one transaction."""
+        with self._lock:
+            self._conn.executemany('INSERT OR REPLACE INTO works (doi, data) VALUES (?, ?)', rows)
+            self._conn.commit()
+
+    def _mark_imported(self, path, records):
+        stat = os.stat(path)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO files (path, size, mtime, records, imported_at) VALUES (?, ?, ?, ?, ?)',
+                (os.path.abspath(path), stat.st_size, stat.st_mtime, records, time.time())
+            )
+            self._conn.commit()
+
+    def import_files(self, paths, workers=None, force=False, batch_lines=DEFAULT_BATCH_LINES, progress=None):
+        """
+        Import snapshot files into the index.
+
+        Args:
+            paths: Snapshot files and/or directories containing them
+            workers: Worker processes for decompressing and parsing (default: CPU count)
+            force: Re-import files that were already imported
+            batch_lines: JSON Lines records a worker sends back at a time
+            progress: Optional callback receiving (path, records) after each file
+
+        Returns:
+            Summary dictionary with file, record and error counts and throughput
+        """
+        start = time.perf_counter()
+        workers = max(1, workers or os.cpu_count() or 1)
+
+        files = []
+        skipped = 0
+        for path in iter_snapshot_files(paths):
+            stat = os.stat(path)
+            if not force and self._is_imported(path, stat.st_size, stat.st_mtime):
+                skipped += 1
+            else:
+                files.append(path)
+
+        summary = {'files': 0, 'skipped_files': skipped, 'records': 0, 'errors': 0}
+
+        # Bulk loading: durability of a half-written import is handled by the files table
+        self._conn.execute('PRAGMA synchronous=OFF')
+        try:
+            results = multiprocessing.Queue(2 * workers)
+            with multiprocessing.Pool(workers, _init_worker, (results,)) as pool:
+                for path in files:
+                    pool.apply_async(import_file_worker, (path, batch_lines))
+                file_records = {}
+                remaining = len(files)
+                while remaining:
+                    remaining -= self._finish(results.get(), file_records, summary, progress)
+        finally:
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+
+        elapsed = time.perf_counter() - start
+        summary['elapsed_seconds'] = round(elapsed, 3)
+        summary['records_per_second'] = round(summary['records'] / elapsed, 1) if elapsed > 0 else None
+        summary['index'] = self.path
+        return summary
+
+    def _finish(self, message, file_records, summary, progress):
+        """
+        Store one batch from a worker; once a file is done, mark it imported.
+
+        Returns:
+            1 if the message finished a file, else 0
+        """
+        path, result, done = message
+        if not done:
+            rows, errors = result
+            self._store_rows(rows)
+            file_records[path] = file_records.get(path, 0) + len(rows)
+            summary['records'] += len(rows)
+            summary['errors'] += errors
+            return 0
+        if result is not None:
+            raise RuntimeError(f"Import of {path} failed: {result}")
+        # A file's batches come from one worker in order, so all of them are stored
+        records = file_records.pop(path, 0)
+        self._mark_imported(path, records)
+        summary['files'] += 1
+        if progress:
+            progress(path, records)
+        return 1
+
+    def stats(self):
+        """Return the index size and this process's lookup counters."""
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM works').fetchone()[0]
+            files = self._conn.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+        return {
+            'path': self.path,
+            'entries': entries,
+            'files_imported': files,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_snapshot_index():
+    """
+    Return the shared snapshot index, or None if none is configured.
+
+    Lookups only use an index that CROSSREF_SNAPSHOT_INDEX names and that
+    already exists; nothing is created as a side effect of a lookup.
+    """
+    global _default_index
+
+    path = os.environ.get('CROSSREF_SNAPSHOT_INDEX')
+    if not path or not os.path.exists(path):
+        return None
+
+    with _default_index_lock:
+        if _default_index is None:
+            try:
+                _default_index = SnapshotIndex(path)
+            except sqlite3.Error as e:
+                print(f"Warning: snapshot index unavailable: {e}", file=sys.stderr)
+                return None
+        return _default_index
+
+
+def lookup_snapshot(doi):
+    """Return a work record from the configured snapshot index, or None."""
+    index = get_snapshot_index()
+    if index is None:
+        return None
+    try:
+        return index.get(doi)
+    except sqlite3.Error as e:
+        print(f"Warning: snapshot lookup failed: {e}", file=sys.stderr)
+        return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import and query an offline Crossref snapshot index')
+    parser.add_argument('command', choices=['import', 'stats', 'get'])
+    parser.add_argument('paths', nargs='*', help='Snapshot files or directories (import), or a DOI (get)')
+    parser.add_argument('--index', default=os.environ.get('CROSSREF_SNAPSHOT_INDEX') or DEFAULT_INDEX_PATH,
+                        help='Index database file')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--batch-lines', type=int, default=DEFAULT_BATCH_LINES, help='JSON Lines records per batch sent back by a worker')
+    parser.add_argument('--force', action='store_true', help='Re-import files that were already imported')
+
+    args = parser.parse_args()
+    index = SnapshotIndex(args.index)
+
+    if args.command == 'import':
+        if not args.paths:
+            parser.error('import needs at least one snapshot file or directory')
+        summary = index.import_files(
+            args.paths, workers=args.workers, force=args.force, batch_lines=max(1, args.batch_lines),
+            progress=lambda path, records: print(f"{records:>8} records  {path}", file=sys.stderr)
+        )
+        print(json.dumps(summary, indent=2))
+    elif args.command == 'stats':
+        print(json.dumps(index.stats(), indent=2))
+    else:
+        if len(args.paths) != 1:
+            parser.error('get needs exactly one DOI')
+        record = index.get(args.paths[0])
+        if record is None:
+            print(json.dumps({'error': f'DOI not in snapshot index: {args.paths[0]}'}, indent=2))
+            sys.exit(1)
+        print(json.dumps(record, indent=2))
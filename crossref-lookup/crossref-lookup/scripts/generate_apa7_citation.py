@@ -3,25 +3,18 @@
 Generate APA 7th edition citations from DOIs using the Crossref API.
 Usage: python generate_apa7_citation.py <doi>
 """
-import requests
 import json
 import sys
 
-def get_doi_metadata(doi, mailto="user@example.com"):
-    """Fetch metadata from Crossref API."""
-    doi = doi.replace('https://doi.org/', '').replace('http://doi.org/', '')
-    url = f"https://api.crossref.org/works/{doi}"
-    
-    headers = {
-        'User-Agent': f'CrossrefLookupSkill/1.0 (mailto:{mailto})'
-    }
-    
+import requests
+
+from crossref_bulk import fetch_work
+
+def get_doi_metadata(doi, mailto=None, use_cache=True):
+    """Fetch metadata from Crossref API, serving repeat lookups from the local cache."""
     try:
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        return data['message'] if data['status'] == 'ok' else None
-    except:
+        return fetch_work(doi, mailto=mailto, use_cache=use_cache, use_search_records=True)
+    except requests.exceptions.RequestException:
         return None
 
 def format_author_apa7(given, family):
@@ -7,56 +7,58 @@ import requests
 import json
 import sys
 
-def lookup_journal(issn, mailto="user@example.com"):
+from crossref_client import api_get
+
+def format_issn(issn):
+    """Normalize an ISSN to the XXXX-XXXX form used in API paths."""
+    # Clean ISSN (remove hyphens)
+    issn = issn.replace('-', '')
+    
+    # Format ISSN with hyphen (XXXX-XXXX)
+    if len(issn) == 8:
+        issn = f"{issn[:4]}-{issn[4:]}"
+    return issn
+
+def parse_journal(message):
+    """Extract journal metadata from a Crossref /journals message."""
+    result = {
+        'title': message.get('title'),
+        'publisher': message.get('publisher'),
+        'issn': message.get('ISSN', []),
+        'subjects': message.get('subjects', []),
+        'last_status_check_time': message.get('last-status-check-time'),
+        'flags': message.get('flags', {}),
+        'coverage': message.get('coverage', {}),
+        'breakdowns': message.get('breakdowns', {}),
+        'counts': message.get('counts', {})
+    }
+    
+    # Additional details
+    if 'counts' in message:
+        result['total_dois'] = message['counts'].get('total-dois', 0)
+        result['current_dois'] = message['counts'].get('current-dois', 0)
+    
+    return result
+
+def lookup_journal(issn, mailto=None):
     """
     Look up journal information by ISSN.
     
     Args:
         issn: ISSN (print or electronic)
-        mailto: Email for polite pool
+        mailto: Email for polite pool (defaults to CROSSREF_MAILTO)
     
     Returns:
         Journal metadata dictionary
     """
-    # Clean ISSN (remove hyphens)
-    issn = issn.replace('-', '')
-    
-    # Format ISSN with hyphen (XXXX-XXXX)
-    if len(issn) == 8:
-        issn = f"{issn[:4]}-{issn[4:]}"
-    
-    url = f"https://api.crossref.org/journals/{issn}"
-    
-    headers = {
-        'User-Agent': f'CrossrefLookupSkill/1.0 (mailto:{mailto})'
-    }
+    issn = format_issn(issn)
     
     try:
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
+        response = api_get(f"/journals/{issn}", mailto=mailto)
         data = response.json()
         
         if data['status'] == 'ok':
-            message = data['message']
-            
-            result = {
-                'title': message.get('title'),
-                'publisher': message.get('publisher'),
-                'issn': message.get('ISSN', []),
-                'subjects': message.get('subjects', []),
-                'last_status_check_time': message.get('last-status-check-time'),
-                'flags': message.get('flags', {}),
-                'coverage': message.get('coverage', {}),
-                'breakdowns': message.get('breakdowns', {}),
-                'counts': message.get('counts', {})
-            }
-            
-            # Additional details
-            if 'counts' in message:
-                result['total_dois'] = message['counts'].get('total-dois', 0)
-                result['current_dois'] = message['counts'].get('current-dois', 0)
-            
-            return result
+            return parse_journal(data['message'])
         else:
             return {'error': 'Journal not found'}
     
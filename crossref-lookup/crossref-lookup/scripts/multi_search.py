@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Run many related Crossref searches at once and merge the results by DOI.
+Usage: python multi_search.py "query one" "query two" ... [--rows 20] [--filter F] [--aggregate sum|max|rrf]
+       python multi_search.py --queries-file queries.txt [--workers 16] [--top N] [--json]
+
+Each query runs through search_works.search_works on its own thread, so the
+wall-clock time is close to that of the slowest query (requests still share
+the client's connection pool and rate limiter). Works found by several
+queries are merged into one entry whose score is aggregated across queries:
+
+  sum  total Crossref relevance score (default)
+  max  best single score
+  rrf  reciprocal rank fusion, sum of 1 / (60 + rank); ignores raw scores,
+       which Crossref does not normalize across queries
+
+The merged list is printed as NDJSON, best first, one work per line with
+the queries that matched it; --json prints one JSON document instead.
+
+In a queries file, each line is a query, optionally followed by a tab and a
+Crossref filter string for that query alone. Blank lines and # comments are
+skipped.
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from search_works import search_works, stream_ndjson
+
+AGGREGATES = ('sum', 'max', 'rrf')
+RRF_K = 60
+DEFAULT_WORKERS = 16
+
+
+def read_queries(path):
+    """Read (query, filter or None) pairs from a file ('-' for stdin)."""
+    if path == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+    queries = []
+    for line in lines:
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        query, _, filter_str = line.partition('\t')
+        queries.append((query.strip(), filter_str.strip() or None))
+    return queries
+
+
+def merge_results(results, aggregate='sum'):
+    """
+    Merge per-query result lists into one list ranked by aggregated score.
+
+    Args:
+        results: List of (query, works) pairs, works as returned by search_works
+        aggregate: 'sum', 'max' or 'rrf'
+
+    Returns:
+        List of work dictionaries with added score (aggregated), queries and
+        best_rank fields, best first; works without a DOI are dropped
+    """
+    merged = {}
+    for query, works in results:
+        for rank, work in enumerate(works, 1):
+            if not work.get('doi'):
+                continue
+            key = work['doi'].lower()
+            score = work.get('score') or 0
+            value = 1.0 / (RRF_K + rank) if aggregate == 'rrf' else score
+
+            entry = merged.get(key)
+            if entry is None:
+                entry = dict(work)
+                entry.update({'score': value, 'queries': [query], 'best_rank': rank})
+                merged[key] = entry
+                continue
+            if aggregate == 'max':
+                entry['score'] = max(entry['score'], value)
+            else:
+                entry['score'] += value
+            if query not in entry['queries']:
+                entry['queries'].append(query)
+            entry['best_rank'] = min(entry['best_rank'], rank)
+
+    return sorted(merged.values(), key=lambda work: (-work['score'], -len(work['queries']), work['best_rank']))
+
+
+def search_many(queries, rows=20, filter_str=None, workers=DEFAULT_WORKERS, aggregate='sum',
+                mailto=None, extra_fields=None, use_cache=True, stats=None):
+    """
+    Run several searches concurrently and merge them by DOI.
+
+    Args:
+        queries: Query strings, or (query, filter) pairs to give a query its own filter
+        rows: Results fetched per query
+        filter_str: Crossref filter string for queries without their own
+        workers: Queries run at the same time
+        aggregate: Score aggregation: 'sum', 'max' or 'rrf'
+        mailto: Email for polite pool (defaults to CROSSREF_MAILTO)
+        extra_fields: Additional Crossref fields to include in each work
+        use_cache: Keep the returned records in the local cache for citation lookups
+        stats: Optional dict that receives per-query counts and failures
+
+    Returns:
+        Ranked, de-duplicated list of works (see merge_results)
+    """
+    if aggregate not in AGGREGATES:
+        raise ValueError(f"Unknown aggregate '{aggregate}' (choose from {', '.join(AGGREGATES)})")
+    if stats is None:
+        stats = {}
+
+    specs = [(spec, filter_str) if isinstance(spec, str) else (spec[0], spec[1] or filter_str)
+             for spec in queries]
+
+    def run(spec):
+        query, query_filter = spec
+        return search_works(query, rows, query_filter, mailto=mailto, extra_fields=extra_fields,
+                            use_cache=use_cache)
+
+    start = time.perf_counter()
+    results = []
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(specs) or 1))) as executor:
+        for (query, _), result in zip(specs, executor.map(run, specs)):
+            if 'error' in result:
+                failed.append({'query': query, 'error': result['error']})
+            else:
+                results.append((query, result['works']))
+
+    merged = merge_results(results, aggregate)
+    stats.update({
+        'queries': len(specs),
+        'failed': failed,
+        'results_fetched': sum(len(works) for _, works in results),
+        'unique_works': len(merged),
+        'elapsed_seconds': round(time.perf_counter() - start, 3)
+    })
+    return merged
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run several Crossref searches concurrently and merge them by DOI')
+    parser.add_argument('queries', nargs='*', help='Search queries')
+    parser.add_argument('--queries-file', help="File with one query per line (optional tab + filter); '-' for stdin")
+    parser.add_argument('--rows', type=int, default=20, help='Results per query')
+    parser.add_argument('--filter', dest='filter_str', help='Crossref filter string applied to every query')
+    parser.add_argument('--aggregate', choices=AGGREGATES, default='sum', help='Score aggregation across queries')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Queries run concurrently')
+    parser.add_argument('--top', type=int, help='Only output the N best works')
+    parser.add_argument('--select', dest='extra_fields', help='Extra Crossref fields to include (comma-separated)')
+    parser.add_argument('--json', action='store_true', help='Print one JSON document instead of NDJSON')
+
+    args = parser.parse_args()
+    queries = list(args.queries)
+    if args.queries_file:
+        queries += read_queries(args.queries_file)
+    if not queries:
+        parser.error('give at least one query or --queries-file')
+
+    stats = {}
+    works = search_many(queries, rows=args.rows, filter_str=args.filter_str, workers=args.workers,
+                        aggregate=args.aggregate, extra_fields=args.extra_fields, stats=stats)
+    if args.top is not None:
+        works = works[:args.top]
+
+    if args.json:
+        print(json.dumps({'stats': stats, 'works': works}, indent=2))
+    else:
+        stream_ndjson(works)
+        print(json.dumps(stats), file=sys.stderr)
+    if stats['failed'] and len(stats['failed']) == stats['queries']:
+        sys.exit(1)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Crawl the reference graph around one or more DOIs.
+Usage: python reference_graph.py <doi> [<doi>...] [--depth 2] [--format ndjson|csv] [--counts]
+                                 [--max-nodes N] [--workers 4] [--output FILE]
+
+Starting from the seed DOIs, each work's `reference` list is expanded
+breadth-first up to --depth hops. Every frontier level is resolved at once
+with crossref_bulk.fetch_works (batched, concurrent requests through the same
+snapshot index, cache and negative cache as doi_lookup.lookup_doi), and a
+visited set makes sure no DOI is fetched twice.
+
+Edges are written as they are found, one per line (NDJSON) or as CSV rows:
+depth, source, target. --counts adds the Crossref is-referenced-by count of
+both ends; this resolves the last level of targets as well. Crawl statistics
+are printed to stderr when the crawl finishes.
+"""
+import argparse
+import csv
+import json
+import sys
+
+from crossref_bulk import DEFAULT_CHUNK_SIZE, fetch_works
+from crossref_cache import canonicalize_doi, normalize_doi
+
+EDGE_FIELDS = ('depth', 'source', 'target')
+COUNT_FIELDS = ('source_cited_by', 'target_cited_by')
+
+
+def reference_dois(record):
+    """
+    Return the DOIs a work record cites, and how many references had no DOI.
+
+    Returns:
+        (list of normalized DOIs, count of references without a usable DOI)
+    """
+    dois = []
+    without_doi = 0
+    for reference in record.get('reference') or []:
+        doi = canonicalize_doi(reference.get('DOI') or '')
+        if doi is None:
+            without_doi += 1
+        else:
+            dois.append(normalize_doi(doi))
+    return dois, without_doi
+
+
+def crawl_references(seeds, depth=1, counts=False, max_nodes=None, workers=4,
+                     chunk_size=DEFAULT_CHUNK_SIZE, mailto=None, use_cache=True, stats=None):
+    """
+    Breadth-first expansion of the reference graph, yielding edges as they are found.
+
+    Args:
+        seeds: Iterable of DOIs to start from
+        depth: Number of reference hops to follow
+        counts: Add source_cited_by / target_cited_by (is-referenced-by-count) to each edge
+        max_nodes: Stop adding new DOIs to the frontier once this many are known (None for no limit)
+        workers: Concurrent requests per level
+        chunk_size: DOIs per batched Crossref request
+        mailto: Email for polite pool (defaults to CROSSREF_MAILTO)
+        use_cache: Check and populate the local metadata cache
+        stats: Optional dict that receives crawl counters
+
+    Yields:
+        Edge dictionaries: {'depth', 'source', 'target'} (plus counts if requested)
+    """
+    if stats is None:
+        stats = {}
+    stats.update({'seeds': 0, 'invalid_seeds': 0, 'levels': 0, 'nodes_fetched': 0, 'not_found': 0,
+                  'edges': 0, 'references_without_doi': 0, 'truncated': False})
+
+    frontier = []
+    visited = set()
+    for seed in seeds:
+        stats['seeds'] += 1
+        doi = canonicalize_doi(seed)
+        if doi is None:
+            stats['invalid_seeds'] += 1
+            continue
+        key = normalize_doi(doi)
+        if key not in visited:
+            visited.add(key)
+            frontier.append(key)
+
+    cited_by = {}
+    pending = []  # with counts, a level's edges wait until their targets are resolved
+    level = 0
+
+    while frontier:
+        records = fetch_works(frontier, chunk_size=chunk_size, workers=workers, mailto=mailto,
+                              use_cache=use_cache)
+        stats['nodes_fetched'] += len(frontier)
+        stats['not_found'] += sum(1 for record in records.values() if record is None)
+
+        if counts:
+            for doi, record in records.items():
+                if record is not None:
+                    cited_by[doi] = record.get('is-referenced-by-count')
+            for edge in pending:
+                edge['target_cited_by'] = cited_by.get(edge['target'])
+                yield edge
+            pending = []
+
+        if level >= depth:
+            break
+        level += 1
+        stats['levels'] = level
+
+        next_frontier = []
+        for source in frontier:
+            record = records.get(source)
+            if record is None:
+                continue
+            targets, without_doi = reference_dois(record)
+            stats['references_without_doi'] += without_doi
+            for target in targets:
+                edge = {'depth': level, 'source': source, 'target': target}
+                stats['edges'] += 1
+                if counts:
+                    edge['source_cited_by'] = cited_by.get(source)
+                    pending.append(edge)
+                else:
+                    yield edge
+                if target not in visited:
+                    if max_nodes is not None and len(visited) >= max_nodes:
+                        stats['truncated'] = True
+                        continue
+                    visited.add(target)
+                    next_frontier.append(target)
+
+        # Without counts the last level of targets never needs fetching
+        frontier = next_frontier if counts or level < depth else []
+
+    # Targets that were already visited (cycles) are resolved in cited_by
+    for edge in pending:
+        edge['target_cited_by'] = cited_by.get(edge['target'])
+        yield edge
+
+
+def write_edges(edges, out=None, fmt='ndjson', counts=False):
+    """Write edges as NDJSON or CSV. Returns the number written."""
+    out = out or sys.stdout
+    writer = None
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, fieldnames=EDGE_FIELDS + (COUNT_FIELDS if counts else ()),
+                                lineterminator='\n')
+        writer.writeheader()
+
+    count = 0
+    for edge in edges:
+        if writer:
+            writer.writerow(edge)
+        else:
+            out.write(json.dumps(edge, ensure_ascii=False))
+            out.write('\n')
+        count += 1
+    out.flush()
+    return count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Crawl the Crossref reference graph around DOIs')
+    parser.add_argument('dois', nargs='+', help='Seed DOIs')
+    parser.add_argument('--depth', type=int, default=1, help='Reference hops to follow')
+    parser.add_argument('--format', dest='fmt', choices=['ndjson', 'csv'], default='ndjson', help='Edge output format')
+    parser.add_argument('--counts', action='store_true', help='Include is-referenced-by counts for both ends')
+    parser.add_argument('--max-nodes', type=int, help='Stop expanding once this many DOIs are known')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent requests per level')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='DOIs per Crossref request')
+    parser.add_argument('--output', help='Write edges to this file instead of stdout')
+
+    args = parser.parse_args()
+    if args.depth < 1:
+        parser.error('--depth must be at least 1')
+
+    stats = {}
+    edges = crawl_references(args.dois, depth=args.depth, counts=args.counts, max_nodes=args.max_nodes,
+                             workers=args.workers, chunk_size=args.chunk_size, stats=stats)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            write_edges(edges, f, args.fmt, args.counts)
+    else:
+        write_edges(edges, sys.stdout, args.fmt, args.counts)
+    print(json.dumps(stats, indent=2), file=sys.stderr)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Flag retracted and corrected works in a DOI list or BibTeX file.
+Usage: python retraction_scan.py <dois.txt|file.bib|-> [--output report.json|report.csv] [--notices]
+                                 [--chunk-size 50] [--workers 4]
+
+Crossref records carry their editorial updates: `updated-by` on a work lists
+the retractions, corrections and expressions of concern issued for it, and
+`update-to` on a notice points at the work it updates. The scanner fetches
+the records in batched filter=doi:... queries (crossref_bulk.query_chunks,
+one request per --chunk-size DOIs) and reports every work that has been
+updated, or that is itself an update notice. DOIs containing a comma cannot
+be packed into a filter value and are looked up one request each.
+
+--notices also searches for notices through filter=updates:<doi>, which
+catches updates that have not been copied into the cited work's record yet.
+It doubles the number of requests.
+
+The report lists affected entries only (with their BibTeX keys when the input
+is a .bib file); a summary is printed to stdout.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from bib_refresh import entry_doi, entry_key, split_bib
+from citation_lookup import read_doi_list
+from crossref_bulk import DEFAULT_CHUNK_SIZE, query_chunks, request_work
+from crossref_cache import canonicalize_doi, normalize_doi
+from crossref_client import get_message
+
+RETRACTION_TYPES = frozenset({'retraction', 'partial_retraction', 'withdrawal', 'removal'})
+CONCERN_TYPES = frozenset({'expression_of_concern'})
+REPORT_FIELDS = ('doi', 'key', 'status', 'title', 'update_types', 'notices')
+
+
+def read_scan_input(source):
+    """
+    Read (doi, citation key) pairs from a .bib file, or a DOI list (one per line, '-' for stdin).
+
+    Keys are None for DOI lists. Duplicate DOIs keep their first entry.
+    """
+    if source.endswith('.bib'):
+        with open(source, 'r', encoding='utf-8') as f:
+            chunks = split_bib(f.read())
+        entries = [(entry_doi(chunk), entry_key(chunk)) for chunk in chunks]
+    else:
+        entries = [(canonicalize_doi(doi), None) for doi in read_doi_list(source)]
+
+    seen = set()
+    result = []
+    for doi, key in entries:
+        if doi and normalize_doi(doi) not in seen:
+            seen.add(normalize_doi(doi))
+            result.append((doi, key))
+    return result
+
+
+def _date(value):
+    parts = (value or {}).get('date-parts') or [[]]
+    return '-'.join(str(part) for part in parts[0] if part is not None) or None
+
+
+def _update(entry, doi, relation):
+    return {
+        'type': entry.get('type'),
+        'label': entry.get('label'),
+        'doi': doi,
+        'date': _date(entry.get('updated')),
+        'source': entry.get('source'),
+        'relation': relation
+    }
+
+
+def classify(types):
+    """Return the most serious status implied by a set of update types."""
+    if types & RETRACTION_TYPES:
+        return 'retracted'
+    if types & CONCERN_TYPES:
+        return 'expression-of-concern'
+    return 'corrected'
+
+
+def find_notices(dois, chunk_size=DEFAULT_CHUNK_SIZE, workers=4, mailto=None):
+    """
+    Find update notices that point at the given DOIs with batched filter=updates: queries.
+
+    Returns:
+        (dictionary of normalized DOI -> list of updates, number of requests sent)
+    """
+    chunk_size = max(1, chunk_size)
+    chunks = [dois[i:i + chunk_size] for i in range(0, len(dois), chunk_size)]
+
+    def query(chunk):
+        params = {'filter': ','.join(f'updates:{doi}' for doi in chunk), 'rows': 1000}
+        message = get_message("/works", params=params, mailto=mailto, timeout=30)
+        return (message or {}).get('items', [])
+
+    found = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for notices in executor.map(query, chunks):
+            for notice in notices:
+                for entry in notice.get('update-to') or []:
+                    target = normalize_doi(entry.get('DOI') or '')
+                    found.setdefault(target, []).append(_update(entry, notice.get('DOI'), 'update-to'))
+    return found, len(chunks)
+
+
+def scan_updates(entries, chunk_size=DEFAULT_CHUNK_SIZE, workers=4, mailto=None, notices=False, stats=None):
+    """
+    Check works for retractions, corrections and other editorial updates.
+
+    Args:
+        entries: List of (doi, citation key or None) pairs
+        chunk_size: DOIs per Crossref request
+        workers: Concurrent requests
+        mailto: Email for polite pool (defaults to CROSSREF_MAILTO)
+        notices: Also search for notices with filter=updates:
+        stats: Optional dict that receives request counters
+
+    Returns:
+        List of findings (dicts with REPORT_FIELDS) for affected works, in input order
+
+    Raises:
+        requests.exceptions.RequestException if a request fails
+    """
+    if stats is None:
+        stats = {}
+    # A comma inside a DOI would split the filter value (see crossref_bulk), so those are fetched singly
+    normalized_dois = [normalize_doi(doi) for doi, _ in entries]
+    dois = [doi for doi in normalized_dois if ',' not in doi]
+    singles = [doi for doi in normalized_dois if ',' in doi]
+    stats.update({'checked': len(normalized_dois), 'single_lookups': len(singles), 'not_found': 0})
+
+    records, stats['requests'] = query_chunks(dois, chunk_size, workers, mailto=mailto)
+    if singles:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for doi, record in zip(singles, executor.map(lambda doi: request_work(doi, mailto), singles)):
+                if record is not None:
+                    records[doi] = record
+        stats['requests'] += len(singles)
+    extra = {}
+    if notices:
+        # filter=updates: has the same comma restriction; single lookups rely on updated-by alone
+        extra, notice_requests = find_notices(dois, chunk_size, workers, mailto)
+        stats['requests'] += notice_requests
+
+    findings = []
+    for doi, key in entries:
+        normalized = normalize_doi(doi)
+        record = records.get(normalized)
+        if record is None:
+            stats['not_found'] += 1
+            record = {}
+
+        updates = [_update(entry, entry.get('DOI'), 'updated-by') for entry in record.get('updated-by') or []]
+        known = {update['doi'] for update in updates}
+        updates += [update for update in extra.get(normalized, []) if update['doi'] not in known]
+        update_to = record.get('update-to') or []
+        if not updates and not update_to:
+            continue
+
+        types = {update['type'] for update in updates if update['type']}
+        findings.append({
+            'doi': doi,
+            'key': key,
+            'status': classify(types) if updates else 'update-notice',
+            'title': (record.get('title') or [None])[0],
+            'update_types': sorted(types) if updates else sorted({u.get('type') for u in update_to if u.get('type')}),
+            'notices': updates or [_update(entry, entry.get('DOI'), 'update-to') for entry in update_to]
+        })
+    return findings
+
+
+def write_report(findings, path):
+    """Write findings as CSV (for .csv paths) or JSON."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if path.endswith('.csv'):
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, lineterminator='\n')
+            writer.writeheader()
+            for finding in findings:
+                row = dict(finding)
+                row['update_types'] = ';'.join(finding['update_types'])
+                row['notices'] = ';'.join(notice['doi'] or '' for notice in finding['notices'])
+                writer.writerow(row)
+        else:
+            json.dump(findings, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Flag retracted and corrected works in a DOI list or .bib file')
+    parser.add_argument('source', help="DOI list, .bib file, or '-' for DOIs on stdin")
+    parser.add_argument('--output', default='retraction_report.json', help='Report file (.json or .csv)')
+    parser.add_argument('--notices', action='store_true', help='Also search for notices with filter=updates:')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='DOIs per Crossref request')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent requests')
+
+    args = parser.parse_args()
+    start = time.perf_counter()
+    stats = {}
+    try:
+        entries = read_scan_input(args.source)
+        findings = scan_updates(entries, chunk_size=args.chunk_size, workers=args.workers,
+                                notices=args.notices, stats=stats)
+        write_report(findings, args.output)
+    except (OSError, requests.exceptions.RequestException) as e:
+        print(json.dumps({'error': str(e)}, indent=2))
+        sys.exit(1)
+
+    statuses = {}
+    for finding in findings:
+        statuses[finding['status']] = statuses.get(finding['status'], 0) + 1
+    stats.update({'affected': len(findings), 'by_status': statuses, 'report': args.output,
+                  'elapsed_seconds': round(time.perf_counter() - start, 3)})
+    print(json.dumps(stats, indent=2))
@@ -2,89 +2,189 @@
 """
 Search for publications by author name using the Crossref API.
 Usage: python search_by_author.py "Author Name" [--rows 10]
+       python search_by_author.py "Author Name" --stream [--max-results N] [--cursor-file FILE]
+
+--stream walks Crossref's deep-paging cursor and prints one JSON publication
+per line (NDJSON) in constant memory; --cursor-file makes the harvest resumable.
+
+Only the fields in AUTHOR_SEARCH_FIELDS and CITATION_FIELDS are requested
+from Crossref (select=). --select adds more fields to each result;
+--full-records disables projection.
+
+Returned records are kept in the local cache so citation_lookup.py can cite
+them without another request (--no-cache turns this off).
 """
 import requests
 import json
 import sys
 import argparse
 
-def search_by_author(author_name, rows=10, mailto="user@example.com"):
+from citation_formats import CITATION_FIELDS
+from crossref_cache import remember_search_results
+from crossref_client import api_get, build_select, iter_cursor, load_cursor, save_cursor
+from search_works import remember_items, split_fields, stream_ndjson
+
+# Crossref fields read by summarize_publication(); sent as select= so responses carry nothing else
+AUTHOR_SEARCH_FIELDS = ('DOI', 'title', 'type', 'author', 'published', 'published-print',
+                        'container-title', 'publisher', 'URL')
+
+def summarize_publication(item, extra_fields=()):
+    """
+    Reduce a Crossref work record to the fields author search reports.
+    
+    Any extra_fields are copied through under their Crossref names.
+    """
+    pub = {
+        'doi': item.get('DOI'),
+        'title': item.get('title', ['Unknown'])[0] if item.get('title') else 'Unknown',
+        'type': item.get('type'),
+        'authors': [],
+        'published_year': None,
+        'journal': item.get('container-title', ['Unknown'])[0] if item.get('container-title') else None,
+        'publisher': item.get('publisher'),
+        'url': item.get('URL')
+    }
+    
+    # Get all authors
+    if 'author' in item:
+        for author in item['author']:
+            name = f"{author.get('given', '')} {author.get('family', '')}".strip()
+            if name:
+                pub['authors'].append(name)
+    
+    # Get publication year
+    if 'published' in item or 'published-print' in item:
+        pub_date = item.get('published') or item.get('published-print')
+        if pub_date and 'date-parts' in pub_date:
+            pub['published_year'] = pub_date['date-parts'][0][0]
+    
+    for field in extra_fields:
+        pub[field] = item.get(field)
+    
+    return pub
+
+def parse_author_results(author_name, message, extra_fields=()):
+    """Build the author search result dictionary from a Crossref /works message."""
+    publications = [summarize_publication(item, extra_fields) for item in message['items']]
+    return {
+        'author_searched': author_name,
+        'total_results': message['total-results'],
+        'returned_results': len(publications),
+        'publications': publications
+    }
+
+def search_by_author(author_name, rows=10, mailto=None, extra_fields=None, project=True, use_cache=True):
     """
     Search for publications by author.
     
     Args:
         author_name: Author name to search for
         rows: Number of results to return
-        mailto: Email for polite pool
+        mailto: Email for polite pool (defaults to CROSSREF_MAILTO)
+        extra_fields: Additional Crossref fields to request and include in each publication
+        project: Request only the needed fields via select= (False downloads full records)
+        use_cache: Keep the returned records in the local cache for citation lookups
     
     Returns:
         List of publications by the author
     """
-    url = "https://api.crossref.org/works"
-    
+    extra_fields = split_fields(extra_fields)
     params = {
         'query.author': author_name,
         'rows': rows
     }
-    
-    headers = {
-        'User-Agent': f'CrossrefLookupSkill/1.0 (mailto:{mailto})'
-    }
+    if project:
+        params['select'] = build_select(AUTHOR_SEARCH_FIELDS + CITATION_FIELDS, extra_fields)
     
     try:
-        response = requests.get(url, params=params, headers=headers, timeout=15)
-        response.raise_for_status()
+        response = api_get("/works", params=params, mailto=mailto)
         data = response.json()
         
         if data['status'] == 'ok':
-            items = data['message']['items']
-            total_results = data['message']['total-results']
-            
-            publications = []
-            for item in items:
-                pub = {
-                    'doi': item.get('DOI'),
-                    'title': item.get('title', ['Unknown'])[0] if item.get('title') else 'Unknown',
-                    'type': item.get('type'),
-                    'authors': [],
-                    'published_year': None,
-                    'journal': item.get('container-title', ['Unknown'])[0] if item.get('container-title') else None,
-                    'publisher': item.get('publisher'),
-                    'url': item.get('URL')
-                }
-                
-                # Get all authors
-                if 'author' in item:
-                    for author in item['author']:
-                        name = f"{author.get('given', '')} {author.get('family', '')}".strip()
-                        if name:
-                            pub['authors'].append(name)
-                
-                # Get publication year
-                if 'published' in item or 'published-print' in item:
-                    pub_date = item.get('published') or item.get('published-print')
-                    if pub_date and 'date-parts' in pub_date:
-                        pub['published_year'] = pub_date['date-parts'][0][0]
-                
-                publications.append(pub)
-            
-            return {
-                'author_searched': author_name,
-                'total_results': total_results,
-                'returned_results': len(publications),
-                'publications': publications
-            }
+            if use_cache:
+                remember_search_results(data['message']['items'], complete=not project)
+            return parse_author_results(author_name, data['message'], extra_fields)
         else:
             return {'error': 'Search failed'}
     
     except requests.exceptions.RequestException as e:
         return {'error': str(e)}
 
+def iter_publications(author_name, page_size=1000, max_results=None, cursor='*',
+                      cursor_file=None, mailto=None, extra_fields=None, project=True, use_cache=True):
+    """
+    Lazily yield every publication matching an author, following Crossref's next-cursor.
+    
+    Args:
+        author_name: Author name to search for
+        page_size: Rows fetched per request (max 1000)
+        max_results: Stop after this many publications (None for all)
+        cursor: Cursor to start from ('*' for the beginning)
+        cursor_file: File the cursor is saved to after each page; if it
+            already holds a cursor, iteration resumes from it
+        mailto: Email for polite pool (defaults to CROSSREF_MAILTO)
+        extra_fields: Additional Crossref fields to request and include in each publication
+        project: Request only the needed fields via select= (False downloads full records)
+        use_cache: Keep the streamed records in the local cache for citation lookups
+    
+    Yields:
+        Publication dictionaries in the same shape as search_by_author() results
+    """
+    if max_results is not None and max_results <= 0:
+        return
+    
+    extra_fields = split_fields(extra_fields)
+    params = {'query.author': author_name}
+    if project:
+        params['select'] = build_select(AUTHOR_SEARCH_FIELDS + CITATION_FIELDS, extra_fields)
+    
+    on_cursor = None
+    if cursor_file:
+        cursor = load_cursor(cursor_file)
+        on_cursor = lambda next_cursor: save_cursor(cursor_file, next_cursor)
+    
+    if max_results is not None:
+        page_size = min(page_size, max_results)
+    
+    items = iter_cursor("/works", params, page_size=page_size,
+                        cursor=cursor, on_cursor=on_cursor, mailto=mailto)
+    if use_cache:
+        items = remember_items(items, complete=not project)
+    
+    try:
+        for count, item in enumerate(items, 1):
+            yield summarize_publication(item, extra_fields)
+            if max_results is not None and count >= max_results:
+                return
+    finally:
+        items.close()
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Search for publications by author')
     parser.add_argument('author', help='Author name')
     parser.add_argument('--rows', type=int, default=10, help='Number of results')
+    parser.add_argument('--stream', action='store_true', help='Stream all results as NDJSON using deep paging')
+    parser.add_argument('--max-results', type=int, help='Stop streaming after N publications')
+    parser.add_argument('--page-size', type=int, default=1000, help='Rows per request when streaming')
+    parser.add_argument('--cursor-file', help='Save/resume the paging cursor in this file')
+    parser.add_argument('--select', dest='extra_fields', help='Extra Crossref fields to include (comma-separated)')
+    parser.add_argument('--full-records', action='store_true', help='Download full records instead of selected fields')
+    parser.add_argument('--no-cache', action='store_true', help='Do not keep the returned records in the local cache')
     
     args = parser.parse_args()
-    results = search_by_author(args.author, args.rows)
-    print(json.dumps(results, indent=2))
+    project = not args.full_records
+    use_cache = not args.no_cache
+    
+    if args.stream:
+        try:
+            stream_ndjson(iter_publications(args.author, page_size=args.page_size,
+                                            max_results=args.max_results, cursor_file=args.cursor_file,
+                                            extra_fields=args.extra_fields, project=project,
+                                            use_cache=use_cache))
+        except requests.exceptions.RequestException as e:
+            print(json.dumps({'error': str(e)}), file=sys.stderr)
+            sys.exit(1)
+    else:
+        results = search_by_author(args.author, args.rows,
+                                   extra_fields=args.extra_fields, project=project, use_cache=use_cache)
+        print(json.dumps(results, indent=2))
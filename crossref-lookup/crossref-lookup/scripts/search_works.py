@@ -2,13 +2,122 @@
 """
 Search for academic works using the Crossref API.
 Usage: python search_works.py "query string" [--rows 10] [--filter "filter_string"]
+       python search_works.py "query string" --stream [--max-results N] [--cursor-file FILE]
+       python search_works.py "query string" --facets [type-name,published,...] [--json]
+
+--stream walks Crossref's deep-paging cursor and prints one JSON work per
+line (NDJSON) in constant memory. With --cursor-file the cursor is saved
+after every page, and a re-run with the same file resumes from there.
+
+Only the fields in SEARCH_FIELDS and CITATION_FIELDS are requested from
+Crossref (select=). --select adds more fields to each result; --full-records
+disables projection.
+
+--facets sends rows=0 with facet=<name>:* and prints only the aggregated
+counts (e.g. works per type and per year) as a compact table, or as JSON
+with --json. No items are downloaded.
+
+Every record a search returns is kept in the local cache (see
+crossref_cache.py), so citing a search hit with citation_lookup.py afterwards
+needs no further request. --no-cache turns this off.
 """
 import requests
 import json
 import sys
 import argparse
 
-def search_works(query, rows=10, filter_str=None, mailto="user@example.com"):
+from citation_formats import CITATION_FIELDS
+from crossref_cache import remember_search_results
+from crossref_client import api_get, build_select, iter_cursor, load_cursor, save_cursor
+
+# Crossref fields read by summarize_work(); sent as select= so responses carry nothing else
+SEARCH_FIELDS = ('DOI', 'title', 'type', 'author', 'published', 'published-print',
+                 'container-title', 'publisher', 'URL', 'score')
+
+# Facets counted by --facets when no names are given; see the Crossref API docs for the full list
+DEFAULT_FACETS = ('type-name', 'published')
+
+# Records are stored in batches of this many as a stream goes past
+REMEMBER_BATCH_SIZE = 500
+
+def summarize_work(item, extra_fields=()):
+    """
+    Reduce a Crossref work record to the fields search results report.
+    
+    Any extra_fields are copied through under their Crossref names.
+    """
+    work = {
+        'doi': item.get('DOI'),
+        'title': item.get('title', ['Unknown'])[0] if item.get('title') else 'Unknown',
+        'type': item.get('type'),
+        'authors': [],
+        'published_year': None,
+        'journal': item.get('container-title', ['Unknown'])[0] if item.get('container-title') else None,
+        'publisher': item.get('publisher'),
+        'url': item.get('URL'),
+        'score': item.get('score')
+    }
+    
+    # Get authors
+    if 'author' in item:
+        for author in item['author'][:5]:  # Limit to first 5 authors
+            name = f"{author.get('given', '')} {author.get('family', '')}".strip()
+            if name:
+                work['authors'].append(name)
+    
+    # Get publication year
+    if 'published' in item or 'published-print' in item:
+        pub_date = item.get('published') or item.get('published-print')
+        if pub_date and 'date-parts' in pub_date:
+            work['published_year'] = pub_date['date-parts'][0][0]
+    
+    for field in extra_fields:
+        work[field] = item.get(field)
+    
+    return work
+
+def parse_search_results(message, extra_fields=()):
+    """Build the search result dictionary from a Crossref /works message."""
+    works = [summarize_work(item, extra_fields) for item in message['items']]
+    return {
+        'total_results': message['total-results'],
+        'returned_results': len(works),
+        'works': works
+    }
+
+def remember_items(items, complete=False):
+    """
+    Pass work records through unchanged, storing them in the local cache in batches.
+    
+    Args:
+        items: Iterable of raw Crossref work records
+        complete: True if the records are unprojected (full) records
+    
+    Yields:
+        The same records
+    """
+    batch = []
+    try:
+        for item in items:
+            batch.append(item)
+            if len(batch) >= REMEMBER_BATCH_SIZE:
+                remember_search_results(batch, complete)
+                batch = []
+            yield item
+    finally:
+        # Also runs when the consumer stops early (max_results, closed pipe)
+        remember_search_results(batch, complete)
+
+def split_fields(fields):
+    """Turn a comma-separated field string (or list) into a tuple of field names."""
+    if not fields:
+        return ()
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    return tuple(field.strip() for field in fields if field.strip())
+
+def search_works(query, rows=10, filter_str=None, mailto=None, extra_fields=None, project=True,
+                 use_cache=True):
     """
     Search Crossref for academic works.
     
@@ -16,13 +125,15 @@ def search_works(query, rows=10, filter_str=None, mailto="user@example.com"):
         query: Search query string
         rows: Number of results to return (max 1000)
         filter_str: Crossref filter string (e.g., "from-pub-date:2020,type:journal-article")
-        mailto: Email for polite pool
+        mailto: Email for polite pool (defaults to CROSSREF_MAILTO)
+        extra_fields: Additional Crossref fields to request and include in each work
+        project: Request only the needed fields via select= (False downloads full records)
+        use_cache: Keep the returned records in the local cache for citation lookups
     
     Returns:
         List of matching works
     """
-    url = "https://api.crossref.org/works"
-    
+    extra_fields = split_fields(extra_fields)
     params = {
         'query': query,
         'rows': rows
@@ -30,66 +141,180 @@ def search_works(query, rows=10, filter_str=None, mailto="user@example.com"):
     
     if filter_str:
         params['filter'] = filter_str
-    
-    headers = {
-        'User-Agent': f'CrossrefLookupSkill/1.0 (mailto:{mailto})'
-    }
+    if project:
+        params['select'] = build_select(SEARCH_FIELDS + CITATION_FIELDS, extra_fields)
     
     try:
-        response = requests.get(url, params=params, headers=headers, timeout=15)
-        response.raise_for_status()
+        response = api_get("/works", params=params, mailto=mailto)
         data = response.json()
         
         if data['status'] == 'ok':
-            items = data['message']['items']
-            total_results = data['message']['total-results']
-            
-            works = []
-            for item in items:
-                work = {
-                    'doi': item.get('DOI'),
-                    'title': item.get('title', ['Unknown'])[0] if item.get('title') else 'Unknown',
-                    'type': item.get('type'),
-                    'authors': [],
-                    'published_year': None,
-                    'journal': item.get('container-title', ['Unknown'])[0] if item.get('container-title') else None,
-                    'publisher': item.get('publisher'),
-                    'url': item.get('URL'),
-                    'score': item.get('score')
-                }
-                
-                # Get authors
-                if 'author' in item:
-                    for author in item['author'][:5]:  # Limit to first 5 authors
-                        name = f"{author.get('given', '')} {author.get('family', '')}".strip()
-                        if name:
-                            work['authors'].append(name)
-                
-                # Get publication year
-                if 'published' in item or 'published-print' in item:
-                    pub_date = item.get('published') or item.get('published-print')
-                    if pub_date and 'date-parts' in pub_date:
-                        work['published_year'] = pub_date['date-parts'][0][0]
-                
-                works.append(work)
-            
-            return {
-                'total_results': total_results,
-                'returned_results': len(works),
-                'works': works
-            }
+            if use_cache:
+                remember_search_results(data['message']['items'], complete=not project)
+            return parse_search_results(data['message'], extra_fields)
         else:
             return {'error': 'Search failed'}
     
     except requests.exceptions.RequestException as e:
         return {'error': str(e)}
 
+def iter_works(query, filter_str=None, page_size=1000, max_results=None, cursor='*',
+               cursor_file=None, mailto=None, extra_fields=None, project=True, use_cache=True):
+    """
+    Lazily yield every work matching a query, following Crossref's next-cursor.
+    
+    Args:
+        query: Search query string
+        filter_str: Crossref filter string
+        page_size: Rows fetched per request (max 1000)
+        max_results: Stop after this many works (None for all)
+        cursor: Cursor to start from ('*' for the beginning)
+        cursor_file: File the cursor is saved to after each page; if it
+            already holds a cursor, iteration resumes from it
+        mailto: Email for polite pool (defaults to CROSSREF_MAILTO)
+        extra_fields: Additional Crossref fields to request and include in each work
+        project: Request only the needed fields via select= (False downloads full records)
+        use_cache: Keep the streamed records in the local cache for citation lookups
+    
+    Yields:
+        Work dictionaries in the same shape as search_works() results
+    """
+    if max_results is not None and max_results <= 0:
+        return
+    
+    extra_fields = split_fields(extra_fields)
+    params = {'query': query}
+    if filter_str:
+        params['filter'] = filter_str
+    if project:
+        params['select'] = build_select(SEARCH_FIELDS + CITATION_FIELDS, extra_fields)
+    
+    on_cursor = None
+    if cursor_file:
+        cursor = load_cursor(cursor_file)
+        on_cursor = lambda next_cursor: save_cursor(cursor_file, next_cursor)
+    
+    if max_results is not None:
+        page_size = min(page_size, max_results)
+    
+    items = iter_cursor("/works", params, page_size=page_size, cursor=cursor,
+                        on_cursor=on_cursor, mailto=mailto)
+    if use_cache:
+        items = remember_items(items, complete=not project)
+    
+    try:
+        for count, item in enumerate(items, 1):
+            yield summarize_work(item, extra_fields)
+            if max_results is not None and count >= max_results:
+                return
+    finally:
+        items.close()
+
+def facet_works(query, facets=DEFAULT_FACETS, filter_str=None, mailto=None, limit='*'):
+    """
+    Count matching works per facet value without downloading any items.
+    
+    Args:
+        query: Search query string
+        facets: Crossref facet names (e.g. "type-name", "published", "publisher-name")
+        filter_str: Crossref filter string
+        mailto: Email for polite pool (defaults to CROSSREF_MAILTO)
+        limit: Maximum values returned per facet ('*' for Crossref's maximum)
+    
+    Returns:
+        Dictionary with total_results and, per facet, value_count and
+        values as [value, count] pairs sorted by count (published by year)
+    """
+    facets = split_fields(facets) or DEFAULT_FACETS
+    params = {
+        'query': query,
+        'rows': 0,
+        'facet': ','.join(f'{name}:{limit}' for name in facets)
+    }
+    if filter_str:
+        params['filter'] = filter_str
+    
+    try:
+        response = api_get("/works", params=params, mailto=mailto)
+        data = response.json()
+    except requests.exceptions.RequestException as e:
+        return {'error': str(e)}
+    
+    if data.get('status') != 'ok':
+        return {'error': 'Search failed'}
+    
+    result = {'total_results': data['message']['total-results'], 'facets': {}}
+    for name, facet in data['message'].get('facets', {}).items():
+        values = facet.get('values', {})
+        if name == 'published':
+            ordered = sorted(values.items())
+        else:
+            ordered = sorted(values.items(), key=lambda pair: (-pair[1], pair[0]))
+        result['facets'][name] = {
+            'value_count': facet.get('value-count', len(values)),
+            'values': [[value, count] for value, count in ordered]
+        }
+    return result
+
+def format_facet_table(result):
+    """Render facet_works() output as a plain-text table, one block per facet."""
+    lines = [f"total_results: {result['total_results']}"]
+    for name, facet in result['facets'].items():
+        width = max([len(str(value)) for value, _ in facet['values']] + [len(name)])
+        lines.append('')
+        lines.append(f"{name:<{width}}  count  ({facet['value_count']} values)")
+        lines.append(f"{'-' * width}  -----")
+        for value, count in facet['values']:
+            lines.append(f"{value:<{width}}  {count}")
+    return '\n'.join(lines)
+
+def stream_ndjson(works, out=None):
+    """Write works as newline-delimited JSON, one line per work. Returns the count."""
+    out = out or sys.stdout
+    count = 0
+    for work in works:
+        out.write(json.dumps(work, ensure_ascii=False))
+        out.write('\n')
+        count += 1
+    out.flush()
+    return count
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Search Crossref for academic works')
     parser.add_argument('query', help='Search query')
     parser.add_argument('--rows', type=int, default=10, help='Number of results')
     parser.add_argument('--filter', dest='filter_str', help='Crossref filter string')
+    parser.add_argument('--stream', action='store_true', help='Stream all results as NDJSON using deep paging')
+    parser.add_argument('--max-results', type=int, help='Stop streaming after N works')
+    parser.add_argument('--page-size', type=int, default=1000, help='Rows per request when streaming')
+    parser.add_argument('--cursor-file', help='Save/resume the paging cursor in this file')
+    parser.add_argument('--select', dest='extra_fields', help='Extra Crossref fields to include (comma-separated)')
+    parser.add_argument('--full-records', action='store_true', help='Download full records instead of selected fields')
+    parser.add_argument('--no-cache', action='store_true', help='Do not keep the returned records in the local cache')
+    parser.add_argument('--facets', nargs='?', const=','.join(DEFAULT_FACETS),
+                        help='Only count results per facet (comma-separated facet names)')
+    parser.add_argument('--json', action='store_true', help='Print facet counts as JSON instead of a table')
     
     args = parser.parse_args()
-    results = search_works(args.query, args.rows, args.filter_str)
-    print(json.dumps(results, indent=2))
+    project = not args.full_records
+    use_cache = not args.no_cache
+    
+    if args.facets:
+        result = facet_works(args.query, args.facets, args.filter_str)
+        if 'error' in result or args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            print(format_facet_table(result))
+    elif args.stream:
+        try:
+            stream_ndjson(iter_works(args.query, args.filter_str, page_size=args.page_size,
+                                     max_results=args.max_results, cursor_file=args.cursor_file,
+                                     extra_fields=args.extra_fields, project=project,
+                                     use_cache=use_cache))
+        except requests.exceptions.RequestException as e:
+            print(json.dumps({'error': str(e)}), file=sys.stderr)
+            sys.exit(1)
+    else:
+        results = search_works(args.query, args.rows, args.filter_str,
+                                extra_fields=args.extra_fields, project=project, use_cache=use_cache)
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,104 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'crossref-lookup', 'scripts'))
+
+import bib_refresh  # noqa: E402
+
+
+def work(doi, title, year, indexed=1):
+    return {'DOI': doi, 'type': 'journal-article', 'title': [title], 'container-title': ['J'],
+            'author': [{'given': 'Ann', 'family': 'Smith'}],
+            'published': {'date-parts': [[year]]}, 'indexed': {'timestamp': indexed}}
+
+
+class RefreshTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'refs.bib')
+        patcher = mock.patch.object(bib_refresh, 'get_cache', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def refresh(self, records, **kwargs):
+        def query_chunks(dois, *args, **kw):
+            return {doi: records[doi] for doi in dois if doi in records}, 1
+        with mock.patch.object(bib_refresh, 'query_chunks', side_effect=query_chunks):
+            return bib_refresh.refresh_bibliography(self.path, **kwargs)
+
+    def read(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def test_entry_end_skips_escaped_braces(self):
+        chunk = '@article{k,\n  title = {a\\}b\\{c},\n  year = {2020}\n}\n% comment\n'
+        self.assertEqual(chunk[:bib_refresh.entry_end(chunk)],
+                         '@article{k,\n  title = {a\\}b\\{c},\n  year = {2020}\n}')
+
+    def test_refresh_entry_with_escaped_braces(self):
+        for title in ('a}b', 'a{b', 'a}b{c'):
+            with self.subTest(title=title):
+                self.check_refresh(title)
+
+    def check_refresh(self, title):
+        for path in (self.path, self.path + bib_refresh.STATE_SUFFIX):
+            if os.path.exists(path):
+                os.remove(path)
+        old = bib_refresh.render_entry(work('10.1000/x', title, 2019), '10.1000/x', 'smith')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('% header\n' + old + '\n\n% trailing comment\n')
+        self.assertIn('\\' + title[1], old)
+
+        new_record = work('10.1000/x', title, 2020, indexed=2)
+        summary = self.refresh({'10.1000/x': new_record})
+
+        new = bib_refresh.render_entry(new_record, '10.1000/x', 'smith')
+        self.assertEqual(self.read(), '% header\n' + new + '\n\n% trailing comment\n')
+        self.assertEqual(summary['updated_entries'], ['smith'])
+
+        # Nothing changed since: the file stays as it is
+        summary = self.refresh({'10.1000/x': new_record})
+        self.assertEqual(summary['changed_records'], 0)
+        self.assertEqual(self.read(), '% header\n' + new + '\n\n% trailing comment\n')
+
+    def test_comma_dois_and_missing_dois(self):
+        entries = [bib_refresh.render_entry(work(doi, title, 2019), doi, key) for doi, title, key in
+                   (('10.1000/a,b', 'Comma', 'comma'), ('10.1000/gone', 'Gone', 'gone'))]
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('\n\n'.join(entries) + '\n')
+
+        calls = []
+
+        def query_chunks(dois, *args, **kwargs):
+            calls.append((list(dois), kwargs.get('extra_filter')))
+            return {}, 1 if dois else 0
+
+        comma = work('10.1000/a,b', 'Comma', 2020, indexed=2)
+        with mock.patch.object(bib_refresh, 'query_chunks', side_effect=query_chunks), \
+                mock.patch.object(bib_refresh, 'request_work', return_value=comma) as request:
+            summary = bib_refresh.refresh_bibliography(self.path)
+            self.assertEqual(calls, [(['10.1000/gone'], None)])
+            request.assert_called_once_with('10.1000/a,b', None)
+            self.assertEqual(summary['updated_entries'], ['comma'])
+            self.assertEqual(summary['not_found'], ['10.1000/gone'])
+
+            with open(self.path + bib_refresh.STATE_SUFFIX, 'r', encoding='utf-8') as f:
+                self.assertEqual(json.load(f)['not_found'], ['10.1000/gone'])
+
+            # The missing DOI is now only looked for among re-indexed records
+            del calls[:]
+            summary = bib_refresh.refresh_bibliography(self.path)
+            self.assertEqual(calls, [(['10.1000/gone'], 'from-index-date:' + summary['since']), ([], None)])
+            self.assertEqual(summary['changed_records'], 0)
+            self.assertEqual(summary['not_found'], ['10.1000/gone'])
+
+
+if __name__ == '__main__':
+    unittest.main()
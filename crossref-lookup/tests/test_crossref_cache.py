@@ -0,0 +1,36 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'crossref-lookup', 'scripts'))
+
+from crossref_cache import canonicalize_doi, normalize_doi  # noqa: E402
+
+
+class CanonicalizeDoiTest(unittest.TestCase):
+
+    def test_common_spellings(self):
+        for spelling in ('10.1000/ABC.182', ' 10.1000/ABC.182 ', 'doi:10.1000/ABC.182', 'DOI: 10.1000/ABC.182',
+                         'info:doi/10.1000/ABC.182', 'https://doi.org/10.1000/ABC.182',
+                         'http://dx.doi.org/10.1000/ABC.182', '10.1000%2FABC.182',
+                         'https://doi.org/10.1000%2FABC.182'):
+            with self.subTest(spelling=spelling):
+                self.assertEqual(canonicalize_doi(spelling), '10.1000/ABC.182')
+
+    def test_case_is_kept_but_normalized_for_keys(self):
+        self.assertEqual(canonicalize_doi('10.1000/AbC'), '10.1000/AbC')
+        self.assertEqual(normalize_doi('https://doi.org/10.1000/AbC'), '10.1000/abc')
+
+    def test_rejects_malformed(self):
+        for value in (None, '', '   ', 'not a doi', '10.1/x', '10.1000', '10.1000/', '11.1000/x',
+                      '10.1000/has space'):
+            with self.subTest(value=value):
+                self.assertIsNone(canonicalize_doi(value))
+
+    def test_keeps_commas_and_subdivided_prefixes(self):
+        self.assertEqual(canonicalize_doi('10.1000/a,b'), '10.1000/a,b')
+        self.assertEqual(canonicalize_doi('10.1000.10/x'), '10.1000.10/x')
+
+
+if __name__ == '__main__':
+    unittest.main()
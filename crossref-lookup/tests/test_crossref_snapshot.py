@@ -0,0 +1,87 @@
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'crossref-lookup', 'scripts'))
+
+import crossref_bulk  # noqa: E402
+import crossref_snapshot  # noqa: E402
+import doi_lookup  # noqa: E402
+
+
+def work(number):
+    return {'DOI': f'10.1234/Snap.{number}', 'type': 'journal-article', 'title': [f'Work {number}'],
+            'container-title': ['Journal'], 'published': {'date-parts': [[2000 + number % 20]]},
+            'author': [{'given': 'Ann', 'family': f'Author{number}'}]}
+
+
+def no_network(*args, **kwargs):
+    raise AssertionError('the API was called')
+
+
+class SnapshotImportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.index_path = os.path.join(self.directory, 'snapshot.sqlite3')
+        snapshot = os.path.join(self.directory, 'snapshot')
+        os.makedirs(os.path.join(snapshot, 'sub'))
+
+        # JSON Lines (bare records, an API envelope, a blank line and bad lines) and a JSON document
+        with gzip.open(os.path.join(snapshot, 'part1.jsonl.gz'), 'wt', encoding='utf-8') as f:
+            for number in range(25):
+                f.write(json.dumps(work(number)) + '\n')
+            f.write(json.dumps({'status': 'ok', 'message': work(25)}) + '\n\n')
+            f.write('{not json\n[1, 2]\n{"title": ["no DOI"]}\n')
+        with gzip.open(os.path.join(snapshot, 'sub', 'part2.json.gz'), 'wt', encoding='utf-8') as f:
+            json.dump({'items': [work(number) for number in range(26, 30)]}, f)
+        self.snapshot = snapshot
+
+        index = crossref_snapshot.SnapshotIndex(self.index_path)
+        self.addCleanup(index.close)
+        self.summary = index.import_files([snapshot], workers=2, batch_lines=4)
+        self.index = index
+
+        patches = [
+            mock.patch.dict(os.environ, {'CROSSREF_SNAPSHOT_INDEX': self.index_path}),
+            mock.patch.object(crossref_snapshot, '_default_index', None),
+            mock.patch.object(crossref_bulk, 'api_get', side_effect=no_network),
+            mock.patch.object(crossref_bulk, 'get_message', side_effect=no_network)
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_import_summary(self):
+        self.assertEqual(self.summary['files'], 2)
+        self.assertEqual(self.summary['records'], 30)
+        self.assertEqual(self.summary['errors'], 3)
+        self.assertEqual(self.index.stats()['entries'], 30)
+
+    def test_reimport_skips_imported_files(self):
+        summary = self.index.import_files([self.snapshot], workers=2, batch_lines=4)
+        self.assertEqual((summary['files'], summary['skipped_files'], summary['records']), (0, 2, 0))
+
+    def test_doi_lookup_reads_the_index(self):
+        result = doi_lookup.lookup_doi('https://doi.org/10.1234/SNAP.3', use_cache=False)
+        self.assertEqual(result['title'], 'Work 3')
+        self.assertEqual(doi_lookup.lookup_doi('10.1234/snap.27', use_cache=False)['title'], 'Work 27')
+        self.assertEqual(doi_lookup.lookup_doi('10.1234/snap.25', use_cache=False)['title'], 'Work 25')
+
+    def test_fetch_works_reads_the_index(self):
+        dois = ['10.1234/snap.0', 'doi:10.1234/SNAP.29', '10.1234/snap.12']
+        stats = {}
+        works = crossref_bulk.fetch_works(dois, use_cache=False, stats=stats)
+        self.assertEqual([works[doi]['title'][0] for doi in dois], ['Work 0', 'Work 29', 'Work 12'])
+        self.assertEqual(stats['snapshot_hits'], 3)
+        self.assertEqual(stats['bulk_requests'] + stats['fallback_requests'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
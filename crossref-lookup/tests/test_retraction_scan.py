@@ -0,0 +1,46 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'crossref-lookup', 'scripts'))
+
+import retraction_scan  # noqa: E402
+
+RETRACTION = {'type': 'retraction', 'label': 'Retraction', 'DOI': '10.1234/notice',
+              'updated': {'date-parts': [[2024, 1, 2]]}, 'source': 'publisher'}
+
+
+class ScanUpdatesTest(unittest.TestCase):
+
+    def test_doi_with_comma_is_looked_up_singly(self):
+        entries = [('10.1234/plain', 'plain'), ('10.1234/a,b', 'comma')]
+        bulk = {'10.1234/plain': {'DOI': '10.1234/plain', 'title': ['Plain']}}
+        single = {'DOI': '10.1234/a,b', 'title': ['Comma'], 'updated-by': [RETRACTION]}
+
+        with mock.patch.object(retraction_scan, 'query_chunks', return_value=(bulk, 1)) as query, \
+                mock.patch.object(retraction_scan, 'request_work', return_value=single) as request:
+            stats = {}
+            findings = retraction_scan.scan_updates(entries, stats=stats)
+
+        query.assert_called_once()
+        self.assertEqual(query.call_args[0][0], ['10.1234/plain'])
+        request.assert_called_once_with('10.1234/a,b', None)
+        self.assertEqual([(f['doi'], f['key'], f['status']) for f in findings],
+                         [('10.1234/a,b', 'comma', 'retracted')])
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['not_found'], 0)
+
+    def test_doi_with_comma_not_found(self):
+        entries = [('10.1234/a,b', None)]
+        with mock.patch.object(retraction_scan, 'query_chunks', return_value=({}, 0)), \
+                mock.patch.object(retraction_scan, 'request_work', return_value=None):
+            stats = {}
+            findings = retraction_scan.scan_updates(entries, stats=stats)
+
+        self.assertEqual(findings, [])
+        self.assertEqual(stats['not_found'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
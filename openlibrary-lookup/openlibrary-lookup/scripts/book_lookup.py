@@ -14,12 +14,15 @@ This will:
 3. Generate BibTeX entry
 4. Save both to files
 """
-import requests
 import json
 import sys
 import re
 import os
 
+from openlibrary_cache import canonicalize_isbn, looks_like_isbn
+from openlibrary_client import api_get, get_author_names
+from openlibrary_dump import lookup_edition
+
 def clean_string_for_bibtex(text):
     """Clean string for BibTeX format"""
     if not text:
@@ -76,44 +79,60 @@ def format_author_apa7(author_name):
         initials = ' '.join([name[0] + '.' for name in parts[:-1]])
         return f"{last}, {initials}"
 
+def get_book_data_by_isbn(isbn):
+    """
+    Get book data for one ISBN (preferably canonical ISBN-13) from its OpenLibrary edition record.
+    The offline dump index (OPENLIBRARY_DUMP_INDEX) is checked before the API.
+    Returns standardized book data dict, or None if OpenLibrary has no such edition
+    
+    Raises requests exceptions on network errors.
+    """
+    book_data = lookup_edition(isbn)
+    if book_data is None:
+        response = api_get(f"https://openlibrary.org/isbn/{isbn}.json")
+        if response.status_code != 200:
+            return None
+        book_data = response.json()
+    return edition_to_book_data(book_data)
+
+def edition_to_book_data(book_data):
+    """
+    Convert an OpenLibrary edition record into the standardized book data dict,
+    resolving its author keys to names
+    """
+    # Get author names (cached, the rest fetched concurrently)
+    author_keys = [ref.get('key') for ref in book_data.get('authors', []) if ref.get('key')]
+    names = get_author_names(author_keys)
+    authors = [names[key] or '' for key in author_keys if key in names]
+    
+    return {
+        'title': book_data.get('title', ''),
+        'subtitle': book_data.get('subtitle'),
+        'authors': authors,
+        'publishers': book_data.get('publishers', []),
+        'publish_date': book_data.get('publish_date', ''),
+        'publish_place': book_data.get('publish_places', []),
+        'isbn_10': book_data.get('isbn_10', []),
+        'isbn_13': book_data.get('isbn_13', []),
+        'number_of_pages': book_data.get('number_of_pages'),
+        'edition': book_data.get('edition_name')
+    }
+
 def get_book_data(identifier):
     """
     Get book data from OpenLibrary by ISBN or search query
     Returns standardized book data dict
     """
-    # Try as ISBN first
-    isbn = identifier.replace('-', '').replace(' ', '')
-    if isbn.isdigit() and (len(isbn) == 10 or len(isbn) == 13):
-        url = f"https://openlibrary.org/isbn/{isbn}.json"
+    # Try as ISBN first (validated and converted to ISBN-13; typos never reach the network)
+    isbn = canonicalize_isbn(identifier)
+    if isbn is None and looks_like_isbn(identifier):
+        print(f"Invalid ISBN (checksum mismatch): {identifier.strip()}", file=sys.stderr)
+        return None
+    if isbn:
         try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                book_data = response.json()
-                
-                # Get author names
-                authors = []
-                if 'authors' in book_data:
-                    for author_ref in book_data['authors']:
-                        author_key = author_ref.get('key')
-                        if author_key:
-                            author_url = f"https://openlibrary.org{author_key}.json"
-                            author_response = requests.get(author_url, timeout=10)
-                            if author_response.status_code == 200:
-                                author_data = author_response.json()
-                                authors.append(author_data.get('name', ''))
-                
-                return {
-                    'title': book_data.get('title', ''),
-                    'subtitle': book_data.get('subtitle'),
-                    'authors': authors,
-                    'publishers': book_data.get('publishers', []),
-                    'publish_date': book_data.get('publish_date', ''),
-                    'publish_place': book_data.get('publish_places', []),
-                    'isbn_10': book_data.get('isbn_10', []),
-                    'isbn_13': book_data.get('isbn_13', []),
-                    'number_of_pages': book_data.get('number_of_pages'),
-                    'edition': book_data.get('edition_name')
-                }
+            book_data = get_book_data_by_isbn(isbn)
+            if book_data:
+                return book_data
         except Exception as e:
             print(f"Error fetching ISBN: {e}", file=sys.stderr)
     
@@ -122,7 +141,7 @@ def get_book_data(identifier):
     params = {'q': identifier, 'limit': 1}
     
     try:
-        response = requests.get(search_url, params=params, timeout=10)
+        response = api_get(search_url, params=params)
         response.raise_for_status()
         data = response.json()
         
@@ -8,6 +8,10 @@ import json
 import sys
 import re
 
+from openlibrary_cache import canonicalize_isbn
+from openlibrary_client import api_get, get_author_names
+from openlibrary_dump import lookup_edition, lookup_edition_by_key
+
 def get_book_data(identifier):
     """
     Fetch book data from OpenLibrary.
@@ -17,29 +21,38 @@ def get_book_data(identifier):
     if identifier.startswith('OL') or identifier.startswith('/books/'):
         if not identifier.startswith('/books/'):
             identifier = f'/books/{identifier}'
+        book_data = lookup_edition_by_key(identifier)
         url = f"https://openlibrary.org{identifier}.json"
     else:
-        # Assume it's an ISBN
-        isbn = identifier.replace('-', '').replace(' ', '')
+        # Assume it's an ISBN; reject bad checksums without a request
+        isbn = canonicalize_isbn(identifier)
+        if isbn is None:
+            return {'error': f'Invalid ISBN: {identifier.strip()}'}
+        book_data = lookup_edition(isbn)
         url = f"https://openlibrary.org/isbn/{isbn}.json"
     
+    # Editions in the offline dump index (OPENLIBRARY_DUMP_INDEX) need no request
+    if book_data is not None:
+        return book_data
+    
     try:
-        response = requests.get(url, timeout=10)
+        response = api_get(url)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
         return {'error': str(e)}
 
 def get_author_name(author_key):
-    """Fetch author name from OpenLibrary."""
+    """Fetch author name from OpenLibrary (served from the author cache when possible)."""
+    return get_author_names_or_unknown([author_key])[0]
+
+def get_author_names_or_unknown(author_keys):
+    """Resolve author keys concurrently; keys that cannot be resolved become 'Unknown Author'."""
     try:
-        url = f"https://openlibrary.org{author_key}.json"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        author_data = response.json()
-        return author_data.get('name', 'Unknown Author')
-    except:
-        return 'Unknown Author'
+        names = get_author_names(author_keys)
+    except requests.exceptions.RequestException:
+        names = {}
+    return [names.get(key) or 'Unknown Author' for key in author_keys]
 
 def format_author_apa7(author_name):
     """
@@ -75,13 +88,8 @@ def generate_apa7_citation(book_data):
         return {'error': book_data['error']}
     
     # Get authors
-    authors = []
-    if 'authors' in book_data:
-        for author_ref in book_data['authors']:
-            author_key = author_ref.get('key')
-            if author_key:
-                author_name = get_author_name(author_key)
-                authors.append(format_author_apa7(author_name))
+    author_keys = [ref.get('key') for ref in book_data.get('authors', []) if ref.get('key')]
+    authors = [format_author_apa7(name) for name in get_author_names_or_unknown(author_keys)]
     
     if not authors:
         authors = ['Unknown Author']
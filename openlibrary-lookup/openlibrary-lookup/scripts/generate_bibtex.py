@@ -3,11 +3,14 @@
 Generate BibTeX citation for Zotero from OpenLibrary book data.
 Usage: python generate_bibtex.py <isbn_or_search_query>
 """
-import requests
 import json
 import sys
 import re
 
+from openlibrary_cache import canonicalize_isbn, looks_like_isbn
+from openlibrary_client import api_get
+from book_lookup import get_book_data_by_isbn
+
 def clean_string_for_bibtex(text):
     """Clean string for BibTeX format"""
     if not text:
@@ -59,39 +62,17 @@ def get_book_data(identifier):
     Get book data from OpenLibrary by ISBN or search query
     Returns standardized book data dict
     """
-    # Try as ISBN first
-    isbn = identifier.replace('-', '').replace(' ', '')
-    if isbn.isdigit() and (len(isbn) == 10 or len(isbn) == 13):
-        url = f"https://openlibrary.org/isbn/{isbn}.json"
+    # Try as ISBN first (validated and converted to ISBN-13; typos never reach the network)
+    isbn = canonicalize_isbn(identifier)
+    if isbn is None and looks_like_isbn(identifier):
+        print(f"Invalid ISBN (checksum mismatch): {identifier.strip()}", file=sys.stderr)
+        return None
+    if isbn:
+        # Offline dump index first, then the API (see book_lookup.get_book_data_by_isbn)
         try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                book_data = response.json()
-                
-                # Get author names
-                authors = []
-                if 'authors' in book_data:
-                    for author_ref in book_data['authors']:
-                        author_key = author_ref.get('key')
-                        if author_key:
-                            author_url = f"https://openlibrary.org{author_key}.json"
-                            author_response = requests.get(author_url, timeout=10)
-                            if author_response.status_code == 200:
-                                author_data = author_response.json()
-                                authors.append(author_data.get('name', ''))
-                
-                return {
-                    'title': book_data.get('title', ''),
-                    'subtitle': book_data.get('subtitle'),
-                    'authors': authors,
-                    'publishers': book_data.get('publishers', []),
-                    'publish_date': book_data.get('publish_date', ''),
-                    'publish_place': book_data.get('publish_places', []),
-                    'isbn_10': book_data.get('isbn_10', []),
-                    'isbn_13': book_data.get('isbn_13', []),
-                    'number_of_pages': book_data.get('number_of_pages'),
-                    'edition': book_data.get('edition_name')
-                }
+            book_data = get_book_data_by_isbn(isbn)
+            if book_data:
+                return book_data
         except:
             pass
     
@@ -100,7 +81,7 @@ def get_book_data(identifier):
     params = {'q': identifier, 'limit': 1}
     
     try:
-        response = requests.get(search_url, params=params, timeout=10)
+        response = api_get(search_url, params=params)
         response.raise_for_status()
         data = response.json()
         
@@ -7,15 +7,23 @@ import requests
 import json
 import sys
 
+from openlibrary_client import api_get
+from openlibrary_dump import lookup_author
+
 def get_author_by_key(author_key):
     """Get author info by OpenLibrary author key (e.g., OL23919A)"""
     if not author_key.startswith('/authors/'):
         author_key = f'/authors/{author_key}'
     
+    # The offline dump index (OPENLIBRARY_DUMP_INDEX) is checked before the API
+    author = lookup_author(author_key)
+    if author is not None:
+        return author
+    
     url = f"https://openlibrary.org{author_key}.json"
     
     try:
-        response = requests.get(url, timeout=10)
+        response = api_get(url)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -27,7 +35,7 @@ def search_author(author_name):
     params = {'q': author_name}
     
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = api_get(url, params=params)
         response.raise_for_status()
         data = response.json()
         
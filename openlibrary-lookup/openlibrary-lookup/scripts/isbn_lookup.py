@@ -7,25 +7,35 @@ import requests
 import json
 import sys
 
+from openlibrary_cache import canonicalize_isbn
+from openlibrary_client import api_get, get_author_names
+from openlibrary_dump import lookup_edition
+
 def lookup_isbn(isbn):
     """
     Look up a book by ISBN.
     
     Args:
-        isbn: ISBN-10 or ISBN-13
+        isbn: ISBN-10 or ISBN-13 (hyphens, spaces and an "ISBN:" label are allowed)
     
     Returns:
         Book information dictionary
     """
-    # Remove hyphens and spaces from ISBN
-    isbn = isbn.replace('-', '').replace(' ', '')
+    # Validate the checksum and convert to ISBN-13, so both forms share one request
+    canonical = canonicalize_isbn(isbn)
+    if canonical is None:
+        return {'error': f'Invalid ISBN: {isbn.strip()}'}
+    isbn = canonical
     
     url = f"https://openlibrary.org/isbn/{isbn}.json"
     
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        book_data = response.json()
+        # The offline dump index (OPENLIBRARY_DUMP_INDEX) is checked before the API
+        book_data = lookup_edition(isbn)
+        if book_data is None:
+            response = api_get(url)
+            response.raise_for_status()
+            book_data = response.json()
         
         # Get additional work information if available
         work_key = book_data.get('works', [{}])[0].get('key') if book_data.get('works') else None
@@ -44,19 +54,10 @@ def lookup_isbn(isbn):
             'openlibrary_key': book_data.get('key')
         }
         
-        # Get author information
-        if 'authors' in book_data:
-            for author_ref in book_data['authors']:
-                author_key = author_ref.get('key')
-                if author_key:
-                    author_url = f"https://openlibrary.org{author_key}.json"
-                    author_response = requests.get(author_url, timeout=10)
-                    if author_response.status_code == 200:
-                        author_data = author_response.json()
-                        result['authors'].append({
-                            'name': author_data.get('name'),
-                            'key': author_key
-                        })
+        # Get author information (cached, the rest fetched concurrently)
+        author_keys = [ref.get('key') for ref in book_data.get('authors', []) if ref.get('key')]
+        names = get_author_names(author_keys)
+        result['authors'] = [{'name': names[key], 'key': key} for key in author_keys if key in names]
         
         # Add cover URL if available
         if result['cover_ids']:
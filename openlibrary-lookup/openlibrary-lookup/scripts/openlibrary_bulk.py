@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Resolve many ISBNs with a handful of OpenLibrary requests.
+Usage: python openlibrary_bulk.py <isbn_file|-> [--chunk-size 50] [--workers 4]
+
+Instead of one /isbn/{isbn}.json request per book followed by one request
+per author, ISBNs are packed into Books API queries:
+
+  /api/books?bibkeys=ISBN:a,ISBN:b,...&jscmd=data&format=json
+
+which return every edition found with its author names already filled in.
+Results are mapped back into the book_data dictionary used by
+book_lookup.py. ISBNs missing from a bulk response fall back to a single
+edition lookup (book_lookup.get_book_data_by_isbn).
+
+ISBNs found in the offline dump index (openlibrary_dump.py, when
+OPENLIBRARY_DUMP_INDEX is set) are resolved locally and never requested.
+
+Every ISBN is validated and converted to ISBN-13 first: invalid ISBNs are
+never requested, and the ISBN-10 and ISBN-13 forms of a book share one
+bibkey.
+"""
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from book_lookup import edition_to_book_data, get_book_data_by_isbn
+from openlibrary_cache import canonicalize_isbn
+from openlibrary_client import api_get
+from openlibrary_dump import get_dump_index, lookup_edition
+
+DEFAULT_CHUNK_SIZE = 50
+
+
+def _names(values):
+    return [value.get('name', '') for value in values or [] if isinstance(value, dict)]
+
+
+def parse_books_api_entry(entry):
+    """Convert one Books API (jscmd=data) entry into the book_lookup.py book_data shape."""
+    identifiers = entry.get('identifiers', {})
+    return {
+        'title': entry.get('title', ''),
+        'subtitle': entry.get('subtitle'),
+        'authors': _names(entry.get('authors')),
+        'publishers': _names(entry.get('publishers')),
+        'publish_date': entry.get('publish_date', ''),
+        'publish_place': _names(entry.get('publish_places')),
+        'isbn_10': identifiers.get('isbn_10', []),
+        'isbn_13': identifiers.get('isbn_13', []),
+        'number_of_pages': entry.get('number_of_pages'),
+        # jscmd=data does not include the edition name
+        'edition': None
+    }
+
+
+def fetch_books_chunk(isbns):
+    """
+    Fetch up to len(isbns) editions in one Books API request.
+
+    Returns:
+        Dictionary of ISBN (as sent) -> book_data for every ISBN OpenLibrary returned
+        (empty if the request failed)
+    """
+    params = {
+        'bibkeys': ','.join(f'ISBN:{isbn}' for isbn in isbns),
+        'jscmd': 'data',
+        'format': 'json'
+    }
+    try:
+        response = api_get("/api/books", params=params, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+    except (requests.exceptions.RequestException, ValueError):
+        return {}
+
+    found = {}
+    for bibkey, entry in data.items():
+        if bibkey.startswith('ISBN:') and isinstance(entry, dict):
+            found[bibkey[5:]] = parse_books_api_entry(entry)
+    return found
+
+
+def _fetch_single(isbn):
+    try:
+        return get_book_data_by_isbn(isbn)
+    except requests.exceptions.RequestException:
+        return None
+
+
+def fetch_books(isbns, chunk_size=DEFAULT_CHUNK_SIZE, workers=4, fallback=True, stats=None):
+    """
+    Resolve a list of ISBNs using batched Books API requests.
+
+    Args:
+        isbns: Iterable of ISBN-10/ISBN-13 strings (hyphens and spaces allowed);
+            invalid ISBNs map to None without a request
+        chunk_size: Maximum number of ISBNs packed into one request
+        workers: Number of requests run concurrently
+        fallback: Look up ISBNs missing from bulk responses one at a time
+        stats: Optional dict that receives request counters
+
+    Returns:
+        Dictionary mapping each requested ISBN (as given) to its book_data, or None
+    """
+    if stats is None:
+        stats = {}
+    stats.update({'requested': 0, 'invalid': 0, 'dump_hits': 0, 'bulk_requests': 0, 'fallback_lookups': 0,
+                  'not_found': 0})
+
+    isbns = list(isbns)
+    stats['requested'] = len(isbns)
+    canonical = {isbn: canonicalize_isbn(isbn) for isbn in isbns}
+    stats['invalid'] = sum(1 for isbn13 in canonical.values() if isbn13 is None)
+    unique = list(dict.fromkeys(isbn13 for isbn13 in canonical.values() if isbn13))
+
+    books = {}
+    if get_dump_index() is not None:
+        for isbn in unique:
+            # Served from the dump index, authors included; no request is made
+            edition = lookup_edition(isbn)
+            if edition is not None:
+                books[isbn] = edition_to_book_data(edition)
+        stats['dump_hits'] = len(books)
+    remote = [isbn for isbn in unique if isbn not in books]
+
+    chunk_size = max(1, chunk_size)
+    chunks = [remote[i:i + chunk_size] for i in range(0, len(remote), chunk_size)]
+    if chunks:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for found in executor.map(fetch_books_chunk, chunks):
+                books.update(found)
+        stats['bulk_requests'] = len(chunks)
+
+    missing = [isbn for isbn in remote if isbn not in books]
+    if missing and fallback:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for isbn, book in zip(missing, executor.map(_fetch_single, missing)):
+                if book is not None:
+                    books[isbn] = book
+        stats['fallback_lookups'] = len(missing)
+
+    results = {isbn: books.get(canonical[isbn]) for isbn in isbns}
+    stats['not_found'] = sum(1 for book in results.values() if book is None)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Resolve many ISBNs with batched OpenLibrary Books API requests')
+    parser.add_argument('source', help="File with one ISBN per line ('-' for stdin)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='ISBNs per request')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent requests')
+
+    args = parser.parse_args()
+    if args.source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(args.source, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    isbns = [line.strip() for line in lines if line.strip() and not line.startswith('#')]
+
+    stats = {}
+    books = fetch_books(isbns, chunk_size=args.chunk_size, workers=args.workers, stats=stats)
+    print(json.dumps({'stats': stats, 'books': books}, indent=2))
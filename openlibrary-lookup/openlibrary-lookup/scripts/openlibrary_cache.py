@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache of OpenLibrary author names and API responses.
+Usage: python openlibrary_cache.py [stats|clear|purge]
+
+Edition records only reference their authors by key (/authors/OL...A), so
+every ISBN lookup used to fetch each author separately. Author names hardly
+ever change and the same prolific authors recur across a catalogue, so the
+resolved key -> name pairs are kept in a SQLite database shared by every
+script (and every process) in this skill.
+
+API responses for editions (/isbn/, /books/), works (/works/), authors
+(/authors/) and searches (/search.json, /search/authors.json) are kept in a
+second table of the same database. Each resource type has its own lifetime
+(editions and works rarely change, author records almost never, search
+results often) and its own LRU size limit. Expired entries are not thrown
+away while they carry an ETag or Last-Modified validator: the next request
+revalidates them, and a 304 Not Modified renews the entry without
+downloading it again.
+
+canonicalize_isbn() validates ISBN checksums and converts every ISBN to
+ISBN-13, so the ISBN-10 and ISBN-13 forms of a book share one cache key and
+one request, and mistyped ISBNs are rejected before any request is made.
+
+Environment variables:
+  OPENLIBRARY_CACHE_PATH     Database file (default: ~/.cache/openlibrary-lookup/cache.sqlite3)
+  OPENLIBRARY_AUTHOR_TTL     Author entry lifetime in seconds (default: 90 days)
+  OPENLIBRARY_EDITION_TTL    Edition response lifetime in seconds (default: 30 days)
+  OPENLIBRARY_WORK_TTL       Work response lifetime in seconds (default: 30 days)
+  OPENLIBRARY_SEARCH_TTL     Search response lifetime in seconds (default: 1 day)
+  OPENLIBRARY_<TYPE>_MAX_ENTRIES
+                             Cached responses per type, EDITION, WORK, AUTHOR or
+                             SEARCH (default: 20000; 2000 for SEARCH)
+  OPENLIBRARY_CACHE_DISABLE  Set to 1 to bypass the cache entirely
+"""
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser('~'), '.cache', 'openlibrary-lookup', 'cache.sqlite3'
+)
+DEFAULT_AUTHOR_TTL = 90 * 24 * 60 * 60
+RESOURCE_TYPES = ('edition', 'work', 'author', 'search')
+DEFAULT_RESOURCE_TTLS = {
+    'edition': 30 * 24 * 60 * 60,
+    'work': 30 * 24 * 60 * 60,
+    'author': DEFAULT_AUTHOR_TTL,
+    'search': 24 * 60 * 60
+}
+DEFAULT_RESOURCE_MAX_ENTRIES = {'edition': 20000, 'work': 20000, 'author': 20000, 'search': 2000}
+
+# Optional "ISBN", "ISBN-10" or "ISBN-13" label, with or without a colon
+_ISBN_LABEL = re.compile(r'^isbn(?:-?1[03])?:?\s*', re.IGNORECASE)
+_ISBN_SEPARATORS = re.compile(r'[\s\-\u2010-\u2015]')
+_ISBN10_SHAPE = re.compile(r'^\d{9}[\dX]$')
+_ISBN13_SHAPE = re.compile(r'^97[89]\d{10}$')
+_THIRTEEN_DIGITS = re.compile(r'^\d{13}$')
+
+
+def _clean_isbn(value):
+    return _ISBN_SEPARATORS.sub('', _ISBN_LABEL.sub('', value.strip())).upper()
+
+
+def looks_like_isbn(value):
+    """True if value has the shape of an ISBN-10 or ISBN-13 (checksum not checked)."""
+    cleaned = _clean_isbn(value)
+    return bool(_ISBN10_SHAPE.match(cleaned) or _THIRTEEN_DIGITS.match(cleaned))
+
+
+def isbn13_check_digit(first12):
+    """Return the ISBN-13 check digit for the first 12 digits."""
+    total = sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(first12))
+    return str((10 - total % 10) % 10)
+
+
+def canonicalize_isbn(value):
+    """
+    Validate an ISBN and return it as a bare ISBN-13.
+
+    Accepts ISBN-10 (including an X check digit) and ISBN-13, with hyphens,
+    spaces and an optional "ISBN:" label.
+
+    Returns:
+        13-digit string, or None if value is not a valid ISBN
+    """
+    if not value:
+        return None
+    isbn = _clean_isbn(value)
+
+    if _ISBN10_SHAPE.match(isbn):
+        total = sum((10 - i) * (10 if char == 'X' else int(char)) for i, char in enumerate(isbn))
+        if total % 11:
+            return None
+        first12 = '978' + isbn[:9]
+        return first12 + isbn13_check_digit(first12)
+
+    if _ISBN13_SHAPE.match(isbn) and isbn13_check_digit(isbn[:12]) == isbn[12]:
+        return isbn
+    return None
+
+
+class AuthorCache:
+    """SQLite-backed author key -> name cache with a TTL."""
+
+    def __init__(self, path=None, ttl=DEFAULT_AUTHOR_TTL):
+        self.path = path or DEFAULT_CACHE_PATH
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS authors ('
+            ' key TEXT PRIMARY KEY,'
+            ' name TEXT,'
+            ' stored_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    def get_many(self, keys):
+        """
+        Look up several author keys at once.
+
+        Returns:
+            Dictionary of key -> name for every key with a fresh entry
+            (the name is None if OpenLibrary's record had none)
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        cutoff = time.time() - self.ttl if self.ttl else 0
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, name FROM authors WHERE stored_at >= ? AND key IN ({','.join('?' * len(keys))})",
+                [cutoff] + keys
+            ).fetchall()
+            found = dict(rows)
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def put_many(self, names):
+        """Store a dictionary of author key -> name in one transaction."""
+        if not names:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO authors (key, name, stored_at) VALUES (?, ?, ?)',
+                [(key, name, now) for key, name in names.items()]
+            )
+            self._conn.commit()
+
+    def purge_expired(self):
+        """Delete expired entries. Returns the number removed."""
+        if not self.ttl:
+            return 0
+        with self._lock:
+            removed = self._conn.execute(
+                'DELETE FROM authors WHERE stored_at < ?', (time.time() - self.ttl,)
+            ).rowcount
+            self._conn.commit()
+        return removed
+
+    def clear(self):
+        """Remove every cached entry."""
+        with self._lock:
+            self._conn.execute('DELETE FROM authors')
+            self._conn.commit()
+
+    def stats(self):
+        """Return cache size and this process's hit/miss counters."""
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM authors').fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'authors': entries,
+            'author_ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def resource_type(url):
+    """
+    Return the cached resource type of an OpenLibrary URL, or None if it is not cached.
+
+    Editions are fetched by /isbn/ or /books/, searches by /search.json or
+    /search/authors.json; other endpoints (such as /api/books) are not cached.
+    """
+    path = urlsplit(url).path
+    if path.startswith(('/isbn/', '/books/')):
+        return 'edition'
+    if path.startswith('/works/'):
+        return 'work'
+    if path.startswith('/authors/'):
+        return 'author'
+    if path.startswith('/search'):
+        return 'search'
+    return None
+
+
+class ResponseCache:
+    """SQLite-backed cache of OpenLibrary response bodies with per-type TTLs and LRU limits."""
+
+    def __init__(self, path=None, ttls=None, max_entries=None):
+        self.path = path or DEFAULT_CACHE_PATH
+        self.ttls = dict(DEFAULT_RESOURCE_TTLS, **(ttls or {}))
+        self.max_entries = dict(DEFAULT_RESOURCE_MAX_ENTRIES, **(max_entries or {}))
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' url TEXT PRIMARY KEY,'
+            ' type TEXT NOT NULL,'
+            ' body BLOB NOT NULL,'
+            ' etag TEXT,'
+            ' last_modified TEXT,'
+            ' stored_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (type, accessed_at)')
+        self._conn.commit()
+
+    def get(self, url, kind):
+        """
+        Look up a cached response.
+
+        Returns:
+            Dictionary with body (bytes), etag, last_modified and fresh, or None
+            on a miss. Stale entries are returned (fresh=False) only when they
+            can be revalidated; stale entries without validators are dropped.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT body, etag, last_modified, stored_at FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            body, etag, last_modified, stored_at = row
+            ttl = self.ttls.get(kind)
+            fresh = not ttl or now - stored_at <= ttl
+            if not fresh and not (etag or last_modified):
+                self._conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute('UPDATE responses SET accessed_at = ? WHERE url = ?', (now, url))
+            self._conn.commit()
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale += 1
+
+        return {
+            'body': zlib.decompress(body),
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresh': fresh
+        }
+
+    def put(self, url, kind, body, etag=None, last_modified=None):
+        """Store a response body, evicting the least recently used entries of its type if needed."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses'
+                ' (url, type, body, etag, last_modified, stored_at, accessed_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, kind, zlib.compress(body), etag, last_modified, now, now)
+            )
+            self._evict(kind)
+            self._conn.commit()
+
+    def renew(self, url, etag=None, last_modified=None):
+        """Mark a revalidated (304 Not Modified) entry fresh again, keeping its body."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'UPDATE responses SET stored_at = ?, accessed_at = ?,'
+                ' etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)'
+                ' WHERE url = ?',
+                (now, now, etag, last_modified, url)
+            )
+            self._conn.commit()
+            self.revalidated += 1
+
+    def _evict(self, kind):
+        """Trim one resource type down to its size limit, dropping the oldest accesses first."""
+        limit = self.max_entries.get(kind)
+        if not limit:
+            return
+        count = self._conn.execute('SELECT COUNT(*) FROM responses WHERE type = ?', (kind,)).fetchone()[0]
+        excess = count - limit
+        if excess > 0:
+            self._conn.execute(
+                'DELETE FROM responses WHERE url IN '
+                '(SELECT url FROM responses WHERE type = ? ORDER BY accessed_at ASC LIMIT ?)',
+                (kind, excess)
+            )
+            self.evictions += excess
+
+    def purge_expired(self):
+        """Delete every response older than its type's TTL, validators or not. Returns the number removed."""
+        removed = 0
+        now = time.time()
+        with self._lock:
+            for kind, ttl in self.ttls.items():
+                if ttl:
+                    removed += self._conn.execute(
+                        'DELETE FROM responses WHERE type = ? AND stored_at < ?', (kind, now - ttl)
+                    ).rowcount
+            self._conn.commit()
+        return removed
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._conn.commit()
+
+    def stats(self):
+        """Return per-type entry counts and this process's hit/miss counters."""
+        with self._lock:
+            counts = dict(self._conn.execute('SELECT type, COUNT(*) FROM responses GROUP BY type').fetchall())
+        lookups = self.hits + self.stale + self.misses
+        return {
+            'entries': {kind: counts.get(kind, 0) for kind in RESOURCE_TYPES},
+            'ttl_seconds': self.ttls,
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'stale': self.stale,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_response_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_author_cache():
+    """
+    Return the shared process-wide author cache, or None if caching is disabled.
+
+    The cache is configured from the OPENLIBRARY_* environment variables
+    the first time it is requested.
+    """
+    global _default_cache
+
+    if os.environ.get('OPENLIBRARY_CACHE_DISABLE', '') not in ('', '0'):
+        return None
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            try:
+                _default_cache = AuthorCache(
+                    path=os.environ.get('OPENLIBRARY_CACHE_PATH') or None,
+                    ttl=int(os.environ.get('OPENLIBRARY_AUTHOR_TTL', DEFAULT_AUTHOR_TTL))
+                )
+            except (sqlite3.Error, OSError) as e:
+                print(f"Warning: author cache unavailable: {e}", file=sys.stderr)
+                return None
+        return _default_cache
+
+
+def get_response_cache():
+    """
+    Return the shared process-wide response cache, or None if caching is disabled.
+
+    Per-type lifetimes and size limits come from OPENLIBRARY_<TYPE>_TTL and
+    OPENLIBRARY_<TYPE>_MAX_ENTRIES the first time it is requested.
+    """
+    global _default_response_cache
+
+    if os.environ.get('OPENLIBRARY_CACHE_DISABLE', '') not in ('', '0'):
+        return None
+
+    with _default_cache_lock:
+        if _default_response_cache is None:
+            ttls = {}
+            max_entries = {}
+            for kind in RESOURCE_TYPES:
+                ttls[kind] = int(os.environ.get(f'OPENLIBRARY_{kind.upper()}_TTL', DEFAULT_RESOURCE_TTLS[kind]))
+                max_entries[kind] = int(os.environ.get(f'OPENLIBRARY_{kind.upper()}_MAX_ENTRIES',
+                                                       DEFAULT_RESOURCE_MAX_ENTRIES[kind]))
+            try:
+                _default_response_cache = ResponseCache(
+                    path=os.environ.get('OPENLIBRARY_CACHE_PATH') or None,
+                    ttls=ttls,
+                    max_entries=max_entries
+                )
+            except (sqlite3.Error, OSError) as e:
+                print(f"Warning: response cache unavailable: {e}", file=sys.stderr)
+                return None
+        return _default_response_cache
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    cache = get_author_cache()
+    responses = get_response_cache()
+
+    if cache is None or responses is None:
+        print(json.dumps({'error': 'Cache is disabled or unavailable'}, indent=2))
+        sys.exit(1)
+
+    if command == 'stats':
+        stats = cache.stats()
+        stats['responses'] = responses.stats()
+        print(json.dumps(stats, indent=2))
+    elif command == 'clear':
+        cache.clear()
+        responses.clear()
+        print(json.dumps({'cleared': True, 'path': cache.path}, indent=2))
+    elif command == 'purge':
+        removed = cache.purge_expired() + responses.purge_expired()
+        print(json.dumps({'purged': removed, 'path': cache.path}, indent=2))
+    else:
+        print("Usage: python openlibrary_cache.py [stats|clear|purge]")
+        sys.exit(1)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the OpenLibrary API.
+
+Every script in this skill sends its requests through api_get(), which uses
+one keep-alive requests.Session per process, so repeated lookups reuse
+pooled connections to openlibrary.org.
+
+Identical requests made concurrently from several threads are coalesced:
+the first caller sends the request and the others wait for and share its
+response. This matters when many books share an author, or a merged list
+contains the same ISBN several times. get_request_stats() reports how many
+requests were sent and how many duplicates were saved.
+
+Edition, work, author and search responses are served from the on-disk
+response cache (openlibrary_cache.ResponseCache) while they are fresh.
+Expired entries are revalidated with If-None-Match / If-Modified-Since, so
+an unchanged resource costs a 304 instead of a full download. Only 200
+responses are cached.
+
+get_author_names() resolves the author keys of an edition: names already in
+the author cache (openlibrary_cache.py) cost nothing, and the rest are
+fetched in one concurrent wave instead of one request after another. Names
+in the offline dump index (openlibrary_dump.py), when one is configured,
+are used before either.
+
+Environment variables:
+  OPENLIBRARY_TIMEOUT    Request timeout in seconds (default: 10)
+  OPENLIBRARY_POOL_SIZE  Maximum pooled connections per host (default: 16)
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from openlibrary_cache import get_author_cache, get_response_cache, resource_type
+from openlibrary_dump import lookup_author_names
+
+API_BASE = "https://openlibrary.org"
+USER_AGENT = "OpenLibraryLookupSkill/2.0"
+DEFAULT_TIMEOUT = 10
+DEFAULT_POOL_SIZE = 16
+DEFAULT_AUTHOR_WORKERS = 8
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait and receive the same result (or exception).
+    Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run fn() for key, or wait for the call already in flight for key."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'done': threading.Event(), 'result': None, 'error': None}
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = fn()
+            return call['result']
+        except BaseException as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self.executions, 'coalesced': self.coalesced}
+
+
+_singleflight = SingleFlight()
+
+
+def get_request_stats():
+    """Return how many requests this process sent, how many duplicates were coalesced, and cache counters."""
+    stats = _singleflight.stats()
+    cache = get_response_cache()
+    if cache:
+        stats.update({'cache_hits': cache.hits, 'revalidated': cache.revalidated})
+    return stats
+
+
+def get_timeout(timeout=None):
+    """Return the request timeout: the explicit argument, then OPENLIBRARY_TIMEOUT, then the default."""
+    if timeout is not None:
+        return timeout
+    return float(os.environ.get('OPENLIBRARY_TIMEOUT', DEFAULT_TIMEOUT))
+
+
+def get_session():
+    """Return the process-wide keep-alive session, creating it on first use."""
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            pool_size = int(os.environ.get('OPENLIBRARY_POOL_SIZE', DEFAULT_POOL_SIZE))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=False)
+
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({
+                'User-Agent': USER_AGENT,
+                'Accept': 'application/json',
+                'Accept-Encoding': 'gzip, deflate'
+            })
+            _session = session
+        return _session
+
+
+def api_get(path, params=None, timeout=None):
+    """
+    Send a GET request to OpenLibrary through the shared session.
+
+    Unlike the Crossref client this does not raise for HTTP error statuses:
+    callers check response.status_code or call raise_for_status() as before.
+
+    Args:
+        path: API path such as "/isbn/9780140328721.json", or a full URL
+        params: Optional query parameters
+        timeout: Timeout in seconds (defaults to OPENLIBRARY_TIMEOUT)
+
+    Returns:
+        requests.Response
+
+    Raises:
+        requests.exceptions.RequestException on network errors
+    """
+    url = path if path.startswith('http') else f"{API_BASE}{path}"
+    key = (url, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+    timeout = get_timeout(timeout)
+
+    kind = resource_type(url)
+    cache = get_response_cache() if kind else None
+    if cache is None:
+        return _singleflight.do(key, lambda: get_session().get(url, params=params, timeout=timeout))
+
+    cache_key = f"{url}?{urlencode(key[1])}" if key[1] else url
+    cached = cache.get(cache_key, kind)
+    if cached and cached['fresh']:
+        return _cached_response(url, cached['body'])
+    return _singleflight.do(key, lambda: _fetch_and_cache(url, params, timeout, cache, cache_key, kind, cached))
+
+
+def _cached_response(url, body):
+    """Wrap a cached body in a requests.Response so callers cannot tell it apart."""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.encoding = 'utf-8'
+    response.headers['Content-Type'] = 'application/json'
+    response._content = body
+    return response
+
+
+def _fetch_and_cache(url, params, timeout, cache, cache_key, kind, cached):
+    """Send a request (conditional if a stale entry can be revalidated) and update the cache."""
+    headers = {}
+    if cached:
+        if cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    response = get_session().get(url, params=params, timeout=timeout, headers=headers or None)
+    if response.status_code == 304 and cached:
+        cache.renew(cache_key, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return _cached_response(url, cached['body'])
+    if response.status_code == 200:
+        cache.put(cache_key, kind, response.content,
+                  response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return response
+
+
+def _fetch_author(author_key):
+    """Return (True, name) for a resolved author key, or (False, None) for a non-200 response."""
+    response = api_get(f"{author_key}.json")
+    if response.status_code != 200:
+        return False, None
+    return True, response.json().get('name')
+
+
+def get_author_names(author_keys, workers=DEFAULT_AUTHOR_WORKERS):
+    """
+    Resolve OpenLibrary author keys (e.g. "/authors/OL23919A") to names.
+
+    Names from the offline dump index and the author cache are used first;
+    the remaining keys are fetched concurrently and the results stored in the
+    author cache.
+
+    Args:
+        author_keys: Iterable of author keys
+        workers: Maximum concurrent author requests
+
+    Returns:
+        Dictionary of key -> name for every key that resolved (the name is
+        None if the author record has none); keys that failed are absent
+
+    Raises:
+        requests.exceptions.RequestException on network errors
+    """
+    keys = list(dict.fromkeys(key for key in author_keys if key))
+    names = lookup_author_names(keys)
+    missing = [key for key in keys if key not in names]
+    cache = get_author_cache()
+    if cache and missing:
+        names.update(cache.get_many(missing))
+        missing = [key for key in missing if key not in names]
+    if not missing:
+        return names
+
+    if len(missing) == 1:
+        results = [_fetch_author(missing[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(missing)))) as executor:
+            results = list(executor.map(_fetch_author, missing))
+
+    fetched = {key: name for key, (ok, name) in zip(missing, results) if ok}
+    if cache:
+        cache.put_many(fetched)
+    names.update(fetched)
+    return names
@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Offline OpenLibrary dump index.
+Usage: python openlibrary_dump.py import <file|dir>... [--index PATH] [--workers N]
+       python openlibrary_dump.py stats [--index PATH]
+       python openlibrary_dump.py get <isbn|/books/KEY|/authors/KEY|/works/KEY> [--index PATH]
+
+OpenLibrary publishes monthly dumps of its editions, works and authors
+(ol_dump_editions_*.txt.gz, ol_dump_works_*.txt.gz, ol_dump_authors_*.txt.gz,
+or the combined ol_dump_*.txt.gz). Each line is tab-separated:
+
+  type  key  revision  last_modified  JSON record
+
+The importer streams them into a SQLite index with:
+
+  ISBN-13 -> edition record   (ISBN-10s are converted, bad checksums skipped)
+  author key -> name and author record
+  work key -> work record and the keys of its editions
+
+Each file is decompressed and parsed by one of a pool of worker processes,
+which sends the parsed, compressed records back in batches of lines; the
+main process only writes batches to the database. The result queue holds at
+most two batches per worker, so memory stays bounded even for the
+multi-gigabyte editions dump. Imported files are recorded in the index and
+skipped when the import is re-run (a file interrupted halfway is imported
+again from its start).
+
+When OPENLIBRARY_DUMP_INDEX points at an index, ISBN, edition and author
+lookups in this skill (book_lookup.py, isbn_lookup.py, get_author_info.py,
+generate_bibtex.py, generate_apa7_citation.py, openlibrary_bulk.py and every
+script resolving author names through openlibrary_client.get_author_names)
+check it before the cache and the API.
+
+Environment variables:
+  OPENLIBRARY_DUMP_INDEX  Index database used for lookups and as the import default
+"""
+import argparse
+import gzip
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+from openlibrary_cache import canonicalize_isbn
+
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.expanduser('~'), '.cache', 'openlibrary-lookup', 'dump.sqlite3'
+)
+DUMP_SUFFIXES = ('.txt.gz', '.txt')
+DEFAULT_BATCH_LINES = 20000
+
+
+def iter_dump_files(paths):
+    """Yield dump files from a list of files and directories (searched recursively)."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(DUMP_SUFFIXES):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def iter_line_batches(path, batch_lines=DEFAULT_BATCH_LINES):
+    """Yield lists of at most batch_lines raw lines from a (gzipped) dump file."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        batch = []
+        for line in f:
+            batch.append(line)
+            if len(batch) >= batch_lines:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _compress(text):
+    return zlib.compress(text.encode('utf-8'))
+
+
+def parse_dump_lines(lines):
+    """
+    Parse a batch of dump lines (runs in a worker process).
+
+    Returns:
+        Dictionary of row lists for each index table, plus error and
+        skipped-line counts (redirects, deletions and other record types)
+    """
+    rows = {'editions': [], 'isbns': [], 'work_editions': [], 'authors': [], 'works': []}
+    errors = 0
+    skipped = 0
+
+    for line in lines:
+        fields = line.rstrip('\n').split('\t', 4)
+        if len(fields) != 5:
+            errors += 1
+            continue
+        record_type, key, _, _, text = fields
+        if record_type not in ('/type/edition', '/type/author', '/type/work'):
+            skipped += 1
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError:
+            errors += 1
+            continue
+        if not isinstance(record, dict):
+            errors += 1
+            continue
+
+        if record_type == '/type/edition':
+            isbn_13, isbn_10, works = (record.get(field) or [] for field in ('isbn_13', 'isbn_10', 'works'))
+            if not (isinstance(isbn_13, list) and isinstance(isbn_10, list) and isinstance(works, list)):
+                errors += 1
+                continue
+            rows['editions'].append((key, _compress(text)))
+            isbns = {canonicalize_isbn(value) for value in isbn_13 + isbn_10 if isinstance(value, str)}
+            rows['isbns'].extend((isbn, key) for isbn in isbns if isbn)
+            rows['work_editions'].extend((work['key'], key) for work in works
+                                         if isinstance(work, dict) and isinstance(work.get('key'), str))
+        elif record_type == '/type/author':
+            name = record.get('name')
+            rows['authors'].append((key, name if isinstance(name, str) else None, _compress(text)))
+        else:
+            rows['works'].append((key, _compress(text)))
+
+    rows['errors'] = errors
+    rows['skipped'] = skipped
+    return rows
+
+
+_results = None
+
+
+def _init_worker(results):
+    global _results
+    _results = results
+
+
+def import_file_worker(path, batch_lines=DEFAULT_BATCH_LINES):
+    """
+    Decompress and parse one dump file (runs in a worker process).
+
+    Puts (path, rows, False) on the result queue for every batch of lines,
+    then (path, None, True) once the whole file is parsed, or
+    (path, error message, True) if the file cannot be read.
+    """
+    try:
+        for batch in iter_line_batches(path, batch_lines):
+            _results.put((path, parse_dump_lines(batch), False))
+    except Exception as e:
+        _results.put((path, f"{type(e).__name__}: {e}", True))
+        return
+    _results.put((path, None, True))
+
+
+def _author_key(key):
+    return key if key.startswith('/authors/') else f'/authors/{key}'
+
+
+def _work_key(key):
+    return key if key.startswith('/works/') else f'/works/{key}'
+
+
+def _edition_key(key):
+    return key if key.startswith('/books/') else f'/books/{key}'
+
+
+def _load(data):
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+
+class DumpIndex:
+    """SQLite index of editions, works and authors imported from OpenLibrary dumps."""
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_INDEX_PATH
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS editions ('
+            ' key TEXT PRIMARY KEY,'
+            ' data BLOB NOT NULL) WITHOUT ROWID'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS isbns ('
+            ' isbn TEXT PRIMARY KEY,'
+            ' edition TEXT NOT NULL) WITHOUT ROWID'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS work_editions ('
+            ' work TEXT NOT NULL,'
+            ' edition TEXT NOT NULL,'
+            ' PRIMARY KEY (work, edition)) WITHOUT ROWID'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS authors ('
+            ' key TEXT PRIMARY KEY,'
+            ' name TEXT,'
+            ' data BLOB NOT NULL) WITHOUT ROWID'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS works ('
+            ' key TEXT PRIMARY KEY,'
+            ' data BLOB NOT NULL) WITHOUT ROWID'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            ' path TEXT PRIMARY KEY,'
+            ' size INTEGER NOT NULL,'
+            ' mtime REAL NOT NULL,'
+            ' records INTEGER NOT NULL,'
+            ' imported_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    def _count(self, row):
+        if row is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return row
+
+    def get_edition_by_isbn(self, isbn):
+        """Return the edition record for an ISBN-10 or ISBN-13, or None if the dump does not have it."""
+        isbn = canonicalize_isbn(isbn)
+        if isbn is None:
+            return None
+        with self._lock:
+            row = self._count(self._conn.execute(
+                'SELECT editions.data FROM isbns JOIN editions ON editions.key = isbns.edition'
+                ' WHERE isbns.isbn = ?', (isbn,)
+            ).fetchone())
+        return _load(row[0]) if row else None
+
+    def get_edition(self, key):
+        """Return the edition record for a key (e.g. OL7353617M or /books/OL7353617M), or None."""
+        with self._lock:
+            row = self._count(self._conn.execute(
+                'SELECT data FROM editions WHERE key = ?', (_edition_key(key),)
+            ).fetchone())
+        return _load(row[0]) if row else None
+
+    def get_author(self, key):
+        """Return the author record for a key (e.g. OL23919A or /authors/OL23919A), or None."""
+        with self._lock:
+            row = self._count(self._conn.execute(
+                'SELECT data FROM authors WHERE key = ?', (_author_key(key),)
+            ).fetchone())
+        return _load(row[0]) if row else None
+
+    def get_author_names(self, keys):
+        """Return a dictionary of author key -> name for every key in the index."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        with self._lock:
+            found = dict(self._conn.execute(
+                f"SELECT key, name FROM authors WHERE key IN ({','.join('?' * len(keys))})", keys
+            ).fetchall())
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def get_work(self, key):
+        """Return a work record with its edition keys added as "edition_keys", or None."""
+        key = _work_key(key)
+        with self._lock:
+            row = self._count(self._conn.execute('SELECT data FROM works WHERE key = ?', (key,)).fetchone())
+            editions = [edition for (edition,) in self._conn.execute(
+                'SELECT edition FROM work_editions WHERE work = ?', (key,)
+            )]
+        if row is None:
+            return None
+        work = _load(row[0])
+        work['edition_keys'] = editions
+        return work
+
+    def get_work_editions(self, key):
+        """Return the edition keys of a work (from the editions dump)."""
+        with self._lock:
+            return [edition for (edition,) in self._conn.execute(
+                'SELECT edition FROM work_editions WHERE work = ?', (_work_key(key),)
+            )]
+
+    def _is_imported(self, path, size, mtime):
+        row = self._conn.execute(
+            'SELECT size, mtime FROM files WHERE path = ?', (os.path.abspath(path),)
+        ).fetchone()
+        return row is not None and row[0] == size and row[1] == mtime
+
+    def _store_rows(self, rows):
+        """Write one parsed batch in one transaction."""
+        with self._lock:
+            self._conn.executemany('INSERT OR REPLACE INTO editions (key, data) VALUES (?, ?)', rows['editions'])
+            self._conn.executemany('INSERT OR REPLACE INTO isbns (isbn, edition) VALUES (?, ?)', rows['isbns'])
+            self._conn.executemany('INSERT OR IGNORE INTO work_editions (work, edition) VALUES (?, ?)',
+                                   rows['work_editions'])
+            self._conn.executemany('INSERT OR REPLACE INTO authors (key, name, data) VALUES (?, ?, ?)',
+                                   rows['authors'])
+            self._conn.executemany('INSERT OR REPLACE INTO works (key, data) VALUES (?, ?)', rows['works'])
+            self._conn.commit()
+
+    def _mark_imported(self, path, records):
+        stat = os.stat(path)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO files (path, size, mtime, records, imported_at) VALUES (?, ?, ?, ?, ?)',
+                (os.path.abspath(path), stat.st_size, stat.st_mtime, records, time.time())
+            )
+            self._conn.commit()
+
+    def import_files(self, paths, workers=None, force=False, batch_lines=DEFAULT_BATCH_LINES, progress=None):
+        """
+        Import dump files into the index.
+
+        Args:
+            paths: Dump files and/or directories containing them
+            workers: Worker processes for decompressing and parsing (default: CPU count)
+            force: Re-import files that were already imported
+            batch_lines: Lines a worker parses and sends back at a time
+            progress: Optional callback receiving (path, records) after each file
+
+        Returns:
+            Summary dictionary with file, record and error counts and throughput
+        """
+        start = time.perf_counter()
+        workers = max(1, workers or os.cpu_count() or 1)
+
+        files = []
+        skipped = 0
+        for path in iter_dump_files(paths):
+            stat = os.stat(path)
+            if not force and self._is_imported(path, stat.st_size, stat.st_mtime):
+                skipped += 1
+            else:
+                files.append(path)
+
+        summary = {'files': 0, 'skipped_files': skipped, 'editions': 0, 'isbns': 0, 'authors': 0,
+                   'works': 0, 'skipped_lines': 0, 'errors': 0}
+
+        # Bulk loading: durability of a half-written import is handled by the files table
+        self._conn.execute('PRAGMA synchronous=OFF')
+        try:
+            results = multiprocessing.Queue(2 * workers)
+            with multiprocessing.Pool(workers, _init_worker, (results,)) as pool:
+                for path in files:
+                    pool.apply_async(import_file_worker, (path, batch_lines))
+                file_records = {}
+                remaining = len(files)
+                while remaining:
+                    remaining -= self._finish(results.get(), file_records, summary, progress)
+        finally:
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+
+        elapsed = time.perf_counter() - start
+        records = summary['editions'] + summary['authors'] + summary['works']
+        summary['elapsed_seconds'] = round(elapsed, 3)
+        summary['records_per_second'] = round(records / elapsed, 1) if elapsed > 0 else None
+        summary['index'] = self.path
+        return summary
+
+    def _finish(self, message, file_records, summary, progress):
+        """
+        Store one batch from a worker; once a file is done, mark it imported.
+
+        Returns:
+            1 if the message finished a file, else 0
+        """
+        path, rows, done = message
+        if not done:
+            self._store_rows(rows)
+            for table in ('editions', 'isbns', 'authors', 'works'):
+                summary[table] += len(rows[table])
+            summary['skipped_lines'] += rows['skipped']
+            summary['errors'] += rows['errors']
+            file_records[path] = (file_records.get(path, 0) + len(rows['editions'])
+                                  + len(rows['authors']) + len(rows['works']))
+            return 0
+        if rows is not None:
+            raise RuntimeError(f"Import of {path} failed: {rows}")
+        # A file's batches come from one worker in order, so all of them are stored
+        records = file_records.pop(path, 0)
+        self._mark_imported(path, records)
+        summary['files'] += 1
+        if progress:
+            progress(path, records)
+        return 1
+
+    def stats(self):
+        """Return the index size and this process's lookup counters."""
+        with self._lock:
+            counts = {table: self._conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                      for table in ('editions', 'isbns', 'authors', 'works', 'work_editions', 'files')}
+        return {
+            'path': self.path,
+            'editions': counts['editions'],
+            'isbns': counts['isbns'],
+            'authors': counts['authors'],
+            'works': counts['works'],
+            'work_editions': counts['work_editions'],
+            'files_imported': counts['files'],
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_dump_index():
+    """
+    Return the shared dump index, or None if none is configured.
+
+    Lookups only use an index that OPENLIBRARY_DUMP_INDEX names and that
+    already exists; nothing is created as a side effect of a lookup.
+    """
+    global _default_index
+
+    path = os.environ.get('OPENLIBRARY_DUMP_INDEX')
+    if not path or not os.path.exists(path):
+        return None
+
+    with _default_index_lock:
+        if _default_index is None:
+            try:
+                _default_index = DumpIndex(path)
+            except sqlite3.Error as e:
+                print(f"Warning: dump index unavailable: {e}", file=sys.stderr)
+                return None
+        return _default_index
+
+
+def _lookup(method, *args):
+    index = get_dump_index()
+    if index is None:
+        return None
+    try:
+        return getattr(index, method)(*args)
+    except sqlite3.Error as e:
+        print(f"Warning: dump index lookup failed: {e}", file=sys.stderr)
+        return None
+
+
+def lookup_edition(isbn):
+    """Return an edition record for an ISBN from the configured dump index, or None."""
+    return _lookup('get_edition_by_isbn', isbn)
+
+
+def lookup_edition_by_key(key):
+    """Return an edition record for an edition key from the configured dump index, or None."""
+    return _lookup('get_edition', key)
+
+
+def lookup_author(key):
+    """Return an author record from the configured dump index, or None."""
+    return _lookup('get_author', key)
+
+
+def lookup_author_names(keys):
+    """Return author key -> name for the keys in the configured dump index (empty if none is configured)."""
+    return _lookup('get_author_names', keys) or {}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import and query an offline OpenLibrary dump index')
+    parser.add_argument('command', choices=['import', 'stats', 'get'])
+    parser.add_argument('paths', nargs='*', help='Dump files or directories (import), or an ISBN, /books/, /authors/ or /works/ key (get)')
+    parser.add_argument('--index', default=os.environ.get('OPENLIBRARY_DUMP_INDEX') or DEFAULT_INDEX_PATH,
+                        help='Index database file')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--batch-lines', type=int, default=DEFAULT_BATCH_LINES, help='Lines per batch sent back by a worker')
+    parser.add_argument('--force', action='store_true', help='Re-import files that were already imported')
+
+    args = parser.parse_args()
+    index = DumpIndex(args.index)
+
+    if args.command == 'import':
+        if not args.paths:
+            parser.error('import needs at least one dump file or directory')
+        summary = index.import_files(
+            args.paths, workers=args.workers, force=args.force, batch_lines=max(1, args.batch_lines),
+            progress=lambda path, records: print(f"{records:>10} records  {path}", file=sys.stderr)
+        )
+        print(json.dumps(summary, indent=2))
+    elif args.command == 'stats':
+        print(json.dumps(index.stats(), indent=2))
+    else:
+        if len(args.paths) != 1:
+            parser.error('get needs exactly one ISBN, edition key, author key or work key')
+        key = args.paths[0].strip()
+        if canonicalize_isbn(key):
+            record = index.get_edition_by_isbn(key)
+        elif key.startswith('/books/'):
+            record = index.get_edition(key)
+        elif key.startswith('/authors/'):
+            record = index.get_author(key)
+        elif key.startswith('/works/'):
+            record = index.get_work(key)
+        else:
+            parser.error(f'not an ISBN or a /books/, /authors/ or /works/ key: {key}')
+        if record is None:
+            print(json.dumps({'error': f'Not in dump index: {key}'}, indent=2))
+            sys.exit(1)
+        print(json.dumps(record, indent=2))
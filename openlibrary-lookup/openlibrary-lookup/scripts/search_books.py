@@ -8,6 +8,8 @@ import json
 import sys
 import argparse
 
+from openlibrary_client import api_get
+
 def search_books(query, limit=5):
     """
     Search for books on OpenLibrary.
@@ -27,7 +29,7 @@ def search_books(query, limit=5):
     }
     
     try:
-        response = requests.get(base_url, params=params, timeout=10)
+        response = api_get(base_url, params=params)
         response.raise_for_status()
         data = response.json()
         
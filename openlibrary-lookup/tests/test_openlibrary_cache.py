@@ -0,0 +1,40 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'openlibrary-lookup', 'scripts'))
+
+from openlibrary_cache import canonicalize_isbn, looks_like_isbn  # noqa: E402
+
+
+class CanonicalizeIsbnTest(unittest.TestCase):
+
+    def test_isbn13_spellings(self):
+        for spelling in ('9780306406157', '978-0-306-40615-7', '978 0 306 40615 7', 'ISBN: 978-0-306-40615-7',
+                         'isbn-13 9780306406157', ' 9780306406157 '):
+            with self.subTest(spelling=spelling):
+                self.assertEqual(canonicalize_isbn(spelling), '9780306406157')
+
+    def test_isbn10_is_converted_to_isbn13(self):
+        self.assertEqual(canonicalize_isbn('0306406152'), '9780306406157')
+        self.assertEqual(canonicalize_isbn('0-306-40615-2'), '9780306406157')
+        self.assertEqual(canonicalize_isbn('ISBN-10: 0 306 40615 2'), '9780306406157')
+
+    def test_x_check_digit(self):
+        self.assertEqual(canonicalize_isbn('080442957X'), '9780804429573')
+        self.assertEqual(canonicalize_isbn('0-8044-2957-x'), '9780804429573')
+
+    def test_bad_checksums_are_rejected(self):
+        for value in ('9780306406158', '0306406153', '0804429578', '9790306406157'):
+            with self.subTest(value=value):
+                self.assertIsNone(canonicalize_isbn(value))
+                self.assertTrue(looks_like_isbn(value))
+
+    def test_not_an_isbn(self):
+        for value in (None, '', 'the hobbit', '12345', '97803064061570', 'X306406152'):
+            with self.subTest(value=value):
+                self.assertIsNone(canonicalize_isbn(value))
+
+
+if __name__ == '__main__':
+    unittest.main()
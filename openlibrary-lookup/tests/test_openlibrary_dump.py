@@ -0,0 +1,105 @@
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'openlibrary-lookup', 'scripts'))
+
+import book_lookup  # noqa: E402
+import openlibrary_client  # noqa: E402
+import openlibrary_dump  # noqa: E402
+
+
+def dump_line(record_type, key, record):
+    text = record if isinstance(record, str) else json.dumps(record)
+    return f"/type/{record_type}\t{key}\t1\t2024-01-01T00:00:00\t{text}\n"
+
+
+def no_network(*args, **kwargs):
+    raise AssertionError('the API was called')
+
+
+class DumpImportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.index_path = os.path.join(self.directory, 'dump.sqlite3')
+        dump = os.path.join(self.directory, 'dump')
+        os.makedirs(dump)
+
+        with gzip.open(os.path.join(dump, 'ol_dump_authors.txt.gz'), 'wt', encoding='utf-8') as f:
+            f.write(dump_line('author', '/authors/OL1A', {'key': '/authors/OL1A', 'name': 'Ann Author'}))
+            f.write(dump_line('author', '/authors/OL2A', {'key': '/authors/OL2A', 'name': 'Bob Writer'}))
+            f.write(dump_line('redirect', '/authors/OL3A', {'location': '/authors/OL1A'}))
+        with gzip.open(os.path.join(dump, 'ol_dump_works.txt.gz'), 'wt', encoding='utf-8') as f:
+            f.write(dump_line('work', '/works/OL1W', {'key': '/works/OL1W', 'title': 'A Work'}))
+        with gzip.open(os.path.join(dump, 'ol_dump_editions.txt.gz'), 'wt', encoding='utf-8') as f:
+            f.write(dump_line('edition', '/books/OL1M', {
+                'key': '/books/OL1M', 'title': 'A Book', 'subtitle': 'With a Subtitle',
+                'authors': [{'key': '/authors/OL1A'}, {'key': '/authors/OL2A'}],
+                'works': [{'key': '/works/OL1W'}], 'publishers': ['Press'], 'publish_date': '2001',
+                'isbn_10': ['0306406152'], 'number_of_pages': 320}))
+            f.write(dump_line('edition', '/books/OL2M', {
+                'key': '/books/OL2M', 'title': 'X Book', 'works': [{'key': '/works/OL1W'}],
+                'isbn_10': ['080442957X'], 'isbn_13': ['9780306406158']}))
+            # Malformed records are counted as errors, not fatal
+            f.write(dump_line('edition', '/books/OL3M', {'key': '/books/OL3M', 'isbn_13': '9780804429573'}))
+            f.write(dump_line('edition', '/books/OL4M', '[1, 2]'))
+            f.write(dump_line('edition', '/books/OL5M', '{not json'))
+            f.write('too\tfew\tfields\n')
+        self.dump = dump
+
+        index = openlibrary_dump.DumpIndex(self.index_path)
+        self.addCleanup(index.close)
+        self.summary = index.import_files([dump], workers=2, batch_lines=2)
+        self.index = index
+
+        patches = [
+            mock.patch.dict(os.environ, {'OPENLIBRARY_DUMP_INDEX': self.index_path, 'OPENLIBRARY_CACHE_DISABLE': '1'}),
+            mock.patch.object(openlibrary_dump, '_default_index', None),
+            mock.patch.object(book_lookup, 'api_get', side_effect=no_network),
+            mock.patch.object(openlibrary_client, 'api_get', side_effect=no_network)
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_import_summary(self):
+        self.assertEqual(self.summary['files'], 3)
+        self.assertEqual((self.summary['editions'], self.summary['authors'], self.summary['works']), (2, 2, 1))
+        # Only valid ISBNs are indexed (the bad ISBN-13 checksum is skipped)
+        self.assertEqual(self.summary['isbns'], 2)
+        self.assertEqual(self.summary['errors'], 4)
+        self.assertEqual(self.summary['skipped_lines'], 1)
+
+    def test_reimport_skips_imported_files(self):
+        summary = self.index.import_files([self.dump], workers=2)
+        self.assertEqual((summary['files'], summary['skipped_files'], summary['editions']), (0, 3, 0))
+
+    def test_isbn_lookup(self):
+        for isbn in ('0306406152', '978-0-306-40615-7'):
+            with self.subTest(isbn=isbn):
+                self.assertEqual(openlibrary_dump.lookup_edition(isbn)['key'], '/books/OL1M')
+        self.assertEqual(openlibrary_dump.lookup_edition('9780804429573')['key'], '/books/OL2M')
+        self.assertIsNone(openlibrary_dump.lookup_edition('9780306406158'))
+        self.assertEqual(openlibrary_dump.lookup_edition_by_key('OL2M')['title'], 'X Book')
+
+    def test_work_and_authors(self):
+        self.assertEqual(sorted(self.index.get_work('OL1W')['edition_keys']), ['/books/OL1M', '/books/OL2M'])
+        self.assertEqual(openlibrary_dump.lookup_author_names(['/authors/OL1A', '/authors/OL9A']),
+                         {'/authors/OL1A': 'Ann Author'})
+
+    def test_book_lookup_uses_the_index(self):
+        book = book_lookup.get_book_data_by_isbn('9780306406157')
+        self.assertEqual(book['title'], 'A Book')
+        self.assertEqual(book['authors'], ['Ann Author', 'Bob Writer'])
+        self.assertEqual(book['publishers'], ['Press'])
+
+
+if __name__ == '__main__':
+    unittest.main()